@@ -1,504 +1,33 @@
 import os
 import json
-import pandas as pd
-import joblib
-import requests
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+import argparse
 import logging
-from dataclasses import dataclass, asdict
-import uuid
-import hashlib
-
-# Firebase imports
-import firebase_admin
-from firebase_admin import credentials, firestore
-from google.cloud.firestore_v1.base_query import FieldFilter
+from dataclasses import asdict
+import tempfile
+
+# fraud first: its runtime module times the numpy and pandas imports for startup-report
+from fraud.runtime import STARTUP_TIMINGS, configure_runtime, format_startup_report, startup_phase
+from fraud.claims import ClaimData
+from fraud.storage import create_storage_backend
+from fraud.duplicates import DuplicateClaimIndex
+from fraud.registry import ModelRegistry
+from fraud.retraining import ModelRetrainer
+from fraud.fast_path import FastPathScorer
+from fraud.synthetic import SyntheticClaimGenerator
+from fraud.system import ImprovedFraudDetectionSystem
+from fraud.service import PreforkServer, ScoringService
+from fraud.ingest import BulkIngestor
+from fraud.benchmark import PipelineBenchmark
 
-# Load environment variables
-from dotenv import load_dotenv
-load_dotenv()
+import pandas as pd
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# =====================================================
-# DATA CLASSES FOR STRUCTURED DATA
-# =====================================================
-
-@dataclass
-class ClaimData:
-    """Structured claim data"""
-    claim_id: str
-    months_as_customer: int
-    age: int
-    policy_number: str
-    policy_bind_date: str
-    policy_state: str
-    policy_csl: str
-    policy_deductable: float
-    policy_annual_premium: float
-    umbrella_limit: float
-    insured_zip: int
-    insured_sex: str
-    insured_education_level: str
-    insured_occupation: str
-    insured_hobbies: str
-    insured_relationship: str
-    capital_gains: float
-    capital_loss: float
-    incident_date: str
-    incident_type: str
-    collision_type: str
-    incident_severity: str
-    authorities_contacted: str
-    incident_state: str
-    incident_city: str
-    incident_location: str
-    incident_hour_of_the_day: int
-    number_of_vehicles_involved: int
-    property_damage: str
-    bodily_injuries: int
-    witnesses: int
-    police_report_available: str
-    total_claim_amount: float
-    injury_claim: float
-    property_claim: float
-    vehicle_claim: float
-    auto_make: str
-    auto_model: str
-    auto_year: int
-    fraud_reported: str = "N"
-    created_at: str = None
-    updated_at: str = None
-
-    def __post_init__(self):
-        if not self.claim_id:
-            self.claim_id = self.generate_claim_id()
-        if not self.created_at:
-            self.created_at = datetime.now().isoformat()
-        self.updated_at = datetime.now().isoformat()
-
-    def generate_claim_id(self) -> str:
-        """Generate unique claim ID"""
-        data_string = f"{self.policy_number}{self.incident_date}{self.total_claim_amount}"
-        hash_object = hashlib.md5(data_string.encode())
-        return f"CLAIM_{hash_object.hexdigest()[:8].upper()}"
-
-@dataclass
-class FraudAnalysisResult:
-    """Structured fraud analysis result"""
-    claim_id: str
-    rule_based_score: float
-    catboost_probability: float
-    combined_score: float
-    ai_fraud_score: float
-    explanation: str
-    action: str
-    follow_up_questions: List[str]
-    risk_level: str
-    reasons: List[str]
-    analysis_timestamp: str = None
-    processing_time_ms: float = None
-
-    def __post_init__(self):
-        if not self.analysis_timestamp:
-            self.analysis_timestamp = datetime.now().isoformat()
-
-# =====================================================
-# FIREBASE MANAGER
-# =====================================================
-
-class FirebaseManager:
-    """Handles all Firebase operations"""
-    
-    def __init__(self):
-        self.db = None
-        self.initialize_firebase()
-
-    def initialize_firebase(self):
-        """Initialize Firebase Admin SDK"""
-        try:
-            # Check if Firebase app is already initialized
-            if not firebase_admin._apps:
-                cred_path = os.getenv('FIREBASE_CREDENTIALS_PATH', 'insurance-fraud-detectio-a6526-firebase-adminsdk-fbsvc-9a0f74002a.json')
-                
-                if not os.path.exists(cred_path):
-                    raise FileNotFoundError(f"Firebase credentials file not found: {cred_path}")
-                
-                cred = credentials.Certificate(cred_path)
-                firebase_admin.initialize_app(cred, {
-                    'projectId': os.getenv('FIREBASE_PROJECT_ID', 'insurance-fraud-detection')
-                })
-            
-            self.db = firestore.client()
-            logger.info("✅ Firebase initialized successfully")
-            
-        except Exception as e:
-            logger.error(f"❌ Firebase initialization failed: {str(e)}")
-            raise
-
-    def save_claim(self, claim_data: ClaimData) -> bool:
-        """Save claim data to Firestore"""
-        try:
-            claim_dict = asdict(claim_data)
-            doc_ref = self.db.collection('claims').document(claim_data.claim_id)
-            doc_ref.set(claim_dict)
-            logger.info(f"✅ Claim saved: {claim_data.claim_id}")
-            return True
-        except Exception as e:
-            logger.error(f"❌ Error saving claim: {str(e)}")
-            return False
-
-    def save_analysis_result(self, result: FraudAnalysisResult) -> bool:
-        """Save fraud analysis result to Firestore"""
-        try:
-            result_dict = asdict(result)
-            doc_ref = self.db.collection('fraud_analyses').document(result.claim_id)
-            doc_ref.set(result_dict)
-            logger.info(f"✅ Analysis result saved: {result.claim_id}")
-            return True
-        except Exception as e:
-            logger.error(f"❌ Error saving analysis result: {str(e)}")
-            return False
-
-    def get_claim(self, claim_id: str) -> Optional[Dict]:
-        """Retrieve claim data from Firestore"""
-        try:
-            doc_ref = self.db.collection('claims').document(claim_id)
-            doc = doc_ref.get()
-            if doc.exists:
-                return doc.to_dict()
-            return None
-        except Exception as e:
-            logger.error(f"❌ Error retrieving claim: {str(e)}")
-            return None
-
-    def get_analysis_result(self, claim_id: str) -> Optional[Dict]:
-        """Retrieve analysis result from Firestore"""
-        try:
-            doc_ref = self.db.collection('fraud_analyses').document(claim_id)
-            doc = doc_ref.get()
-            if doc.exists:
-                return doc.to_dict()
-            return None
-        except Exception as e:
-            logger.error(f"❌ Error retrieving analysis result: {str(e)}")
-            return None
-
-    def get_claims_by_policy(self, policy_number: str) -> List[Dict]:
-        """Get all claims for a specific policy"""
-        try:
-            claims_ref = self.db.collection('claims')
-            query = claims_ref.where('policy_number', '==', policy_number)
-            docs = query.stream()
-            return [doc.to_dict() for doc in docs]
-        except Exception as e:
-            logger.error(f"❌ Error retrieving claims by policy: {str(e)}")
-            return []
-
-    def get_high_risk_claims(self, threshold: float = 70.0) -> List[Dict]:
-        """Get all high-risk claims above threshold"""
-        try:
-            analyses_ref = self.db.collection('fraud_analyses')
-            query = analyses_ref.where('combined_score', '>=', threshold)
-            docs = query.stream()
-            return [doc.to_dict() for doc in docs]
-        except Exception as e:
-            logger.error(f"❌ Error retrieving high-risk claims: {str(e)}")
-            return []
-
-    def update_claim_status(self, claim_id: str, status: str) -> bool:
-        """Update claim status (e.g., 'approved', 'rejected', 'under_investigation')"""
-        try:
-            doc_ref = self.db.collection('claims').document(claim_id)
-            doc_ref.update({
-                'status': status,
-                'updated_at': datetime.now().isoformat()
-            })
-            logger.info(f"✅ Claim status updated: {claim_id} -> {status}")
-            return True
-        except Exception as e:
-            logger.error(f"❌ Error updating claim status: {str(e)}")
-            return False
-
-# =====================================================
-# IMPROVED FRAUD DETECTION SYSTEM
-# =====================================================
-
-class ImprovedFraudDetectionSystem:
-    """Enhanced fraud detection system with Firebase integration"""
-    
-    def __init__(self):
-        self.firebase = FirebaseManager()
-        self.catboost_model = None
-        self.categorical_features = None
-        self.perplexity_api_key = os.getenv("PERPLEXITY_API_KEY")
-        self.load_models()
-
-    def load_models(self):
-        """Load pre-trained models"""
-        try:
-            self.catboost_model = joblib.load("models/catboost_model.pkl")
-            self.categorical_features = joblib.load("models/categorical_features.pkl")
-            logger.info("✅ Models loaded successfully")
-        except Exception as e:
-            logger.error(f"❌ Error loading models: {str(e)}")
-            raise
-
-    def preprocess_input(self, user_df: pd.DataFrame) -> pd.DataFrame:
-        """Safe preprocessing for CatBoost input"""
-        user_df = user_df.copy()
-        
-        # Ensure all features exist
-        for col in self.catboost_model.feature_names_:
-            if col not in user_df.columns:
-                user_df[col] = 'Unknown' if col in self.categorical_features else 0
-        
-        # Keep only required features in order
-        user_df = user_df[self.catboost_model.feature_names_]
-        
-        # Fill missing values
-        for col in self.categorical_features:
-            user_df.loc[:, col] = user_df[col].fillna('Unknown').astype(str)
-        for col in user_df.columns:
-            if col not in self.categorical_features:
-                user_df.loc[:, col] = user_df[col].fillna(user_df[col].median())
-        
-        return user_df
-
-    def get_catboost_prediction(self, user_df: pd.DataFrame) -> Dict:
-        """Get fraud prediction from CatBoost model"""
-        try:
-            X_processed = self.preprocess_input(user_df)
-            prob = self.catboost_model.predict_proba(X_processed)[:, 1][0]
-            pred = 'y' if prob >= 0.5 else 'n'
-            return {
-                "fraud_prediction": pred,
-                "fraud_probability": float(prob),
-                "confidence": float(abs(prob - 0.5) * 2)  # Confidence score 0-1
-            }
-        except Exception as e:
-            logger.error(f"❌ Error in CatBoost prediction: {str(e)}")
-            return {"fraud_prediction": "error", "fraud_probability": 0.0, "confidence": 0.0}
-
-    def analyze_with_ai(self, claim_details: Dict, evidence: Dict) -> Dict:
-        """Enhanced AI analysis with Perplexity"""
-        system_prompt = """
-        You are an expert insurance fraud investigation assistant with access to multiple detection systems.
-
-        You receive:
-        - Claim details from the customer
-        - Rule-based fraud detection score (0-100)
-        - CatBoost ML model prediction and probability
-        - Combined algorithmic score
-
-        Your task is to provide a final assessment considering all evidence.
-
-        Fraud score interpretation:
-        - 0-20: Very low risk (likely genuine)
-        - 21-40: Low risk (minor concerns)
-        - 41-60: Medium risk (requires attention)
-        - 61-80: High risk (likely fraudulent)
-        - 81-100: Very high risk (almost certainly fraudulent)
-
-        Actions:
-        - "accept": Low risk, approve claim
-        - "request_documents": Medium risk, need more evidence
-        - "escalate_investigation": High risk, human investigation needed
-        - "reject": Very high risk, deny claim
-
-        Respond in JSON format:
-        {
-          "fraud_score": number (0-100),
-          "explanation": "detailed reasoning",
-          "action": "accept|request_documents|escalate_investigation|reject",
-          "confidence": number (0-1),
-          "key_risk_factors": ["factor1", "factor2"],
-          "recommendations": ["rec1", "rec2"]
-        }
-        """
-
-        try:
-            url = "https://api.perplexity.ai/chat/completions"
-            headers = {
-                "Authorization": f"Bearer {self.perplexity_api_key}",
-                "Content-Type": "application/json"
-            }
-            data = {
-                "model": "sonar",
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": json.dumps({
-                        "claim_details": claim_details,
-                        "evidence": evidence
-                    })}
-                ],
-                "temperature": 0.1,
-                "max_tokens": 800
-            }
-
-            response = requests.post(url, headers=headers, json=data, timeout=30)
-            response.raise_for_status()
-            
-            result = response.json()
-            content = result.get("choices", [])[0].get("message", {}).get("content")
-            return json.loads(content)
-            
-        except Exception as e:
-            logger.error(f"❌ AI analysis error: {str(e)}")
-            return {
-                "fraud_score": evidence.get("combined_score", 50),
-                "explanation": f"AI analysis failed: {str(e)}. Using algorithmic score.",
-                "action": "escalate_investigation",
-                "confidence": 0.3,
-                "key_risk_factors": ["AI analysis unavailable"],
-                "recommendations": ["Manual review required"]
-            }
-
-    def process_claim(self, claim_data: ClaimData) -> FraudAnalysisResult:
-        """Complete fraud detection pipeline"""
-        start_time = datetime.now()
-        
-        try:
-            # Step 1: Save claim to database
-            self.firebase.save_claim(claim_data)
-            
-            # Step 2: Convert to DataFrame for model processing
-            claim_dict = asdict(claim_data)
-            user_df = pd.DataFrame([claim_dict])
-            
-            # Step 3: Rule-based analysis (simplified version)
-            rule_score = self.calculate_rule_based_score(claim_dict)
-            
-            # Step 4: CatBoost prediction
-            catboost_result = self.get_catboost_prediction(user_df)
-            catboost_prob = catboost_result.get("fraud_probability", 0.0)
-            
-            # Step 5: Combined score
-            combined_score = (0.6 * (rule_score / 100) + 0.4 * catboost_prob) * 100
-            
-            # Step 6: AI analysis
-            evidence = {
-                "rule_based_score": rule_score,
-                "catboost_result": catboost_result,
-                "combined_score": combined_score
-            }
-            
-            ai_result = self.analyze_with_ai(claim_dict, evidence)
-            
-            # Step 7: Create result object
-            processing_time = (datetime.now() - start_time).total_seconds() * 1000
-            
-            result = FraudAnalysisResult(
-                claim_id=claim_data.claim_id,
-                rule_based_score=rule_score,
-                catboost_probability=catboost_prob,
-                combined_score=combined_score,
-                ai_fraud_score=ai_result.get("fraud_score", combined_score),
-                explanation=ai_result.get("explanation", "No explanation available"),
-                action=ai_result.get("action", "escalate_investigation"),
-                follow_up_questions=ai_result.get("recommendations", []),
-                risk_level=self.get_risk_level(ai_result.get("fraud_score", combined_score)),
-                reasons=ai_result.get("key_risk_factors", []),
-                processing_time_ms=processing_time
-            )
-            
-            # Step 8: Save analysis result
-            self.firebase.save_analysis_result(result)
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"❌ Error processing claim: {str(e)}")
-            processing_time = (datetime.now() - start_time).total_seconds() * 1000
-            
-            return FraudAnalysisResult(
-                claim_id=claim_data.claim_id,
-                rule_based_score=0,
-                catboost_probability=0,
-                combined_score=0,
-                ai_fraud_score=50,
-                explanation=f"Processing error: {str(e)}",
-                action="escalate_investigation",
-                follow_up_questions=["Manual review required due to system error"],
-                risk_level="MEDIUM",
-                reasons=["System error"],
-                processing_time_ms=processing_time
-            )
-
-    def calculate_rule_based_score(self, claim_dict: Dict) -> float:
-        """Simplified rule-based scoring"""
-        score = 0
-        
-        # High amount suspicious
-        if claim_dict.get('total_claim_amount', 0) > 50000:
-            score += 25
-        
-        # Night time incidents
-        hour = claim_dict.get('incident_hour_of_the_day', 12)
-        if hour <= 4 or hour >= 22:
-            score += 15
-        
-        # No witnesses + no police report
-        if (claim_dict.get('witnesses', 1) == 0 and 
-            str(claim_dict.get('police_report_available', 'YES')).upper() == 'NO'):
-            score += 20
-        
-        # Cross-state incident
-        if (claim_dict.get('incident_state', '') != claim_dict.get('policy_state', '')):
-            score += 10
-        
-        # Old vehicle, high claim
-        current_year = datetime.now().year
-        vehicle_age = current_year - int(claim_dict.get('auto_year', current_year))
-        if vehicle_age > 15 and claim_dict.get('total_claim_amount', 0) > 30000:
-            score += 20
-        
-        return min(score, 100)
-
-    def get_risk_level(self, score: float) -> str:
-        """Convert numeric score to risk level"""
-        if score >= 80:
-            return "VERY_HIGH"
-        elif score >= 60:
-            return "HIGH"
-        elif score >= 40:
-            return "MEDIUM"
-        elif score >= 20:
-            return "LOW"
-        else:
-            return "MINIMAL"
-
-    def get_claim_history(self, policy_number: str) -> List[Dict]:
-        """Get historical claims for a policy"""
-        return self.firebase.get_claims_by_policy(policy_number)
-
-    def get_dashboard_data(self) -> Dict:
-        """Get data for fraud detection dashboard"""
-        try:
-            high_risk_claims = self.firebase.get_high_risk_claims(70.0)
-            
-            # Calculate statistics
-            total_high_risk = len(high_risk_claims)
-            total_amount_at_risk = sum(claim.get('total_claim_amount', 0) for claim in high_risk_claims)
-            
-            return {
-                "high_risk_claims_count": total_high_risk,
-                "total_amount_at_risk": total_amount_at_risk,
-                "high_risk_claims": high_risk_claims[:10],  # Top 10 for display
-                "last_updated": datetime.now().isoformat()
-            }
-        except Exception as e:
-            logger.error(f"❌ Error getting dashboard data: {str(e)}")
-            return {"error": str(e)}
-
 # =====================================================
 # USAGE EXAMPLES
 # =====================================================
 
-def main():
+def run_example():
     """Example usage of the improved fraud detection system"""
     
     # Initialize the system
@@ -580,5 +109,231 @@ def main():
     print(f"High-risk claims: {dashboard.get('high_risk_claims_count', 0)}")
     print(f"Total amount at risk: ${dashboard.get('total_amount_at_risk', 0):,.2f}")
 
+# =====================================================
+# COMMAND LINE
+# =====================================================
+
+def main():
+    """Command-line entry point; runs the example claim when no command is given"""
+    configure_runtime()
+    parser = argparse.ArgumentParser(description="Insurance claim fraud detection")
+    subparsers = parser.add_subparsers(dest="command")
+
+    register_parser = subparsers.add_parser("register-model",
+                                            help="Convert the pickled model into a native registry version")
+    register_parser.add_argument("--no-activate", action="store_true", help="Register without serving it")
+    register_parser.add_argument("--fill-values-from", metavar="TRAINING_FILE",
+                                 help="Fit numeric fill values (medians) from the training CSV/Parquet")
+
+    activate_parser = subparsers.add_parser("activate-model", help="Serve a registered model version")
+    activate_parser.add_argument("version")
+
+    subparsers.add_parser("list-models", help="List registered model versions")
+
+    retrain_parser = subparsers.add_parser("retrain",
+                                           help="Continue training the active model on newly labelled claims")
+    retrain_parser.add_argument("--iterations", type=int, help="Maximum trees to add")
+    retrain_parser.add_argument("--learning-rate", type=float)
+    retrain_parser.add_argument("--early-stopping-rounds", type=int)
+    retrain_parser.add_argument("--min-claims", type=int, help="Skip the run below this many labelled claims")
+    retrain_parser.add_argument("--tolerance", type=float, help="Allowed AUC/Logloss slack before rejecting")
+    retrain_parser.add_argument("--trust-fraud-reported", action="store_true", default=None,
+                                help="Treat fraud_reported=N as a genuine label (imported history)")
+    retrain_parser.add_argument("--full", action="store_true", help="Ignore the watermark and read every claim")
+    retrain_parser.add_argument("--dry-run", action="store_true", help="Train and validate without registering")
+    retrain_parser.add_argument("--no-activate", action="store_true", help="Register without serving it")
+
+    serve_parser = subparsers.add_parser("serve", help="Run the HTTP scoring service")
+    serve_parser.add_argument("--host", default=os.getenv("SERVICE_HOST", "127.0.0.1"))
+    serve_parser.add_argument("--port", type=int, default=int(os.getenv("SERVICE_PORT", "8000")))
+    serve_parser.add_argument("--max-batch-size", type=int, default=int(os.getenv("SERVICE_MAX_BATCH_SIZE", "64")))
+    serve_parser.add_argument("--max-wait-ms", type=float, default=float(os.getenv("SERVICE_MAX_WAIT_MS", "5")))
+    serve_parser.add_argument("--max-queue-size", type=int, default=int(os.getenv("SERVICE_MAX_QUEUE_SIZE", "1024")))
+    serve_parser.add_argument("--workers", type=int, default=int(os.getenv("SERVICE_WORKERS", "1")),
+                              help="Forked worker processes sharing the preloaded model (prefork when > 1)")
+
+    dedup_parser = subparsers.add_parser("index-duplicates",
+                                         help="Add a CSV/Parquet claim file to the duplicate index snapshot")
+    dedup_parser.add_argument("source", help="CSV or .parquet file in the ClaimData schema")
+    dedup_parser.add_argument("--output", default=os.getenv("DUPLICATE_INDEX_PATH", "data/duplicate_index.joblib"))
+    dedup_parser.add_argument("--chunk-size", type=int, default=int(os.getenv("INGEST_CHUNK_SIZE", "5000")))
+    dedup_parser.add_argument("--max-claims", type=int,
+                              default=int(os.getenv("DUPLICATE_INDEX_MAX_CLAIMS", "1000000")))
+
+    fast_build_parser = subparsers.add_parser("build-fast-path",
+                                              help="Distill the active model into a fast-path lookup table")
+    fast_build_parser.add_argument("--source", help="CSV or .parquet reference claims (default: synthetic claims)")
+    fast_build_parser.add_argument("--samples", type=int, default=50000, help="Synthetic claims when no --source")
+    fast_build_parser.add_argument("--features", help="Comma-separated categorical features (default: top two)")
+    fast_build_parser.add_argument("--quantile", type=float, default=0.01,
+                                   help="Tail share excluded from each combination's probability range")
+    fast_build_parser.add_argument("--min-samples", type=int, default=30)
+    fast_build_parser.add_argument("--seed", type=int, default=42)
+
+    fast_eval_parser = subparsers.add_parser("evaluate-fast-path",
+                                             help="Compare the fast path with the full model: latency and drift")
+    fast_eval_parser.add_argument("--source", help="CSV or .parquet claims (default: synthetic claims)")
+    fast_eval_parser.add_argument("--samples", type=int, default=20000, help="Synthetic claims when no --source")
+    fast_eval_parser.add_argument("--seed", type=int, default=7, help="Use a different seed than the build")
+    fast_eval_parser.add_argument("--min-time", type=float, default=1.0, help="Seconds of timed calls per case")
+    fast_eval_parser.add_argument("--output", help="Write the report JSON here")
+
+    startup_parser = subparsers.add_parser("startup-report",
+                                           help="Time a cold start: imports, model load and first prediction")
+    startup_parser.add_argument("--connect", action="store_true", help="Also open the storage connection")
+    startup_parser.add_argument("--json", action="store_true", help="Print the phases as JSON")
+
+    ingest_parser = subparsers.add_parser("ingest", help="Score a CSV/Parquet claim file in chunks")
+    ingest_parser.add_argument("source", help="CSV or .parquet file in the ClaimData schema")
+    ingest_parser.add_argument("--output", required=True, help="Directory for part files and the checkpoint")
+    ingest_parser.add_argument("--format", choices=BulkIngestor.FORMATS, default="parquet")
+    ingest_parser.add_argument("--chunk-size", type=int, default=int(os.getenv("INGEST_CHUNK_SIZE", "5000")))
+    ingest_parser.add_argument("--workers", type=int, default=int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1))))
+    ingest_parser.add_argument("--use-ai", action="store_true", help="Run AI analysis for every claim")
+    ingest_parser.add_argument("--persist", "--firestore", action="store_true",
+                               help="Also save claims and results to the STORAGE_BACKEND store")
+    ingest_parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start over")
+
+    benchmark_parser = subparsers.add_parser("benchmark", help="Benchmark the scoring pipeline on synthetic claims")
+    benchmark_parser.add_argument("--sizes", default=",".join(map(str, PipelineBenchmark.DEFAULT_SIZES)),
+                                  help="Comma-separated batch sizes")
+    benchmark_parser.add_argument("--stages", default=",".join(PipelineBenchmark.STAGES),
+                                  help="Comma-separated stages")
+    benchmark_parser.add_argument("--min-time", type=float, default=1.0, help="Seconds of timed calls per case")
+    benchmark_parser.add_argument("--max-repeats", type=int, default=50)
+    benchmark_parser.add_argument("--ai-latency-ms", type=float, default=0.0, help="Simulated AI response time")
+    benchmark_parser.add_argument("--seed", type=int, default=42)
+    benchmark_parser.add_argument("--output", help="Write the report JSON here")
+    benchmark_parser.add_argument("--baseline", default=os.getenv("BENCH_BASELINE_PATH", "benchmarks/baseline.json"))
+    benchmark_parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    benchmark_parser.add_argument("--threshold", type=float,
+                                  default=float(os.getenv("BENCH_REGRESSION_THRESHOLD", "0.2")),
+                                  help="Allowed fractional slowdown before the run fails")
+
+    args = parser.parse_args()
+    registry = ModelRegistry(root=os.getenv("MODEL_REGISTRY_PATH", "models/registry"))
+
+    if args.command == "register-model":
+        version = registry.register_legacy(activate=not args.no_activate, training_path=args.fill_values_from)
+        print(f"Registered {version}")
+    elif args.command == "activate-model":
+        registry.activate(args.version)
+        print(f"Serving {args.version}")
+    elif args.command == "serve":
+        service_options = {"max_batch_size": args.max_batch_size, "max_wait_ms": args.max_wait_ms,
+                           "max_queue_size": args.max_queue_size}
+        with startup_phase("build system"):
+            system = ImprovedFraudDetectionSystem()
+        if args.workers > 1:
+            PreforkServer(system, args.workers, args.host, args.port, **service_options).run()
+        else:
+            system.warm_up()
+            logger.info(f"📊 Startup breakdown:\n{format_startup_report()}")
+            ScoringService(system, **service_options).serve_forever(args.host, args.port)
+    elif args.command == "index-duplicates":
+        index = DuplicateClaimIndex(path=args.output, max_claims=args.max_claims)
+        reader = BulkIngestor(args.source, os.path.dirname(args.output) or ".", chunk_size=args.chunk_size)
+        try:
+            for _, _, chunk_df in reader.iter_chunks():
+                for claim in ImprovedFraudDetectionSystem.claims_from_dataframe(chunk_df):
+                    if not isinstance(claim, Exception):
+                        index.add(asdict(claim))
+        except (ValueError, OSError) as e:
+            parser.error(str(e))
+        index.save()
+        print(json.dumps(index.stats(), indent=2))
+    elif args.command in ("build-fast-path", "evaluate-fast-path"):
+        logger.setLevel(logging.WARNING)
+        system = ImprovedFraudDetectionSystem(persist=False)
+        model_version = system.model_registry.active
+        if args.source:
+            reader = BulkIngestor(args.source, tempfile.gettempdir(), chunk_size=50000)
+            chunks = (chunk_df for _, _, chunk_df in reader.iter_chunks())
+        else:
+            chunks = iter([SyntheticClaimGenerator(args.seed).dataframe(args.samples)])
+        path = FastPathScorer.path_for(system.model_registry.root, model_version.version)
+        try:
+            if args.command == "build-fast-path":
+                features = args.features.split(",") if args.features else None
+                fast_path = FastPathScorer.distill(model_version, chunks, features=features, quantile=args.quantile,
+                                                   min_samples=args.min_samples)
+                fast_path.save(path)
+                print(json.dumps(fast_path.stats(), indent=2))
+            else:
+                fast_path = FastPathScorer.load(path)
+                if fast_path is None:
+                    parser.error(f"No fast path for model {model_version.version}; run build-fast-path first")
+                benchmark = PipelineBenchmark(system, SyntheticClaimGenerator(args.seed), min_time=args.min_time)
+                report = benchmark.evaluate_fast_path(fast_path, pd.concat(list(chunks), ignore_index=True))
+                print(PipelineBenchmark.format_table({"results": report["latency"]}))
+                print(json.dumps({key: value for key, value in report.items() if key != "latency"}, indent=2))
+                if args.output:
+                    with open(args.output, 'w') as f:
+                        json.dump(report, f, indent=2)
+        except (ValueError, OSError) as e:
+            parser.error(str(e))
+    elif args.command == "startup-report":
+        with startup_phase("build system"):
+            system = ImprovedFraudDetectionSystem()
+        system.warm_up()
+        if args.connect and system.storage is not None:
+            with startup_phase("first storage read"):
+                system.storage.get_claim("__startup_probe__")
+        if args.json:
+            print(json.dumps([{"phase": name, "depth": depth, "ms": round(ms, 2)}
+                              for name, depth, ms in STARTUP_TIMINGS], indent=2))
+        else:
+            print(format_startup_report())
+    elif args.command == "ingest":
+        ingestor = BulkIngestor(args.source, args.output, chunk_size=args.chunk_size, workers=args.workers,
+                                output_format=args.format, use_ai=args.use_ai, persist=args.persist)
+        try:
+            print(json.dumps(ingestor.run(restart=args.restart), indent=2))
+        except ValueError as e:
+            parser.error(str(e))
+    elif args.command == "benchmark":
+        # Per-claim log lines would dominate the measurements
+        logger.setLevel(logging.WARNING)
+        benchmark = PipelineBenchmark.with_stubs(
+            ai_latency_ms=args.ai_latency_ms, seed=args.seed,
+            sizes=[int(size) for size in args.sizes.split(",")], stages=args.stages.split(","),
+            min_time=args.min_time, max_repeats=args.max_repeats
+        )
+        report = benchmark.run()
+        print(PipelineBenchmark.format_table(report))
+        for path in [args.output] + ([args.baseline] if args.save_baseline else []):
+            if path:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                with open(path, 'w') as f:
+                    json.dump(report, f, indent=2)
+        if not args.save_baseline and os.path.exists(args.baseline):
+            with open(args.baseline, 'r') as f:
+                regressions = PipelineBenchmark.compare(report, json.load(f), args.threshold)
+            if regressions:
+                print(f"❌ {len(regressions)} regression(s) beyond {args.threshold:.0%} of {args.baseline}:")
+                print("\n".join(f"  {line}" for line in regressions))
+                raise SystemExit(1)
+            print(f"✅ No regressions beyond {args.threshold:.0%} of {args.baseline}")
+    elif args.command == "retrain":
+        storage = create_storage_backend()
+        retrainer = ModelRetrainer.from_env(
+            storage, registry, iterations=args.iterations, learning_rate=args.learning_rate,
+            early_stopping_rounds=args.early_stopping_rounds, min_claims=args.min_claims,
+            tolerance=args.tolerance, trust_fraud_reported=args.trust_fraud_reported
+        )
+        try:
+            report = retrainer.run(activate=not args.no_activate, full=args.full, dry_run=args.dry_run)
+        finally:
+            storage.close()
+        print(json.dumps(report, indent=2))
+        if report["status"] == "rejected":
+            raise SystemExit(1)
+    elif args.command == "list-models":
+        active = registry.active_version_name()
+        for version in registry.versions():
+            print(f"{'*' if version == active else ' '} {version}")
+    else:
+        run_example()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,37 @@
+"""Insurance claim fraud detection: scoring pipeline, storage, model registry and service.
+
+combined-as.py is the command-line entry point; everything it runs lives here.
+Heavy dependencies (CatBoost, Firebase, requests) are imported on first use.
+"""
+
+from .runtime import startup_phase
+
+with startup_phase("define modules"):
+    from .claims import ClaimBatch, ClaimData, FraudAnalysisResult
+    from .metrics import METRICS, track_stage
+    from .storage import (BufferedFirestoreWriter, FirebaseManager, SQLiteStorage, StorageBackend,
+                          create_storage_backend)
+    from .ai import AIResponseCache, CircuitBreaker, CircuitOpenError, PerplexityClient
+    from .rules import RuleEngine, RuleEvaluation
+    from .history import PolicyHistoryIndex
+    from .duplicates import DuplicateClaimIndex
+    from .features import FeaturePipeline
+    from .registry import ModelRegistry, ModelVersion
+    from .retraining import ModelRetrainer
+    from .explain import LocalExplainer, PendingExplanations
+    from .fast_path import FastPathScorer
+    from .synthetic import SyntheticClaimGenerator
+    from .system import ImprovedFraudDetectionSystem
+    from .service import PreforkServer, ScoringService
+    from .ingest import BulkIngestor
+    from .benchmark import PipelineBenchmark, StubAIClient, StubStorage
+
+__all__ = [
+    "ClaimBatch", "ClaimData", "FraudAnalysisResult", "METRICS", "track_stage",
+    "BufferedFirestoreWriter", "FirebaseManager", "SQLiteStorage", "StorageBackend", "create_storage_backend",
+    "AIResponseCache", "CircuitBreaker", "CircuitOpenError", "PerplexityClient",
+    "RuleEngine", "RuleEvaluation", "PolicyHistoryIndex", "DuplicateClaimIndex", "FeaturePipeline",
+    "ModelRegistry", "ModelVersion", "ModelRetrainer", "LocalExplainer", "PendingExplanations",
+    "FastPathScorer", "SyntheticClaimGenerator", "ImprovedFraudDetectionSystem",
+    "PreforkServer", "ScoringService", "BulkIngestor", "PipelineBenchmark", "StubAIClient", "StubStorage",
+]
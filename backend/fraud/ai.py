@@ -0,0 +1,336 @@
+import os
+import json
+from typing import Dict, Optional
+import logging
+import random
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .runtime import requests
+from .metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# AI CLIENT
+# =====================================================
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the AI API while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets one trial call through after reset_timeout"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self._trial_in_flight or self.consecutive_failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial_in_flight:
+                    logger.warning(f"⚠️ AI circuit breaker opened after {self.consecutive_failures} failures")
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class PerplexityClient:
+    """Pooled HTTP client for the Perplexity chat completions API.
+
+    Uses one keep-alive session, retries connection errors, timeouts, 429s and
+    5xx responses with full-jitter exponential backoff inside an overall time
+    budget, and fails fast through a circuit breaker when the API keeps failing.
+    A retry only starts if its backoff plus a full attempt (connect and read
+    timeouts) still fits in the budget, so a call never outlives total_timeout.
+    """
+
+    RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(self, api_key: Optional[str], base_url: str = "https://api.perplexity.ai",
+                 connect_timeout: float = 2.0, read_timeout: float = 8.0, total_timeout: float = 12.0,
+                 max_retries: int = 2, backoff_base: float = 0.25, backoff_max: float = 2.0,
+                 pool_size: int = 10, circuit_breaker: Optional[CircuitBreaker] = None):
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.total_timeout = total_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.api_key = api_key
+        self.pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """Keep-alive session, created on the first request"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update({
+                        "Authorization": f"Bearer {self.api_key}",
+                        "Content-Type": "application/json"
+                    })
+                    self._session = session
+        return self._session
+
+    @classmethod
+    def from_env(cls, api_key: Optional[str], pool_size: int = 10) -> "PerplexityClient":
+        """Build a client from PERPLEXITY_BASE_URL and AI_* environment variables"""
+        return cls(
+            api_key,
+            base_url=os.getenv("PERPLEXITY_BASE_URL", "https://api.perplexity.ai"),
+            connect_timeout=float(os.getenv("AI_CONNECT_TIMEOUT", "2")),
+            read_timeout=float(os.getenv("AI_READ_TIMEOUT", "8")),
+            total_timeout=float(os.getenv("AI_TOTAL_TIMEOUT", "12")),
+            max_retries=int(os.getenv("AI_MAX_RETRIES", "2")),
+            backoff_base=float(os.getenv("AI_BACKOFF_BASE", "0.25")),
+            pool_size=pool_size,
+            circuit_breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("AI_CIRCUIT_FAILURE_THRESHOLD", "5")),
+                reset_timeout=float(os.getenv("AI_CIRCUIT_RESET_SECONDS", "30")),
+            ),
+        )
+
+    def _backoff(self, attempt: int, response: Optional["requests.Response"] = None) -> float:
+        """Full-jitter exponential backoff, honouring a numeric Retry-After header"""
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            return min(float(response.headers["Retry-After"]), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def chat_completion(self, payload: Dict) -> Dict:
+        """POST /chat/completions and return the decoded JSON body"""
+        if not self.circuit_breaker.allow_request():
+            raise CircuitOpenError("AI API circuit breaker is open")
+
+        deadline = time.monotonic() + self.total_timeout
+        url = f"{self.base_url}/chat/completions"
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            response = None
+            try:
+                response = self.session.post(
+                    url, json=payload, timeout=(min(self.connect_timeout, max(0.1, remaining)),
+                                                max(0.1, min(self.read_timeout, remaining)))
+                )
+                if response.status_code not in self.RETRYABLE_STATUS:
+                    response.raise_for_status()
+                    result = response.json()
+                    self.circuit_breaker.record_success()
+                    return result
+                error = requests.HTTPError(f"{response.status_code} from AI API", response=response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            except Exception:
+                self.circuit_breaker.record_failure()
+                raise
+
+            delay = self._backoff(attempt, response)
+            attempt_time = self.connect_timeout + self.read_timeout
+            if attempt >= self.max_retries or time.monotonic() + delay + attempt_time > deadline:
+                self.circuit_breaker.record_failure()
+                raise error
+            logger.warning(f"⚠️ AI request failed ({str(error)}), retry {attempt + 1} in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1
+
+# =====================================================
+# AI RESPONSE CACHE
+# =====================================================
+
+class AIResponseCache:
+    """Two-tier cache for AI analysis responses.
+
+    Keys are SHA-256 hashes of the canonicalized request (model, prompt
+    version, claim details, scoring evidence); duplicate matches are sent
+    to the AI but not hashed. An in-memory LRU sits in front of a
+    persistent SQLite table; both tiers expire entries after ttl_seconds and
+    are bounded in size. Only successful responses should be put here.
+    """
+
+    # Fields that change on every submission without changing the claim itself
+    VOLATILE_CLAIM_FIELDS = ("created_at", "updated_at")
+    # Evidence about other claims on file: a resubmission always matches the
+    # original, so keying on it would make every resubmission a miss
+    VOLATILE_EVIDENCE_FIELDS = ("duplicate_matches",)
+    PRUNE_EVERY_PUTS = 100
+
+    def __init__(self, db_path: Optional[str] = None, ttl_seconds: float = 7 * 24 * 3600,
+                 max_memory_entries: int = 1024, max_disk_entries: int = 100000):
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts_since_prune = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.db_path = db_path
+        self._connection = None
+        self._connection_pid = None
+        self._connect_lock = threading.Lock()
+
+    @property
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """Disk tier connection (None when disabled), opened on first use and reopened after a fork"""
+        if self.db_path and (self._connection is None or self._connection_pid != os.getpid()):
+            with self._connect_lock:
+                if self._connection is None or self._connection_pid != os.getpid():
+                    os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+                    db = sqlite3.connect(self.db_path, check_same_thread=False)
+                    db.execute("PRAGMA journal_mode=WAL")
+                    db.execute("""
+                        CREATE TABLE IF NOT EXISTS ai_responses (
+                            key TEXT PRIMARY KEY,
+                            response TEXT NOT NULL,
+                            created_at REAL NOT NULL,
+                            last_access REAL NOT NULL
+                        )
+                    """)
+                    db.execute("CREATE INDEX IF NOT EXISTS idx_ai_responses_last_access ON ai_responses(last_access)")
+                    db.commit()
+                    self._connection = db
+                    self._connection_pid = os.getpid()
+        return self._connection
+
+    @classmethod
+    def from_env(cls) -> Optional["AIResponseCache"]:
+        """Build the cache from AI_CACHE_* environment variables (None when disabled)"""
+        if os.getenv("AI_CACHE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            db_path=os.getenv("AI_CACHE_PATH", "cache/ai_responses.sqlite") or None,
+            ttl_seconds=float(os.getenv("AI_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+            max_memory_entries=int(os.getenv("AI_CACHE_MAX_MEMORY_ENTRIES", "1024")),
+            max_disk_entries=int(os.getenv("AI_CACHE_MAX_DISK_ENTRIES", "100000")),
+        )
+
+    @classmethod
+    def make_key(cls, model: str, prompt_version: str, claim_details: Dict, evidence: Dict) -> str:
+        """Stable hash of a canonicalized AI request"""
+        claim_details = {k: v for k, v in claim_details.items() if k not in cls.VOLATILE_CLAIM_FIELDS}
+        evidence = {k: v for k, v in evidence.items() if k not in cls.VOLATILE_EVIDENCE_FIELDS}
+        canonical = json.dumps(
+            {"model": model, "prompt_version": prompt_version, "claim_details": claim_details, "evidence": evidence},
+            sort_keys=True, separators=(",", ":"), default=str
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached response for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                response, created_at = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    METRICS.inc("fraud_ai_cache_requests_total", result="memory_hit")
+                    return json.loads(response)
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT response, created_at FROM ai_responses WHERE key = ? AND created_at >= ?",
+                    (key, now - self.ttl_seconds)
+                ).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE ai_responses SET last_access = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    self._remember(key, row[0], row[1])
+                    self.disk_hits += 1
+                    METRICS.inc("fraud_ai_cache_requests_total", result="disk_hit")
+                    return json.loads(row[0])
+
+            self.misses += 1
+            METRICS.inc("fraud_ai_cache_requests_total", result="miss")
+            return None
+
+    def put(self, key: str, response: Dict):
+        """Store a successful AI response in both tiers"""
+        now = time.time()
+        payload = json.dumps(response)
+        with self._lock:
+            self._remember(key, payload, now)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO ai_responses (key, response, created_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, payload, now, now)
+                )
+                self._db.commit()
+                self._puts_since_prune += 1
+                if self._puts_since_prune >= self.PRUNE_EVERY_PUTS:
+                    self._prune_disk(now)
+
+    def _remember(self, key: str, payload: str, created_at: float):
+        self._memory[key] = (payload, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _prune_disk(self, now: float):
+        """Drop expired rows, then the least recently used rows beyond max_disk_entries"""
+        self._puts_since_prune = 0
+        self._db.execute("DELETE FROM ai_responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._db.execute("""
+            DELETE FROM ai_responses WHERE key IN (
+                SELECT key FROM ai_responses ORDER BY last_access DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_disk_entries,))
+        self._db.commit()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and tier sizes"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            disk_entries = self._db.execute("SELECT COUNT(*) FROM ai_responses").fetchone()[0] if self._db else 0
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+            }
@@ -0,0 +1,296 @@
+import os
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+import time
+import platform
+import tracemalloc
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from .runtime import catboost_utils
+from .claims import ClaimBatch, ClaimData, FraudAnalysisResult
+from .storage import StorageBackend
+from .duplicates import DuplicateClaimIndex
+from .fast_path import FastPathScorer
+from .synthetic import SyntheticClaimGenerator
+from .system import ImprovedFraudDetectionSystem
+
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# BENCHMARKS
+# =====================================================
+
+class StubStorage(StorageBackend):
+    """Storage backend that accepts every write and stores nothing"""
+
+    def __init__(self):
+        self.writes = 0
+
+    def save_claim(self, claim_data: ClaimData) -> bool:
+        self.writes += 1
+        return True
+
+    def save_analysis_results(self, results: List[FraudAnalysisResult]) -> Dict[str, bool]:
+        self.writes += len(results)
+        return {result.claim_id: True for result in results}
+
+    def get_claims(self, claim_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        return {claim_id: None for claim_id in claim_ids}
+
+    def get_analysis_results(self, claim_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        return {claim_id: None for claim_id in claim_ids}
+
+    def get_claims_by_policy_page(self, policy_number: str, page_size: int = 100,
+                                  cursor: Optional[List] = None) -> tuple:
+        return [], None
+
+    def get_claims_by_policies(self, policy_numbers: List[str]) -> Dict[str, List[Dict]]:
+        return {str(policy_number): [] for policy_number in policy_numbers}
+
+    def get_high_risk_claims_page(self, threshold: float = 70.0, page_size: int = 50,
+                                  cursor: Optional[List] = None) -> tuple:
+        return [], None
+
+    def get_claims_updated_page(self, updated_since: Optional[str] = None, page_size: int = 500,
+                                cursor: Optional[List] = None) -> tuple:
+        return [], None
+
+    def get_dashboard_summary(self) -> Dict:
+        return {"total_analyses": 0, "high_risk_count": 0, "amount_at_risk": 0.0,
+                "risk_level_counts": {}, "action_counts": {}}
+
+    def rebuild_dashboard_summary(self) -> Dict:
+        return self.get_dashboard_summary()
+
+    def update_claim_status(self, claim_id: str, status: str) -> bool:
+        return True
+
+
+class StubAIClient:
+    """Stand-in for PerplexityClient that echoes the algorithmic score after an optional delay"""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    def chat_completion(self, payload: Dict) -> Dict:
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        evidence = json.loads(payload["messages"][-1]["content"])["evidence"]
+        score = evidence["combined_score"]
+        content = {
+            "fraud_score": score,
+            "explanation": "Benchmark stub response",
+            "action": ImprovedFraudDetectionSystem.get_action(None, score),
+            "confidence": 0.5,
+            "key_risk_factors": [],
+            "recommendations": [],
+        }
+        return {"choices": [{"message": {"content": json.dumps(content)}}]}
+
+
+class PipelineBenchmark:
+    """Throughput, latency percentiles and peak memory of the scoring stages.
+
+    Each stage runs at every batch size through the public API a caller would
+    use: single-claim methods at size 1 and their batched counterparts above
+    it. The first call of each case is traced with tracemalloc (peak Python
+    and NumPy allocations) and doubles as warm-up; timed calls then repeat
+    until min_time seconds or max_repeats calls have elapsed.
+    """
+
+    STAGES = ("preprocess_input", "get_catboost_prediction", "calculate_rule_based_score", "process_claim")
+    DEFAULT_SIZES = (1, 10, 100, 1000, 10000, 100000)
+    # Changes smaller than these are timer/allocator noise, whatever the percentage
+    MIN_ABSOLUTE_CHANGE = {"p50_ms": 0.5, "peak_memory_mb": 0.5}
+
+    def __init__(self, system: "ImprovedFraudDetectionSystem", generator: SyntheticClaimGenerator,
+                 sizes=DEFAULT_SIZES, stages=STAGES, min_time: float = 1.0, max_repeats: int = 50):
+        self.system = system
+        self.generator = generator
+        self.sizes = list(sizes)
+        self.stages = list(stages)
+        self.min_time = min_time
+        self.max_repeats = max_repeats
+
+    @classmethod
+    def with_stubs(cls, ai_latency_ms: float = 0.0, seed: int = 42, **kwargs) -> "PipelineBenchmark":
+        """Benchmark over a real model and rule engine with stub storage and AI backends"""
+        system = ImprovedFraudDetectionSystem(storage=StubStorage())
+        system.ai_client = StubAIClient(ai_latency_ms)
+        system.ai_cache = None
+        system.duplicate_index = DuplicateClaimIndex()
+        return cls(system, SyntheticClaimGenerator(seed), **kwargs)
+
+    def _stage_call(self, stage: str, claims_df: pd.DataFrame, claims: List[ClaimData]):
+        system = self.system
+        single = len(claims_df) == 1
+        if stage == "preprocess_input":
+            return lambda: system.preprocess_input(claims_df)
+        if stage == "get_catboost_prediction":
+            if single:
+                return lambda: system.get_catboost_prediction(claims_df)
+            return lambda: system.get_catboost_probabilities(claims_df)
+        if stage == "calculate_rule_based_score":
+            if single:
+                claim_dict = claims_df.iloc[0].to_dict()
+                return lambda: system.calculate_rule_based_score(claim_dict)
+            return lambda: system.evaluate_rules(claims_df)
+        if stage == "process_claim":
+            if single:
+                return lambda: system.process_claim(claims[0])
+            return lambda: system.process_claims_batch(claims)
+        raise ValueError(f"Unknown benchmark stage: {stage}")
+
+    def measure(self, call, batch_size: int) -> Dict:
+        tracemalloc.start()
+        try:
+            call()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        latencies = []
+        started = time.perf_counter()
+        while len(latencies) < self.max_repeats and (not latencies or time.perf_counter() - started < self.min_time):
+            call_start = time.perf_counter()
+            call()
+            latencies.append((time.perf_counter() - call_start) * 1000)
+
+        latencies = np.asarray(latencies)
+        p50 = float(np.percentile(latencies, 50))
+        return {
+            "batch_size": batch_size,
+            "repeats": len(latencies),
+            "p50_ms": round(p50, 3),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+            "per_claim_us": round(p50 * 1000 / batch_size, 2),
+            "throughput_per_s": round(batch_size / (p50 / 1000), 1) if p50 else None,
+            "peak_memory_mb": round(peak / 1024 / 1024, 2),
+        }
+
+    def run(self) -> Dict:
+        """Measure every stage at every size; cases are keyed "<stage>@<size>\""""
+        results = {}
+        for size in self.sizes:
+            claims_df = self.generator.dataframe(size)
+            claims = self.system.claims_from_dataframe(claims_df)
+            for stage in self.stages:
+                results[f"{stage}@{size}"] = result = self.measure(self._stage_call(stage, claims_df, claims), size)
+                logger.info(f"📊 {stage}@{size}: p50 {result['p50_ms']}ms, "
+                            f"{result['throughput_per_s']} claims/s, peak {result['peak_memory_mb']}MB")
+        return {
+            "meta": {
+                "created_at": datetime.now().isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "model_version": self.system.model_registry.active.version,
+                "min_time": self.min_time,
+            },
+            "results": results,
+        }
+
+    def evaluate_fast_path(self, fast_path: FastPathScorer, claims_df: pd.DataFrame,
+                           single_claims: int = 200) -> Dict:
+        """Latency gain and decision drift of the fast path against the full model.
+
+        Every claim is scored by both; drift compares the model decision
+        (probability >= 0.5), the action, the risk level and the high-risk
+        queue membership derived from the hybrid and the full-model combined
+        scores. Latency is measured for single claims (cycling through the
+        first single_claims) and for the whole sample as one batch.
+        """
+        system = self.system
+        model_version = system.model_registry.active
+        batch = ClaimBatch.from_dataframe(claims_df)
+        rule_scores = system.rule_engine.evaluate(batch).scores
+        full = system._model_probabilities(batch, model_version)
+        fast, served = fast_path.predict(batch, rule_scores, system.score_boundaries())
+        hybrid = np.where(served, fast, full)
+
+        full_scores = 0.6 * rule_scores + 40 * full
+        hybrid_scores = 0.6 * rule_scores + 40 * hybrid
+        agree = lambda decide: float(np.mean([decide(a) == decide(b) for a, b in zip(full_scores, hybrid_scores)]))
+        high_risk = StorageBackend.DASHBOARD_HIGH_RISK_THRESHOLD
+        error = np.abs(fast[served] - full[served])
+        report = {
+            "model_version": model_version.version,
+            "features": fast_path.features,
+            "claims": len(batch),
+            "coverage": float(served.mean()),
+            "probability_error": {"mean": float(error.mean()) if len(error) else 0.0,
+                                  "max": float(error.max()) if len(error) else 0.0},
+            "agreement": {
+                "fraud_prediction": float(np.mean((full >= 0.5) == (hybrid >= 0.5))),
+                "action": agree(system.get_action),
+                "risk_level": agree(system.get_risk_level),
+                "high_risk_queue": float(np.mean((full_scores >= high_risk) == (hybrid_scores >= high_risk))),
+            },
+            "drifted_actions": int(sum(system.get_action(a) != system.get_action(b)
+                                       for a, b in zip(full_scores, hybrid_scores))),
+        }
+        labels = claims_df.get("fraud_reported")
+        if labels is not None and labels.isin(["Y", "N"]).all() and labels.nunique() == 2:
+            truth = (labels == "Y").to_numpy(dtype=np.int8)
+            report["auc"] = {name: float(catboost_utils.eval_metric(truth, values, "AUC")[0])
+                             for name, values in (("full", full), ("hybrid", hybrid))}
+
+        # Built one at a time, as the service builds them (take() would keep the sample's categories)
+        singles = [(ClaimBatch.from_dataframe(claims_df.iloc[[row]]), rule_scores[row:row + 1])
+                   for row in range(min(single_claims, len(batch)))]
+        full_claims, hybrid_claims = itertools.cycle(singles), itertools.cycle(singles)
+        served_claim = next((single for single, ok in zip(singles, served) if ok), singles[0])
+
+        def hybrid_single():
+            claim, scores = next(hybrid_claims)
+            return system.get_catboost_probabilities(claim, model_version, rule_scores=scores)
+
+        # Serve this table for the hybrid measurements whatever FAST_PATH_ENABLED says
+        system.fast_path_enabled = True
+        system._fast_paths[model_version.version] = fast_path
+        size = len(batch)
+        latency = {
+            "full_model@1": self.measure(lambda: system._model_probabilities(next(full_claims)[0], model_version), 1),
+            "fast_path@1": self.measure(lambda: fast_path.predict(*served_claim, system.score_boundaries()), 1),
+            "hybrid@1": self.measure(hybrid_single, 1),
+            f"full_model@{size}": self.measure(lambda: system._model_probabilities(batch, model_version), size),
+            f"hybrid@{size}": self.measure(lambda: system.get_catboost_probabilities(
+                batch, model_version, rule_scores=rule_scores), size),
+        }
+        report["latency"] = latency
+        report["speedup"] = {
+            "single": round(latency["full_model@1"]["p50_ms"] / latency["hybrid@1"]["p50_ms"], 2),
+            "batch": round(latency[f"full_model@{size}"]["p50_ms"] / latency[f"hybrid@{size}"]["p50_ms"], 2),
+        }
+        return report
+
+    @classmethod
+    def compare(cls, current: Dict, baseline: Dict, threshold: float = 0.2) -> List[str]:
+        """Cases whose p50 latency or peak memory grew by more than threshold over the baseline"""
+        regressions = []
+        for case, result in current["results"].items():
+            previous = baseline.get("results", {}).get(case)
+            if previous is None:
+                continue
+            for metric, min_change in cls.MIN_ABSOLUTE_CHANGE.items():
+                if (previous[metric] and result[metric] > previous[metric] * (1 + threshold)
+                        and result[metric] - previous[metric] > min_change):
+                    regressions.append(f"{case} {metric}: {previous[metric]} -> {result[metric]} "
+                                       f"(+{(result[metric] / previous[metric] - 1) * 100:.0f}%)")
+        return regressions
+
+    @staticmethod
+    def format_table(report: Dict) -> str:
+        lines = [f"{'case':<36} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'claims/s':>12} {'peak MB':>9}"]
+        for case, r in report["results"].items():
+            lines.append(f"{case:<36} {r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f} {r['p99_ms']:>10.3f} "
+                         f"{r['throughput_per_s'] or 0:>12.1f} {r['peak_memory_mb']:>9.2f}")
+        return "\n".join(lines)
@@ -0,0 +1,267 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+from dataclasses import dataclass, fields, MISSING
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# =====================================================
+# DATA CLASSES FOR STRUCTURED DATA
+# =====================================================
+
+@dataclass(slots=True)
+class ClaimData:
+    """Structured claim data"""
+    claim_id: str
+    months_as_customer: int
+    age: int
+    policy_number: str
+    policy_bind_date: str
+    policy_state: str
+    policy_csl: str
+    policy_deductable: float
+    policy_annual_premium: float
+    umbrella_limit: float
+    insured_zip: int
+    insured_sex: str
+    insured_education_level: str
+    insured_occupation: str
+    insured_hobbies: str
+    insured_relationship: str
+    capital_gains: float
+    capital_loss: float
+    incident_date: str
+    incident_type: str
+    collision_type: str
+    incident_severity: str
+    authorities_contacted: str
+    incident_state: str
+    incident_city: str
+    incident_location: str
+    incident_hour_of_the_day: int
+    number_of_vehicles_involved: int
+    property_damage: str
+    bodily_injuries: int
+    witnesses: int
+    police_report_available: str
+    total_claim_amount: float
+    injury_claim: float
+    property_claim: float
+    vehicle_claim: float
+    auto_make: str
+    auto_model: str
+    auto_year: int
+    fraud_reported: str = "N"
+    created_at: str = None
+    updated_at: str = None
+
+    def __post_init__(self):
+        if not self.claim_id:
+            self.claim_id = self.generate_claim_id()
+        now = datetime.now().isoformat()
+        if not self.created_at:
+            self.created_at = now
+        self.updated_at = now
+
+    def generate_claim_id(self) -> str:
+        """Generate unique claim ID"""
+        return self.make_claim_id(self.policy_number, self.incident_date, self.total_claim_amount)
+
+    @staticmethod
+    def make_claim_id(policy_number, incident_date, total_claim_amount) -> str:
+        data_string = f"{policy_number}{incident_date}{total_claim_amount}"
+        hash_object = hashlib.md5(data_string.encode())
+        return f"CLAIM_{hash_object.hexdigest()[:8].upper()}"
+
+@dataclass
+class FraudAnalysisResult:
+    """Structured fraud analysis result"""
+    claim_id: str
+    rule_based_score: float
+    catboost_probability: float
+    combined_score: float
+    ai_fraud_score: float
+    explanation: str
+    action: str
+    follow_up_questions: List[str]
+    risk_level: str
+    reasons: List[str]
+    analysis_timestamp: str = None
+    processing_time_ms: float = None
+    decision_tier: str = "ai"  # "ai" or "algorithmic" (decided without the AI stage)
+    total_claim_amount: float = 0.0
+    model_version: str = None
+    error: str = None  # set when the claim could not be processed
+    stage_timings_ms: Dict[str, float] = None  # dedup, save, rules, fast_path, preprocess, model, ai, explain, persist
+
+    def __post_init__(self):
+        if not self.analysis_timestamp:
+            self.analysis_timestamp = datetime.now().isoformat()
+
+# =====================================================
+# COLUMNAR CLAIM BATCHES
+# =====================================================
+
+class ClaimBatch:
+    """Columnar batch of claims in the ClaimData schema.
+
+    Numeric fields are float64 arrays, text fields are pandas Categoricals
+    (integer codes plus one copy of each distinct value) and identifier
+    fields stay object arrays. FeaturePipeline builds model input from these
+    arrays without copying them, and DataFrame/Arrow conversion reuses the
+    arrays and dictionary encodings rather than going through per-claim dicts.
+    """
+
+    IDENTIFIER_FIELDS = ("claim_id", "policy_number", "created_at", "updated_at")
+    _FIELD_KINDS: Optional[Dict[str, str]] = None
+
+    def __init__(self, columns: Dict[str, Any]):
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("ClaimBatch columns must all have the same length")
+        self.columns = columns
+        self._length = lengths.pop() if lengths else 0
+
+    @classmethod
+    def field_kinds(cls) -> Dict[str, str]:
+        """ClaimData field -> "numeric", "categorical" or "identifier\""""
+        if cls._FIELD_KINDS is None:
+            cls._FIELD_KINDS = {
+                f.name: "identifier" if f.name in cls.IDENTIFIER_FIELDS
+                else "numeric" if f.type in (int, float) else "categorical"
+                for f in fields(ClaimData)
+            }
+        return cls._FIELD_KINDS
+
+    @staticmethod
+    def required_fields() -> List[str]:
+        return [f.name for f in fields(ClaimData) if f.default is MISSING and f.name != "claim_id"]
+
+    @staticmethod
+    def _column(kind: str, values) -> Any:
+        if kind == "numeric":
+            try:
+                return np.asarray(values, dtype=np.float64)
+            except (TypeError, ValueError):
+                # Keep malformed values so scoring can flag the offending claims
+                return np.asarray(values, dtype=object)
+        if kind == "categorical":
+            if isinstance(values, pd.Categorical):
+                return values
+            # Hand-rolled encoding: pd.Categorical's inference dominates for small batches
+            categories: Dict[Any, int] = {}
+            codes = np.fromiter((categories.setdefault(value, len(categories)) if value is not None and value == value
+                                 else -1 for value in values), dtype=np.int32, count=len(values))
+            dtype = pd.CategoricalDtype(pd.Index(list(categories), dtype=object))
+            return pd.Categorical.from_codes(codes, dtype=dtype, validate=False)
+        return np.asarray(values, dtype=object)
+
+    @classmethod
+    def _complete(cls, columns: Dict[str, Any], n: int, raw_values) -> "ClaimBatch":
+        """Fill defaulted fields; raw_values(field, rows) returns the source's original values"""
+        missing = [name for name in cls.required_fields() if name not in columns]
+        if missing:
+            raise ValueError(f"Claims are missing required fields: {', '.join(missing)}")
+        now = datetime.now().isoformat()
+        if "fraud_reported" not in columns:
+            columns["fraud_reported"] = pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), categories=["N"])
+        columns.setdefault("updated_at", np.full(n, now, dtype=object))
+        columns.setdefault("created_at", np.full(n, now, dtype=object))
+        claim_ids = columns.get("claim_id")
+        claim_ids = np.full(n, "", dtype=object) if claim_ids is None else claim_ids.copy()
+        rows = [row for row, claim_id in enumerate(claim_ids) if not isinstance(claim_id, str) or not claim_id]
+        if rows:
+            # Same IDs ClaimData would generate from the same source values
+            generated = map(ClaimData.make_claim_id, raw_values("policy_number", rows),
+                            raw_values("incident_date", rows), raw_values("total_claim_amount", rows))
+            claim_ids[rows] = list(generated)
+        columns["claim_id"] = claim_ids
+        return cls(columns)
+
+    @classmethod
+    def from_claims(cls, claims: List[ClaimData]) -> "ClaimBatch":
+        """Batch from ClaimData objects"""
+        return cls({name: cls._column(kind, [getattr(claim, name) for claim in claims])
+                    for name, kind in cls.field_kinds().items()})
+
+    @classmethod
+    def from_dataframe(cls, claims_df: pd.DataFrame) -> "ClaimBatch":
+        """Batch from a DataFrame with ClaimData columns (extra columns are ignored)"""
+        columns = {}
+        for name, kind in cls.field_kinds().items():
+            if name not in claims_df.columns:
+                continue
+            series = claims_df[name]
+            if kind == "categorical" and isinstance(series.dtype, pd.CategoricalDtype):
+                columns[name] = series.array
+            elif kind == "numeric":
+                try:
+                    columns[name] = series.to_numpy(dtype=np.float64, na_value=np.nan)
+                except (TypeError, ValueError):
+                    columns[name] = series.to_numpy(dtype=object)
+            else:
+                columns[name] = cls._column(kind, series.to_numpy(dtype=object))
+        raw_values = lambda name, rows: claims_df[name].iloc[rows].tolist()
+        return cls._complete(columns, len(claims_df), raw_values)
+
+    @classmethod
+    def from_arrow(cls, table) -> "ClaimBatch":
+        """Batch from a pyarrow Table; dictionary-encoded text columns keep their encoding"""
+        import pyarrow as pa
+        columns = {}
+        for name, kind in cls.field_kinds().items():
+            if name not in table.column_names:
+                continue
+            column = table.column(name)
+            if kind == "categorical":
+                if not pa.types.is_dictionary(column.type):
+                    column = column.dictionary_encode()
+                columns[name] = column.to_pandas().array
+            elif kind == "numeric":
+                columns[name] = cls._column(kind, column.to_numpy())
+            else:
+                columns[name] = np.asarray(column.to_pylist(), dtype=object)
+        raw_values = lambda name, rows: table.column(name).take(rows).to_pylist()
+        return cls._complete(columns, table.num_rows, raw_values)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __getitem__(self, name: str):
+        return self.columns[name]
+
+    def take(self, rows) -> "ClaimBatch":
+        """Sub-batch of the given row positions"""
+        rows = np.asarray(rows, dtype=np.int64)
+        return ClaimBatch({name: values[rows] for name, values in self.columns.items()})
+
+    def to_dataframe(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """DataFrame sharing this batch's arrays (numeric fields stay float64)"""
+        names = self.columns if columns is None else [name for name in columns if name in self.columns]
+        return pd.DataFrame({name: self.columns[name] for name in names}, copy=False)
+
+    def to_arrow(self):
+        """pyarrow Table; categorical fields become dictionary arrays over the same codes"""
+        import pyarrow as pa
+        return pa.table({name: pa.array(values) for name, values in self.columns.items()})
+
+    def to_claims(self) -> List[ClaimData]:
+        """Materialise ClaimData objects (int fields converted back from float64)"""
+        int_fields = {f.name for f in fields(ClaimData) if f.type is int}
+        names = list(self.columns)
+        values = [self.columns[name].tolist() for name in names]
+        claims = []
+        for row in zip(*values):
+            record = {}
+            for name, value in zip(names, row):
+                if isinstance(value, float) and np.isnan(value):
+                    value = None
+                elif name in int_fields and isinstance(value, float) and value.is_integer():
+                    value = int(value)
+                record[name] = value
+            claims.append(ClaimData(**record))
+        return claims
@@ -0,0 +1,360 @@
+import os
+from typing import Dict, List, Optional, Union
+import logging
+from contextlib import contextmanager
+import hashlib
+import threading
+import tempfile
+import math
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from .runtime import joblib, startup_phase
+
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# DUPLICATE CLAIM INDEX
+# =====================================================
+
+class DuplicateClaimIndex:
+    """In-memory index of stored claims for duplicate and near-duplicate lookups.
+
+    Exact matches share a key over the incident's identity (policy, incident
+    date, type and location, vehicle), so a resubmission with a different
+    amount or hour still matches even though it gets a new claim ID. Near
+    matches use MinHash signatures of each claim's field tokens, with amounts
+    and the incident hour bucketed so small edits keep most tokens, and
+    locality-sensitive hashing over signature bands so a lookup only compares
+    against a handful of candidates. Claims are added as they are saved and
+    the index is bounded to max_claims (oldest dropped first). The index can be
+    saved to and loaded from a joblib snapshot.
+    """
+
+    SNAPSHOT_FORMAT = 1
+    EXACT_KEY_FIELDS = ("policy_number", "incident_date", "incident_type", "incident_location",
+                        "auto_make", "auto_model", "auto_year")
+    TOKEN_FIELDS = ("policy_number", "insured_zip", "incident_date", "incident_type", "collision_type",
+                    "incident_severity", "authorities_contacted", "incident_state", "incident_city",
+                    "incident_location", "property_damage", "police_report_available", "auto_make",
+                    "auto_model", "auto_year", "number_of_vehicles_involved", "bodily_injuries", "witnesses")
+    AMOUNT_FIELDS = ("total_claim_amount", "injury_claim", "property_claim", "vehicle_claim")
+    AMOUNT_BUCKET_RATIO = 0.1  # amounts within ~5% share at least one of their two bucket tokens
+    HOUR_BUCKET_WIDTH = 3
+    # Bands made only of common tokens (e.g. "no police report") collect huge buckets;
+    # a real duplicate also shares other bands, so lookups skip buckets larger than this
+    MAX_BUCKET_SCAN = 64
+    _PRIME = (1 << 31) - 1
+
+    def __init__(self, path: Optional[str] = None, threshold: float = 0.6, max_claims: int = 1000000,
+                 bands: int = 8, rows_per_band: int = 4, max_matches: int = 5, seed: int = 1):
+        self.path = path
+        self.threshold = threshold
+        self.max_claims = max_claims
+        self.bands = bands
+        self.rows_per_band = rows_per_band
+        self.max_matches = max_matches
+        self.seed = seed
+        self.num_perm = bands * rows_per_band
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, self._PRIME, self.num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, self._PRIME, self.num_perm, dtype=np.uint64)
+        # claim_id -> (signature bytes, exact key, (policy_number, incident_date, total_claim_amount))
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # Bucket values are a claim ID, or a list of IDs once a key is shared
+        self._buckets: List[Dict[int, Union[str, List[str]]]] = [{} for _ in range(bands)]
+        self._exact: Dict[int, Union[str, List[str]]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._snapshot_mtime_ns = None  # of the snapshot as this process last read or wrote it
+        self.lookups = 0
+        self.duplicates_found = 0
+        if path and os.path.exists(path):
+            self.load(path)
+
+    @classmethod
+    def from_env(cls) -> Optional["DuplicateClaimIndex"]:
+        """Build the index from DUPLICATE_INDEX_* environment variables (None when disabled)"""
+        if os.getenv("DUPLICATE_INDEX_ENABLED", "true").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            path=os.getenv("DUPLICATE_INDEX_PATH", "data/duplicate_index.joblib") or None,
+            threshold=float(os.getenv("DUPLICATE_INDEX_THRESHOLD", "0.6")),
+            max_claims=int(os.getenv("DUPLICATE_INDEX_MAX_CLAIMS", "1000000")),
+        )
+
+    def params(self) -> Dict:
+        """Settings a snapshot must share with the index loading it"""
+        return {"bands": self.bands, "rows_per_band": self.rows_per_band, "seed": self.seed,
+                "amount_bucket_ratio": self.AMOUNT_BUCKET_RATIO, "hour_bucket_width": self.HOUR_BUCKET_WIDTH}
+
+    @staticmethod
+    def _normalize(value) -> str:
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return ""
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return str(value).strip().lower()
+
+    @staticmethod
+    def _number(value) -> Optional[float]:
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+        return None if math.isnan(number) else number
+
+    def _tokens(self, claim: Dict) -> List[str]:
+        tokens = [f"{name}={self._normalize(claim.get(name))}" for name in self.TOKEN_FIELDS]
+        # Two bucketings offset by half a bucket, so nearby values always share one token
+        for name in self.AMOUNT_FIELDS:
+            amount = self._number(claim.get(name))
+            if amount is None or amount <= 0:
+                tokens.append(f"{name}={amount}")
+                continue
+            position = math.log(amount) / math.log1p(self.AMOUNT_BUCKET_RATIO)
+            tokens += [f"{name}~{math.floor(position)}", f"{name}~{math.floor(position + 0.5)}h"]
+        hour = self._number(claim.get("incident_hour_of_the_day"))
+        if hour is not None:
+            position = hour / self.HOUR_BUCKET_WIDTH
+            tokens += [f"hour~{math.floor(position)}", f"hour~{math.floor(position + 0.5)}h"]
+        return tokens
+
+    def _signature(self, claim: Dict) -> bytes:
+        tokens = self._tokens(claim)
+        hashes = np.fromiter((zlib.crc32(token.encode()) for token in tokens), dtype=np.uint64,
+                             count=len(tokens)) % self._PRIME
+        values = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % self._PRIME
+        return values.min(axis=1).astype(np.uint32).tobytes()
+
+    def _exact_key(self, claim: Dict) -> int:
+        key = "|".join(self._normalize(claim.get(name)) for name in self.EXACT_KEY_FIELDS)
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+    def _band_keys(self, signature: bytes) -> List[int]:
+        step = self.rows_per_band * 4
+        return [hash(signature[start:start + step]) for start in range(0, len(signature), step)]
+
+    @staticmethod
+    def _bucket_add(bucket: Dict, key: int, claim_id: str):
+        current = bucket.get(key)
+        if current is None:
+            bucket[key] = claim_id
+        elif isinstance(current, list):
+            current.append(claim_id)
+        elif current != claim_id:
+            bucket[key] = [current, claim_id]
+
+    @staticmethod
+    def _bucket_remove(bucket: Dict, key: int, claim_id: str):
+        current = bucket.get(key)
+        if current == claim_id:
+            del bucket[key]
+        elif isinstance(current, list) and claim_id in current:
+            current.remove(claim_id)
+            if len(current) == 1:
+                bucket[key] = current[0]
+
+    @staticmethod
+    def _bucket_ids(bucket: Dict, key: int) -> List[str]:
+        current = bucket.get(key)
+        if current is None:
+            return []
+        return current if isinstance(current, list) else [current]
+
+    def _insert(self, claim_id: str, signature: bytes, exact_key: int, summary: tuple):
+        if claim_id in self._entries:
+            self._remove(claim_id)
+        self._entries[claim_id] = (signature, exact_key, summary)
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            self._bucket_add(bucket, key, claim_id)
+        self._bucket_add(self._exact, exact_key, claim_id)
+        while len(self._entries) > self.max_claims:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, claim_id: str):
+        signature, exact_key, _ = self._entries.pop(claim_id)
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            self._bucket_remove(bucket, key, claim_id)
+        self._bucket_remove(self._exact, exact_key, claim_id)
+
+    def check(self, claim: Dict, add: bool = True) -> List[Dict]:
+        """Indexed claims that look like duplicates of this one, best first; then index it if add.
+
+        An indexed claim with the same claim ID is reported as a resubmission.
+        Each match has claim_id, match ("resubmission", "exact" or "near"),
+        similarity (estimated Jaccard similarity of the field tokens) and the
+        matched claim's policy_number, incident_date and total_claim_amount.
+        """
+        claim_id = str(claim.get('claim_id') or "")
+        signature = self._signature(claim)
+        exact_key = self._exact_key(claim)
+        summary = (claim.get('policy_number'), claim.get('incident_date'),
+                   self._number(claim.get('total_claim_amount')))
+        with self._lock:
+            self.lookups += 1
+            candidates = {other: "exact" for other in self._bucket_ids(self._exact, exact_key)}
+            for bucket, key in zip(self._buckets, self._band_keys(signature)):
+                others = self._bucket_ids(bucket, key)
+                if len(others) <= self.MAX_BUCKET_SCAN:
+                    for other in others:
+                        candidates.setdefault(other, "near")
+            if claim_id in self._entries:
+                candidates[claim_id] = "resubmission"
+            matches = []
+            if candidates:
+                entries = [self._entries[other] for other in candidates]
+                others = np.frombuffer(b"".join(entry[0] for entry in entries), dtype=np.uint32)
+                similarities = (others.reshape(len(entries), self.num_perm) ==
+                                np.frombuffer(signature, dtype=np.uint32)).mean(axis=1)
+                for (other, match), entry, similarity in zip(candidates.items(), entries, similarities.tolist()):
+                    if match == "near" and similarity < self.threshold:
+                        continue
+                    policy_number, incident_date, amount = entry[2]
+                    matches.append({"claim_id": other, "match": match, "similarity": similarity,
+                                    "policy_number": policy_number, "incident_date": incident_date,
+                                    "total_claim_amount": amount})
+            if matches:
+                self.duplicates_found += 1
+            if add and claim_id:
+                self._insert(claim_id, signature, exact_key, summary)
+                self._dirty = True
+        rank = {"resubmission": 0, "exact": 1, "near": 2}
+        matches.sort(key=lambda m: (rank[m["match"]], -m["similarity"]))
+        return matches[:self.max_matches]
+
+    def add(self, claim: Dict):
+        """Index a claim without looking it up"""
+        claim_id = str(claim.get('claim_id') or "")
+        if not claim_id:
+            return
+        summary = (claim.get('policy_number'), claim.get('incident_date'),
+                   self._number(claim.get('total_claim_amount')))
+        signature, exact_key = self._signature(claim), self._exact_key(claim)
+        with self._lock:
+            self._insert(claim_id, signature, exact_key, summary)
+            self._dirty = True
+
+    @staticmethod
+    def describe(match: Dict, amount: Optional[float] = None) -> str:
+        """One-line risk factor for a duplicate match"""
+        if match["match"] == "resubmission":
+            return f"Claim {match['claim_id']} was already submitted"
+        if match["match"] == "exact":
+            text = f"Possible duplicate of {match['claim_id']}: same policy, incident and vehicle"
+            if amount is not None and match.get("total_claim_amount") is not None:
+                text += f" (amount {amount:,.0f} vs {match['total_claim_amount']:,.0f})"
+            return text
+        return f"Near-duplicate of {match['claim_id']} (similarity {match['similarity']:.2f})"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"claims": len(self._entries), "lookups": self.lookups,
+                    "duplicates_found": self.duplicates_found}
+
+    def _snapshot_state(self) -> Dict:
+        claim_ids = list(self._entries)
+        entries = list(self._entries.values())
+        signatures = np.frombuffer(b"".join(entry[0] for entry in entries), dtype=np.uint32)
+        return {
+            "format": self.SNAPSHOT_FORMAT,
+            "params": self.params(),
+            "claim_ids": claim_ids,
+            "signatures": signatures.reshape(len(claim_ids), self.num_perm),
+            "exact_keys": np.array([entry[1] for entry in entries], dtype=np.uint64),
+            "summaries": [entry[2] for entry in entries],
+        }
+
+    def _read_snapshot(self, path: str) -> Optional[Dict]:
+        mtime_ns = os.stat(path).st_mtime_ns
+        state = joblib.load(path)
+        self._snapshot_mtime_ns = mtime_ns
+        if state.get("format") != self.SNAPSHOT_FORMAT or state.get("params") != self.params():
+            logger.warning(f"⚠️ Duplicate index snapshot {path} was built with other settings, ignoring it")
+            return None
+        return state
+
+    def _merge_state(self, state: Dict, keep_existing: bool = True):
+        """Insert snapshot entries; with keep_existing, entries already indexed win"""
+        signatures = state["signatures"]
+        for row, (claim_id, exact_key, summary) in enumerate(zip(state["claim_ids"], state["exact_keys"].tolist(),
+                                                                 state["summaries"])):
+            if keep_existing and claim_id in self._entries:
+                continue
+            self._insert(claim_id, signatures[row].tobytes(), exact_key, tuple(summary))
+
+    def load(self, path: Optional[str] = None) -> int:
+        """Add the entries of a snapshot; returns how many claims the index holds"""
+        path = path or self.path
+        try:
+            with startup_phase("load duplicate index"):
+                state = self._read_snapshot(path)
+                if state is not None:
+                    with self._lock:
+                        self._merge_state(state)
+            logger.info(f"✅ Duplicate index loaded: {len(self._entries)} claims from {path}")
+        except Exception as e:
+            logger.error(f"❌ Error loading duplicate index {path}: {str(e)}")
+        return len(self._entries)
+
+    @contextmanager
+    def _file_lock(self, path: str):
+        """Exclusive lock on path.lock, so processes sharing a snapshot save one at a time"""
+        try:
+            import fcntl
+        except ImportError:  # not POSIX
+            yield
+            return
+        with open(f"{path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def save(self, path: Optional[str] = None) -> bool:
+        """Write a snapshot atomically, first merging claims other processes saved since.
+
+        Claims this process holds take precedence; the merged index is still
+        bounded by max_claims.
+        """
+        path = path or self.path
+        if not path:
+            return False
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with self._file_lock(path):
+                with self._lock:
+                    if os.path.exists(path) and os.stat(path).st_mtime_ns != self._snapshot_mtime_ns:
+                        state = self._read_snapshot(path)
+                        if state is not None:
+                            # Claims only on disk are older than anything indexed here
+                            current = list(self._entries.items())
+                            self._entries.clear()
+                            self._buckets = [{} for _ in range(self.bands)]
+                            self._exact = {}
+                            self._merge_state(state, keep_existing=False)
+                            for claim_id, entry in current:
+                                self._insert(claim_id, *entry)
+                    state = self._snapshot_state()
+                    self._dirty = False
+                fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+                os.close(fd)
+                joblib.dump(state, temp_path)
+                os.replace(temp_path, path)
+                self._snapshot_mtime_ns = os.stat(path).st_mtime_ns
+            logger.info(f"✅ Duplicate index saved: {len(state['claim_ids'])} claims to {path}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error saving duplicate index {path}: {str(e)}")
+            return False
+
+    @property
+    def dirty(self) -> bool:
+        """True when claims were added since the last save"""
+        return self._dirty
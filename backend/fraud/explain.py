@@ -0,0 +1,182 @@
+import os
+from typing import Dict, List, Optional, Union
+import logging
+import threading
+import math
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .runtime import catboost
+from .claims import ClaimBatch
+from .rules import RuleEvaluation
+from .registry import ModelVersion
+
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# LOCAL EXPLANATIONS
+# =====================================================
+
+class LocalExplainer:
+    """Ranked, human-readable reasons computed in-process, without the AI call.
+
+    Model contributions for a whole batch come from one CatBoost SHAP call
+    (get_feature_importance(type="ShapValues")). They are ranked together
+    with the rule hits by the points each adds to the combined score: 0.6 x
+    the rule weight for a rule, and 40 x p(1 - p) x the SHAP value (the
+    log-odds contribution at the claim's fraud probability p) for a model
+    feature. Explanations are cached per model version, keyed by a hash of
+    the claim's model features and rule hits.
+    """
+
+    RULE_SHARE = 0.6
+    MODEL_SHARE = 0.4
+
+    def __init__(self, max_reasons: int = 5, min_points: float = 0.5, cache_size: int = 10000):
+        self.max_reasons = max_reasons
+        self.min_points = min_points
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._cache_version: Optional[str] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "LocalExplainer":
+        """Explainer configured by EXPLAINER_MAX_REASONS, EXPLAINER_MIN_POINTS and EXPLAINER_CACHE_SIZE"""
+        return cls(max_reasons=int(os.getenv("EXPLAINER_MAX_REASONS", "5")),
+                   min_points=float(os.getenv("EXPLAINER_MIN_POINTS", "0.5")),
+                   cache_size=int(os.getenv("EXPLAINER_CACHE_SIZE", "10000")))
+
+    def explain(self, claims: Union[pd.DataFrame, ClaimBatch], rule_evaluation: RuleEvaluation,
+                model_version: ModelVersion) -> List[Dict]:
+        """Explanation per claim (input order); SHAP runs once over the claims not in the cache"""
+        pipeline = model_version.feature_pipeline
+        features = pipeline.transform(claims)
+        row_hashes = pd.util.hash_pandas_object(features, index=False).to_numpy()
+        keys = [(int(row_hash), hits.tobytes()) for row_hash, hits in zip(row_hashes, rule_evaluation.hits)]
+
+        explanations: List[Optional[Dict]] = [None] * len(keys)
+        with self._lock:
+            if self._cache_version != model_version.version:
+                self._cache.clear()
+                self._cache_version = model_version.version
+            for row, key in enumerate(keys):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    explanations[row] = self._cache[key]
+            missing = [row for row, explanation in enumerate(explanations) if explanation is None]
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        if not missing:
+            return explanations
+
+        subset = features.iloc[missing]
+        pool = catboost.Pool(subset, cat_features=pipeline.cat_feature_indices)
+        # One row per claim: a contribution per feature, then the expected value
+        shap_values = model_version.model.get_feature_importance(pool, type="ShapValues")
+        values = subset.to_numpy(dtype=object)
+        for position, row in enumerate(missing):
+            explanations[row] = self._describe(pipeline.feature_names, values[position], shap_values[position],
+                                               rule_evaluation, row, model_version.version)
+
+        with self._lock:
+            if self._cache_version == model_version.version:
+                for row in missing:
+                    self._cache[keys[row]] = explanations[row]
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return explanations
+
+    def pending(self, claims: Union[pd.DataFrame, ClaimBatch], rule_evaluation: RuleEvaluation,
+                model_version: ModelVersion) -> "PendingExplanations":
+        """Explanations for a scored batch, computed together the first time any claim needs one"""
+        return PendingExplanations(self, claims, rule_evaluation, model_version)
+
+    @staticmethod
+    def _label(feature: str, value) -> str:
+        name = feature.replace('_', ' ').replace('-', ' ')
+        if isinstance(value, (float, np.floating)):
+            value = f"{value:,.0f}" if float(value).is_integer() else f"{value:,.2f}"
+        return f"{name} is {value}"
+
+    def _describe(self, feature_names: List[str], values: np.ndarray, shap_row: np.ndarray,
+                  rule_evaluation: RuleEvaluation, row: int, model_version: str) -> Dict:
+        contributions = shap_row[:-1]
+        probability = 1.0 / (1.0 + math.exp(-float(shap_row.sum())))
+        # Change in combined-score points per unit of log-odds at this probability
+        slope = self.MODEL_SHARE * 100 * probability * (1.0 - probability)
+        rule_score = float(rule_evaluation.scores[row])
+
+        drivers = []
+        for index in np.flatnonzero(rule_evaluation.hits[row]):
+            weight = float(rule_evaluation.weights[index]) if rule_evaluation.weights is not None else 0.0
+            drivers.append({"source": "rule", "name": rule_evaluation.rule_names[index],
+                            "text": rule_evaluation.descriptions[index], "points": self.RULE_SHARE * weight})
+        mitigating = None
+        for index in np.argsort(-np.abs(contributions))[:2 * self.max_reasons]:
+            points = slope * float(contributions[index])
+            entry = {"source": "model", "name": feature_names[index],
+                     "text": self._label(feature_names[index], values[index]), "points": points}
+            if points > 0:
+                drivers.append(entry)
+            elif mitigating is None or points < mitigating["points"]:
+                mitigating = entry
+        drivers = sorted((d for d in drivers if d["points"] >= self.min_points),
+                         key=lambda d: d["points"], reverse=True)[:self.max_reasons]
+
+        reasons = [f"{d['text']} (+{d['points']:.1f} pts, {d['source']})" for d in drivers]
+        combined_score = self.RULE_SHARE * rule_score + self.MODEL_SHARE * 100 * probability
+        explanation = (f"Combined score {combined_score:.1f} from a rule score of {rule_score:.0f}/100 "
+                       f"and a model fraud probability of {probability:.0%}. ")
+        if drivers:
+            explanation += "Main drivers: " + "; ".join(d["text"] for d in drivers) + "."
+        else:
+            explanation += "No rule fired and no single feature raised the score noticeably."
+        if mitigating is not None and -mitigating["points"] >= self.min_points:
+            explanation += f" Lowering the risk: {mitigating['text']} ({mitigating['points']:.1f} pts)."
+        return {
+            "explanation": explanation,
+            "reasons": reasons,
+            "contributions": [{key: d[key] for key in ("source", "name", "points")} for d in drivers],
+            "model_version": model_version,
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"model_version": self._cache_version, "entries": len(self._cache), "hits": self.hits,
+                    "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+class PendingExplanations:
+    """Local explanations for one scored batch, computed together on first use.
+
+    Claims whose AI call succeeds never need one, so with the local
+    explainer as fallback a batch only pays for SHAP when a claim falls
+    back to it.
+    """
+
+    def __init__(self, explainer: LocalExplainer, claims: Union[pd.DataFrame, ClaimBatch],
+                 rule_evaluation: RuleEvaluation, model_version: ModelVersion):
+        self.explainer = explainer
+        self.claims = claims
+        self.rule_evaluation = rule_evaluation
+        self.model_version = model_version
+        self._explanations: Optional[List[Optional[Dict]]] = None
+        self._lock = threading.Lock()
+
+    def get(self, row: int) -> Optional[Dict]:
+        """Explanation for one row of the batch (None if the explainer failed)"""
+        with self._lock:
+            if self._explanations is None:
+                try:
+                    self._explanations = self.explainer.explain(self.claims, self.rule_evaluation,
+                                                                self.model_version)
+                except Exception as e:
+                    logger.error(f"❌ Local explanation failed: {str(e)}")
+                    self._explanations = [None] * len(self.rule_evaluation.scores)
+            return self._explanations[row]
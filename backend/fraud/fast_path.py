@@ -0,0 +1,176 @@
+import os
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .runtime import catboost
+from .claims import ClaimBatch
+from .features import FeaturePipeline
+from .registry import ModelVersion
+
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# FAST-PATH SCORER
+# =====================================================
+
+class FastPathScorer:
+    """Lookup table over the model's dominant categorical features.
+
+    Distilled from one model version: for every combination of the key
+    features (by default the two categorical features with the highest
+    importance) the table holds the full model's mean fraud probability and
+    its [quantile, 1 - quantile] range over a reference sample. A claim is
+    answered from the table when that whole range falls on one side of the
+    model's decision threshold and, given the claim's rule score, of every
+    combined-score boundary a decision depends on; otherwise, or for a
+    combination seen fewer than min_samples times, the full model scores it.
+    Tables live next to their model: <registry>/<version>/fast_path.json.
+    """
+
+    FILE_NAME = "fast_path.json"
+
+    def __init__(self, model_version: str, features: List[str], table: Dict[tuple, tuple],
+                 threshold: float = 0.5, quantile: float = 0.01, min_samples: int = 30,
+                 metadata: Optional[Dict] = None):
+        self.model_version = model_version
+        self.features = list(features)
+        self.table = table  # combination -> (mean, low, high, count)
+        self.threshold = threshold
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.metadata = metadata or {}
+        # Dense (mean, low, high) array over value indices; each feature's last index is "not in the table"
+        self._vocabularies = [{value: index for index, value in enumerate(sorted({key[position] for key in table}))}
+                              for position in range(len(self.features))]
+        shape = tuple(len(vocabulary) + 1 for vocabulary in self._vocabularies)
+        self._dense = np.full(shape + (3,), np.nan)
+        for key, (mean, low, high, _) in table.items():
+            position = tuple(vocabulary[value] for vocabulary, value in zip(self._vocabularies, key))
+            self._dense[position] = (mean, low, high)
+        self._dense = self._dense.reshape(-1, 3)
+        self._strides = np.cumprod((1,) + shape[:0:-1])[::-1]
+
+    @classmethod
+    def path_for(cls, registry_root: str, version: str) -> str:
+        return os.path.join(registry_root, version, cls.FILE_NAME)
+
+    @staticmethod
+    def dominant_features(model_version: ModelVersion, top_k: int = 2) -> List[str]:
+        """The top_k categorical features by the model's feature importance"""
+        importance = dict(zip(model_version.model.feature_names_, model_version.model.get_feature_importance()))
+        ranked = sorted(model_version.feature_pipeline.categorical_features, key=importance.get, reverse=True)
+        return ranked[:top_k]
+
+    @classmethod
+    def distill(cls, model_version: ModelVersion, chunks, features: Optional[List[str]] = None,
+                top_k: int = 2, quantile: float = 0.01, min_samples: int = 30,
+                threshold: float = 0.5) -> "FastPathScorer":
+        """Build the table from the full model's predictions on an iterable of claim DataFrames"""
+        pipeline = model_version.feature_pipeline
+        features = features or cls.dominant_features(model_version, top_k)
+        unknown = [feature for feature in features if feature not in pipeline.categorical_features]
+        if unknown:
+            raise ValueError(f"Fast-path features must be categorical model features: {', '.join(unknown)}")
+
+        probabilities: Dict[tuple, List[np.ndarray]] = {}
+        sample_size = 0
+        for chunk in chunks:
+            model_input = pipeline.transform(chunk)
+            chunk_probabilities = model_version.model.predict_proba(
+                catboost.Pool(model_input, cat_features=pipeline.cat_feature_indices))[:, 1]
+            keys = pd.MultiIndex.from_arrays([model_input[feature].astype(str) for feature in features])
+            for key, positions in pd.Series(np.arange(len(keys))).groupby(keys).groups.items():
+                key = key if isinstance(key, tuple) else (key,)
+                probabilities.setdefault(key, []).append(chunk_probabilities[np.asarray(positions)])
+            sample_size += len(model_input)
+
+        table = {}
+        for key, parts in probabilities.items():
+            values = np.concatenate(parts)
+            if len(values) >= min_samples:
+                low, high = np.quantile(values, [quantile, 1 - quantile])
+                table[key] = (float(values.mean()), float(low), float(high), int(len(values)))
+        importance = dict(zip(model_version.model.feature_names_, model_version.model.get_feature_importance()))
+        metadata = {
+            "created_at": datetime.now().isoformat(),
+            "sample_size": sample_size,
+            "importance_share": round(sum(importance[feature] for feature in features) / 100, 4),
+        }
+        logger.info(f"✅ Fast path distilled for {model_version.version}: {len(table)} combinations of "
+                    f"{', '.join(features)} from {sample_size} claims")
+        return cls(model_version.version, features, table, threshold, quantile, min_samples, metadata)
+
+    def _row_indices(self, claims: Union[pd.DataFrame, ClaimBatch]) -> np.ndarray:
+        """Row of _dense per claim, from key values as the feature pipeline presents them to the model"""
+        fill = FeaturePipeline.CATEGORICAL_FILL
+        rows = np.zeros(len(claims), dtype=np.int64)
+        for feature, vocabulary, stride in zip(self.features, self._vocabularies, self._strides):
+            unknown = len(vocabulary)
+            values = claims[feature] if feature in claims else None
+            if values is None:
+                indices = np.full(len(claims), vocabulary.get(fill, unknown))
+            elif isinstance(values, pd.Categorical):
+                # Map the few categories, then the codes; code -1 (missing) picks the trailing fill entry
+                category_indices = [vocabulary.get(str(category), unknown) for category in values.categories]
+                indices = np.asarray(category_indices + [vocabulary.get(fill, unknown)])[values.codes]
+            else:
+                keys = (fill if value is None or value != value else str(value)
+                        for value in np.asarray(values, dtype=object))
+                indices = np.fromiter((vocabulary.get(key, unknown) for key in keys), dtype=np.int64, count=len(claims))
+            rows += indices * stride
+        return rows
+
+    def predict(self, claims: Union[pd.DataFrame, ClaimBatch], rule_scores: np.ndarray,
+                boundaries: List[float] = ()) -> tuple:
+        """(probabilities, served): table answers where served, NaN where the full model is needed.
+
+        boundaries are combined-score cut points (0-100) whose side must not
+        depend on where in its range the claim's true probability lies.
+        """
+        entries = self._dense[self._row_indices(claims)]
+        mean, low, high = entries[:, 0], entries[:, 1], entries[:, 2]
+        served = ~np.isnan(mean) & ~((low < self.threshold) & (high >= self.threshold))
+        # Combined score = 0.6 * rule score + 0.4 * 100 * probability (as in _build_evidence)
+        rule_part = 0.6 * np.asarray(rule_scores, dtype=np.float64)
+        combined_low, combined_high = rule_part + 40 * low, rule_part + 40 * high
+        for boundary in boundaries:
+            served &= ~((combined_low < boundary) & (combined_high >= boundary))
+        return np.where(served, mean, np.nan), served
+
+    def save(self, path: str):
+        """Write the table as JSON (atomically)"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        document = {
+            "model_version": self.model_version,
+            "features": self.features,
+            "threshold": self.threshold,
+            "quantile": self.quantile,
+            "min_samples": self.min_samples,
+            "metadata": self.metadata,
+            "table": [list(key) + list(entry) for key, entry in sorted(self.table.items())],
+        }
+        with open(path + ".tmp", "w") as f:
+            json.dump(document, f, indent=1)
+        os.replace(path + ".tmp", path)
+        logger.info(f"✅ Fast path saved to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> Optional["FastPathScorer"]:
+        """Read a table written by save(); None when there is none"""
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            document = json.load(f)
+        width = len(document["features"])
+        table = {tuple(row[:width]): tuple(row[width:]) for row in document["table"]}
+        return cls(document["model_version"], document["features"], table, document["threshold"],
+                   document["quantile"], document["min_samples"], document.get("metadata"))
+
+    def stats(self) -> Dict:
+        return {"model_version": self.model_version, "features": self.features,
+                "combinations": len(self.table), **self.metadata}
@@ -0,0 +1,183 @@
+import os
+import json
+from typing import Dict, List, Optional, Union
+import logging
+from dataclasses import fields
+
+import numpy as np
+import pandas as pd
+
+from .runtime import catboost
+from .claims import ClaimBatch, ClaimData
+
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# FEATURE PIPELINE
+# =====================================================
+
+class FeaturePipeline:
+    """Model input preparation compiled once from the trained CatBoost model.
+
+    Column order, categorical columns, fill values, date-part derivations and
+    ClaimData -> training name aliases are resolved at compile time, so
+    transform() only does whole-frame operations per request. A ClaimBatch
+    is transformed straight from its arrays: numeric columns are passed
+    through, categorical columns keep their codes and date parts are parsed
+    once per distinct date.
+    """
+
+    DATE_PARTS = ("year", "month", "day")
+    CATEGORICAL_FILL = "Unknown"
+
+    def __init__(self, feature_names: List[str], categorical_features: List[str],
+                 fill_values: Dict[str, float], aliases: Dict[str, str],
+                 date_features: Dict[str, List[tuple]]):
+        self.feature_names = list(feature_names)
+        self.categorical_features = [f for f in self.feature_names if f in set(categorical_features)]
+        self.numeric_features = [f for f in self.feature_names if f not in set(categorical_features)]
+        self.cat_feature_indices = [self.feature_names.index(f) for f in self.categorical_features]
+        self.fill_values = fill_values
+        self.aliases = aliases
+        self.date_features = date_features
+
+    @classmethod
+    def compile(cls, model, categorical_features: List[str], fill_values: Optional[Dict[str, float]] = None,
+                fill_values_path: str = "models/feature_fill_values.json") -> "FeaturePipeline":
+        """Build the pipeline for a loaded CatBoost model"""
+        feature_names = list(model.feature_names_)
+        claim_fields = {f.name for f in fields(ClaimData)}
+
+        # Training data used hyphenated names (capital-gains) where ClaimData uses underscores
+        aliases = {}
+        for feature in feature_names:
+            field_name = feature.replace('-', '_')
+            if feature not in claim_fields and field_name in claim_fields:
+                aliases[field_name] = feature
+
+        # <date column>_<year|month|day> features are derived from the raw ISO date fields
+        date_features: Dict[str, List[tuple]] = {}
+        for feature in feature_names:
+            source, _, part = feature.rpartition('_')
+            if part in cls.DATE_PARTS and source in claim_fields:
+                date_features.setdefault(source, []).append((part, feature))
+
+        if fill_values is None:
+            fill_values = cls.load_fill_values(fill_values_path)
+        if fill_values is None and os.getenv("FILL_VALUES_FROM_BORDERS", "false").lower() == "true":
+            logger.warning("⚠️ FILL_VALUES_FROM_BORDERS set, approximating numeric fill values from split borders")
+            fill_values = cls.fill_values_from_model(model)
+        if fill_values is None:
+            logger.warning(f"⚠️ {fill_values_path} not found, leaving missing numeric features to CatBoost")
+            fill_values = {}
+        # No fill value (None/NaN) keeps the feature missing so CatBoost's own missing-value handling applies
+        numeric = [f for f in feature_names if f not in set(categorical_features)]
+        fill_values = {f: np.nan if fill_values.get(f) is None else float(fill_values[f]) for f in numeric}
+
+        return cls(feature_names, categorical_features, fill_values, aliases, date_features)
+
+    @staticmethod
+    def load_fill_values(path: str) -> Optional[Dict[str, float]]:
+        """Read training-time numeric fill values written by save_fill_values"""
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    @staticmethod
+    def fill_values_from_model(model) -> Dict[str, float]:
+        """Median of each feature's split borders.
+
+        Only a rough stand-in for training medians (borders cluster where the
+        model splits, not where the data is), so it is opt-in.
+        """
+        names = model.feature_names_
+        return {names[index]: float(np.median(borders)) for index, borders in model.get_borders().items() if borders}
+
+    def fit_fill_values(self, training_df: pd.DataFrame) -> Dict[str, float]:
+        """Compute numeric fill values (training medians) from a training frame"""
+        features = self._derive(training_df)
+        medians = features.reindex(columns=self.numeric_features).apply(pd.to_numeric, errors='coerce').median()
+        self.fill_values = {f: float(v) if pd.notna(v) else np.nan for f, v in medians.items()}
+        return self.fill_values
+
+    def fill_values_json(self) -> Dict[str, Optional[float]]:
+        """Fill values with missing entries as null, for metadata and fill value files"""
+        return {f: None if np.isnan(v) else v for f, v in self.fill_values.items()}
+
+    def save_fill_values(self, path: str = "models/feature_fill_values.json"):
+        """Persist fill values next to the model"""
+        with open(path, 'w') as f:
+            json.dump(self.fill_values_json(), f, indent=2)
+
+    def _derive(self, claims_df: pd.DataFrame) -> pd.DataFrame:
+        """Apply name aliases and derive date-part columns"""
+        claims_df = claims_df.rename(columns=self.aliases)
+        derived = {}
+        for source, parts in self.date_features.items():
+            if source not in claims_df.columns:
+                continue
+            dates = pd.to_datetime(claims_df[source], errors='coerce')
+            for part, feature in parts:
+                derived[feature] = getattr(dates.dt, part)
+        return claims_df.assign(**derived)
+
+    def transform(self, claims: Union[pd.DataFrame, ClaimBatch]) -> pd.DataFrame:
+        """Model-ready frame: training column order, typed and filled"""
+        if isinstance(claims, ClaimBatch):
+            return self._transform_batch(claims)
+        derived = self._derive(claims)
+        numeric = derived.reindex(columns=self.numeric_features).astype(np.float64).fillna(self.fill_values)
+        # Plain object strings: CatBoost walks arrow-backed string columns element by element
+        categorical = (derived.reindex(columns=self.categorical_features)
+                       .fillna(self.CATEGORICAL_FILL).astype(str).astype(object))
+        return pd.concat([numeric, categorical], axis=1)[self.feature_names]
+
+    def _transform_batch(self, batch: ClaimBatch) -> pd.DataFrame:
+        n_claims = len(batch)
+        columns = {self.aliases.get(name, name): values for name, values in batch.columns.items()}
+        for source, parts in self.date_features.items():
+            dates = columns.get(source)
+            if dates is None:
+                continue
+            if not isinstance(dates, pd.Categorical):
+                dates = pd.Categorical(dates)
+            parsed = pd.DatetimeIndex(pd.to_datetime(pd.Series(dates.categories, dtype=object), errors='coerce'))
+            for part, feature in parts:
+                # Code -1 (missing date) picks the trailing NaN
+                values = np.append(getattr(parsed, part).to_numpy(dtype=np.float64, na_value=np.nan), np.nan)
+                columns[feature] = values[dates.codes]
+
+        frame = {}
+        categorical = set(self.categorical_features)
+        for feature in self.feature_names:
+            values = columns.get(feature)
+            if feature in categorical:
+                frame[feature] = self._categorical_column(values, n_claims)
+            elif values is None:
+                frame[feature] = np.full(n_claims, self.fill_values[feature])
+            else:
+                values = np.asarray(values, dtype=np.float64)
+                missing = np.isnan(values)
+                frame[feature] = np.where(missing, self.fill_values[feature], values) if missing.any() else values
+        return pd.DataFrame(frame, copy=False)
+
+    def _categorical_column(self, values, n_claims: int) -> pd.Categorical:
+        """String categories with missing values mapped to CATEGORICAL_FILL, reusing codes where possible"""
+        if values is None:
+            return pd.Categorical.from_codes(np.zeros(n_claims, dtype=np.int8), categories=[self.CATEGORICAL_FILL])
+        if not isinstance(values, pd.Categorical):
+            values = pd.Categorical(values)
+        categories = [str(category) for category in values.categories]
+        codes = values.codes
+        if (codes < 0).any():
+            if self.CATEGORICAL_FILL not in categories:
+                categories.append(self.CATEGORICAL_FILL)
+            codes = np.where(codes < 0, categories.index(self.CATEGORICAL_FILL), codes)
+        elif all(isinstance(category, str) for category in values.categories):
+            return values
+        return pd.Categorical.from_codes(codes, categories=categories)
+
+    def to_pool(self, claims: Union[pd.DataFrame, ClaimBatch]) -> "catboost.Pool":
+        """CatBoost Pool ready for predict_proba"""
+        return catboost.Pool(self.transform(claims), cat_features=self.cat_feature_indices)
@@ -0,0 +1,142 @@
+from typing import Dict, List, Optional, Union
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .claims import ClaimBatch
+
+# =====================================================
+# POLICY HISTORY INDEX
+# =====================================================
+
+class PolicyHistoryIndex:
+    """In-process index of policy_number -> compact summaries of its claims.
+
+    Summaries are (claim_id, incident day number, total_claim_amount) tuples,
+    loaded from storage once per policy and kept in an LRU bounded by
+    max_policies and max_claims_per_policy. loader takes a list of policy
+    numbers and returns str(policy_number) -> claims, so every policy a batch
+    misses is fetched in one bulk call. Saved claims are folded into cached
+    policies, so velocity features need no database round trip per claim.
+    """
+
+    VELOCITY_WINDOWS = (30, 90, 365)
+
+    def __init__(self, loader, max_policies: int = 50000, max_claims_per_policy: int = 100):
+        self.loader = loader
+        self.max_policies = max_policies
+        self.max_claims_per_policy = max_claims_per_policy
+        self._policies: "OrderedDict[str, List[tuple]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _day_number(value) -> Optional[int]:
+        """Days since the epoch for an ISO date, None if unparseable"""
+        try:
+            return (pd.Timestamp(value).normalize() - pd.Timestamp(0)).days
+        except (ValueError, TypeError):
+            return None
+
+    def _summarize(self, claim: Dict) -> tuple:
+        return (claim.get('claim_id'), self._day_number(claim.get('incident_date')),
+                float(claim.get('total_claim_amount') or 0.0))
+
+    def _store(self, policy_key: str, summaries: List[tuple]) -> List[tuple]:
+        # Keep the most recent claims when a policy has more than max_claims_per_policy
+        summaries.sort(key=lambda summary: summary[1] if summary[1] is not None else -1)
+        summaries = summaries[-self.max_claims_per_policy:]
+        self._policies[policy_key] = summaries
+        self._policies.move_to_end(policy_key)
+        while len(self._policies) > self.max_policies:
+            self._policies.popitem(last=False)
+        return summaries
+
+    def histories(self, policy_numbers: List) -> Dict[str, List[tuple]]:
+        """Claim summaries for many policies, loading every uncached one in a single bulk call"""
+        found: Dict[str, List[tuple]] = {}
+        missing = {}
+        with self._lock:
+            for policy_number in policy_numbers:
+                policy_key = str(policy_number)
+                if policy_key in found or policy_key in missing:
+                    continue
+                if policy_key in self._policies:
+                    self._policies.move_to_end(policy_key)
+                    self.hits += 1
+                    found[policy_key] = self._policies[policy_key]
+                else:
+                    missing[policy_key] = policy_number
+            self.misses += len(missing)
+        if not missing:
+            return found
+        claims = self.loader(list(missing.values()))
+        with self._lock:
+            for policy_key in missing:
+                found[policy_key] = self._store(
+                    policy_key, [self._summarize(claim) for claim in claims.get(policy_key, [])])
+        return found
+
+    def history(self, policy_number) -> List[tuple]:
+        """Claim summaries for a policy, loading them from storage on a miss"""
+        return self.histories([policy_number])[str(policy_number)]
+
+    def record_claim(self, claim: Dict):
+        """Fold a newly saved claim into its policy's cached history"""
+        policy_key = str(claim.get('policy_number'))
+        with self._lock:
+            if policy_key not in self._policies:
+                return  # loaded fresh from storage on first lookup
+            summary = self._summarize(claim)
+            summaries = [s for s in self._policies[policy_key] if s[0] != summary[0]]
+            summaries.append(summary)
+            self._store(policy_key, summaries)
+
+    def invalidate(self, policy_number=None):
+        """Drop one policy (or everything) from the index"""
+        with self._lock:
+            if policy_number is None:
+                self._policies.clear()
+            else:
+                self._policies.pop(str(policy_number), None)
+
+    def velocity_features(self, claims_df: Union[pd.DataFrame, ClaimBatch]) -> pd.DataFrame:
+        """Prior-claim counts per window and cumulative prior amount for each row.
+
+        A prior claim is another claim on the same policy whose incident date
+        is on or before this claim's incident date.
+        """
+        if isinstance(claims_df, ClaimBatch):
+            claims_df = claims_df.to_dataframe(["claim_id", "policy_number", "incident_date"])
+        n_claims = len(claims_df)
+        columns = [f"prior_claims_{window}d" for window in self.VELOCITY_WINDOWS] + ["prior_claims_amount"]
+        features = np.zeros((n_claims, len(columns)))
+        if n_claims == 0 or 'policy_number' not in claims_df.columns:
+            return pd.DataFrame(features, columns=columns, index=claims_df.index)
+
+        incident = pd.to_datetime(claims_df.get('incident_date'), errors='coerce')
+        days = ((incident.dt.normalize() - pd.Timestamp(0)).dt.days).to_numpy(dtype=np.float64)
+        claim_ids = claims_df['claim_id'].to_numpy() if 'claim_id' in claims_df.columns else np.full(n_claims, None)
+        windows = np.array(self.VELOCITY_WINDOWS, dtype=np.float64)
+
+        policies = claims_df['policy_number'].to_numpy()
+        groups = claims_df.groupby(claims_df['policy_number'].astype(str)).indices
+        histories = self.histories([policies[rows[0]] for rows in groups.values()])
+        for policy_key, rows in groups.items():
+            summaries = histories[policy_key]
+            if not summaries:
+                continue
+            history_ids = np.array([summary[0] for summary in summaries], dtype=object)
+            history_days = np.array([np.nan if summary[1] is None else summary[1] for summary in summaries])
+            history_amounts = np.array([summary[2] for summary in summaries])
+            for row in rows:
+                others = history_ids != claim_ids[row]
+                elapsed = days[row] - history_days[others]
+                prior = elapsed >= 0
+                features[row, :len(windows)] = ((elapsed[:, None] <= windows) & prior[:, None]).sum(axis=0)
+                features[row, -1] = history_amounts[others][prior].sum()
+
+        return pd.DataFrame(features, columns=columns, index=claims_df.index)
@@ -0,0 +1,160 @@
+import os
+from typing import Dict, Optional
+from contextlib import contextmanager, nullcontext
+import threading
+import time
+import bisect
+from collections import OrderedDict
+
+from .runtime import otel_trace
+
+# =====================================================
+# METRICS AND TRACING
+# =====================================================
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """In-process counters, gauges and histograms rendered in the Prometheus text format.
+
+    Metrics are declared once with their help text; samples are keyed by
+    their label values. render() produces the body served at GET /metrics.
+    """
+
+    DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def _declare(self, name: str, metric_type: str, help_text: str, buckets: Optional[tuple] = None):
+        with self._lock:
+            self._metrics.setdefault(name, {"type": metric_type, "help": help_text,
+                                            "buckets": buckets, "samples": {}})
+
+    def counter(self, name: str, help_text: str):
+        self._declare(name, "counter", help_text)
+
+    def gauge(self, name: str, help_text: str):
+        self._declare(name, "gauge", help_text)
+
+    def histogram(self, name: str, help_text: str, buckets: tuple = DEFAULT_BUCKETS):
+        self._declare(name, "histogram", help_text, tuple(buckets))
+
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            samples = self._metrics[name]["samples"]
+            samples[key] = samples.get(key, 0.0) + amount
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._metrics[name]["samples"][tuple(sorted(labels.items()))] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            metric = self._metrics[name]
+            histogram = metric["samples"].get(key)
+            if histogram is None:
+                histogram = metric["samples"][key] = Histogram(metric["buckets"])
+            histogram.observe(value)
+
+    @staticmethod
+    def _format_labels(labels) -> str:
+        if not labels:
+            return ""
+        escape = lambda value: str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels) + "}"
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, metric in self._metrics.items():
+                lines.append(f"# HELP {name} {metric['help']}")
+                lines.append(f"# TYPE {name} {metric['type']}")
+                for labels, sample in metric["samples"].items():
+                    if metric["type"] != "histogram":
+                        lines.append(f"{name}{self._format_labels(labels)} {sample:g}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(sample.buckets, sample.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{self._format_labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+                    lines.append(f"{name}_bucket{self._format_labels(labels + (('le', '+Inf'),))} {sample.count}")
+                    lines.append(f"{name}_sum{self._format_labels(labels)} {sample.sum:.6f}")
+                    lines.append(f"{name}_count{self._format_labels(labels)} {sample.count}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+METRICS.histogram("fraud_stage_duration_seconds", "Time spent in each pipeline stage (one observation per call)")
+METRICS.histogram("fraud_claim_duration_seconds", "End-to-end processing time per claim")
+METRICS.counter("fraud_claims_total", "Claims analysed, by decision tier")
+METRICS.counter("fraud_claim_errors_total", "Claims that could not be processed")
+METRICS.counter("fraud_ai_requests_total", "AI analyses, by outcome (success or fallback)")
+METRICS.counter("fraud_ai_fallbacks_total", "AI analyses replaced by the algorithmic fallback, by error type")
+METRICS.counter("fraud_ai_cache_requests_total", "AI response cache lookups, by result")
+METRICS.counter("fraud_fast_path_total", "Model probabilities answered by the fast path or deferred to the full model")
+METRICS.counter("fraud_http_requests_total", "Scoring service requests, by endpoint and status")
+METRICS.gauge("fraud_http_in_flight_requests", "Scoring service requests currently being handled")
+METRICS.histogram("fraud_service_batch_size", "Claims per micro-batch, by batcher",
+                  buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024))
+
+_tracer = None
+_tracer_resolved = False
+
+
+def get_tracer():
+    """OpenTelemetry tracer, or None when tracing is disabled or not installed"""
+    global _tracer, _tracer_resolved
+    if not _tracer_resolved:
+        _tracer_resolved = True
+        if os.getenv("TRACING_ENABLED", "true").lower() in ("1", "true", "yes"):
+            try:
+                _tracer = otel_trace.get_tracer("fraud_detection")
+            except ImportError:
+                _tracer = None
+    return _tracer
+
+
+def trace_span(name: str, **attributes):
+    """Span context manager (a no-op without OpenTelemetry)"""
+    tracer = get_tracer()
+    if tracer is None:
+        return nullcontext()
+    return tracer.start_as_current_span(name, attributes=attributes)
+
+
+@contextmanager
+def track_stage(stage: str, timings: Optional[Dict[str, float]] = None, **attributes):
+    """Time a pipeline stage with the monotonic clock.
+
+    The elapsed time is observed in fraud_stage_duration_seconds, added to
+    timings[stage] in milliseconds when a dict is given, and the stage runs
+    inside a "fraud.<stage>" trace span.
+    """
+    start = time.perf_counter()
+    try:
+        with trace_span(f"fraud.{stage}", **attributes):
+            yield
+    finally:
+        elapsed = time.perf_counter() - start
+        METRICS.observe("fraud_stage_duration_seconds", elapsed, stage=stage)
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed * 1000
@@ -0,0 +1,199 @@
+import os
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+import logging
+from dataclasses import dataclass
+import threading
+import time
+import tempfile
+
+import pandas as pd
+
+from .runtime import catboost, joblib
+from .features import FeaturePipeline
+
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# MODEL REGISTRY
+# =====================================================
+
+@dataclass(frozen=True)
+class ModelVersion:
+    """A loaded model together with the feature metadata it was trained with"""
+    version: str
+    model: Any
+    categorical_features: List[str]
+    feature_pipeline: FeaturePipeline
+    metadata: Dict
+
+
+class ModelRegistry:
+    """Versioned CatBoost models stored in CatBoost's native .cbm format.
+
+    Layout: <root>/<version>/model.cbm + metadata.json, with <root>/ACTIVE naming
+    the version to serve. The active ModelVersion is loaded lazily, re-checked
+    every refresh_interval seconds and swapped by a single reference
+    assignment, so scoring calls that already hold the previous version finish
+    on it. Without any registered version the legacy joblib pickles are served.
+    """
+
+    LEGACY_VERSION = "legacy-pkl"
+
+    def __init__(self, root: str = "models/registry", refresh_interval: float = 10.0,
+                 legacy_model_path: str = "models/catboost_model.pkl",
+                 legacy_features_path: str = "models/categorical_features.pkl"):
+        self.root = root
+        self.refresh_interval = refresh_interval
+        self.legacy_model_path = legacy_model_path
+        self.legacy_features_path = legacy_features_path
+        self._active: Optional[ModelVersion] = None
+        self._last_checked = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> ModelVersion:
+        """The version to score with; loads or hot-swaps it when needed"""
+        if self._active is None or time.monotonic() - self._last_checked >= self.refresh_interval:
+            self.refresh()
+        return self._active
+
+    def versions(self) -> List[str]:
+        """Registered versions, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        versions = [name for name in os.listdir(self.root)
+                    if os.path.exists(os.path.join(self.root, name, "metadata.json"))]
+        return sorted(versions, key=lambda name: (len(name), name))
+
+    def active_version_name(self) -> Optional[str]:
+        path = os.path.join(self.root, "ACTIVE")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return f.read().strip() or None
+
+    def refresh(self) -> bool:
+        """Swap to the version named in ACTIVE if it differs from the one being served.
+
+        A version that fails to load (bad pointer, corrupt model or metadata)
+        is logged and the current one kept; it only raises when there is no
+        version to fall back on.
+        """
+        with self._lock:
+            self._last_checked = time.monotonic()
+            wanted = self.active_version_name() or self.LEGACY_VERSION
+            if self._active is not None and self._active.version == wanted:
+                return False
+            try:
+                loaded = self.load_legacy() if wanted == self.LEGACY_VERSION else self.load_version(wanted)
+            except Exception as e:
+                if self._active is None:
+                    raise
+                logger.error(f"❌ Could not load model version {wanted}, "
+                             f"still serving {self._active.version}: {str(e)}")
+                return False
+            self._swap(loaded)
+            return True
+
+    def _swap(self, loaded: ModelVersion):
+        previous = self._active.version if self._active is not None else None
+        self._active = loaded
+        logger.info(f"✅ Serving model version {loaded.version}"
+                    + (f" (was {previous})" if previous else ""))
+
+    def load_version(self, version: str) -> ModelVersion:
+        """Load a registered version from its .cbm file and metadata"""
+        directory = os.path.join(self.root, version)
+        with open(os.path.join(directory, "metadata.json")) as f:
+            metadata = json.load(f)
+        model = catboost.CatBoostClassifier()
+        model.load_model(os.path.join(directory, "model.cbm"), format="cbm")
+        categorical_features = metadata["categorical_features"]
+        pipeline = FeaturePipeline.compile(model, categorical_features, fill_values=metadata.get("fill_values"))
+        return ModelVersion(version, model, categorical_features, pipeline, metadata)
+
+    def load_legacy(self) -> ModelVersion:
+        """Load the original joblib pickles shipped in models/"""
+        model = joblib.load(self.legacy_model_path)
+        categorical_features = joblib.load(self.legacy_features_path)
+        pipeline = FeaturePipeline.compile(model, categorical_features)
+        metadata = {"version": self.LEGACY_VERSION, "source": self.legacy_model_path}
+        return ModelVersion(self.LEGACY_VERSION, model, categorical_features, pipeline, metadata)
+
+    def register(self, model, categorical_features: List[str],
+                 fill_values: Optional[Dict[str, Optional[float]]] = None, metrics: Optional[Dict] = None,
+                 extra_metadata: Optional[Dict] = None, artifacts: Optional[Dict[str, str]] = None,
+                 activate: bool = False) -> str:
+        """Save a model as the next version; the directory appears atomically.
+
+        artifacts maps extra file names to text content written alongside
+        the model (e.g. feature_importance.csv).
+        """
+        existing = [int(name[1:]) for name in self.versions() if name[1:].isdigit()]
+        version = f"v{max(existing, default=0) + 1}"
+        pipeline = FeaturePipeline.compile(model, categorical_features, fill_values=fill_values)
+
+        os.makedirs(self.root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{version}-", dir=self.root)
+        model.save_model(os.path.join(staging, "model.cbm"), format="cbm")
+        metadata = {
+            "version": version,
+            "created_at": datetime.now().isoformat(),
+            "feature_names": list(model.feature_names_),
+            "categorical_features": list(categorical_features),
+            "fill_values": pipeline.fill_values_json(),
+            "tree_count": model.tree_count_,
+            "metrics": metrics or {},
+            **(extra_metadata or {}),
+        }
+        with open(os.path.join(staging, "metadata.json"), "w") as f:
+            json.dump(metadata, f, indent=2)
+        for name, content in (artifacts or {}).items():
+            with open(os.path.join(staging, name), "w") as f:
+                f.write(content)
+        os.chmod(staging, 0o755)
+        os.rename(staging, os.path.join(self.root, version))
+        logger.info(f"✅ Registered model version {version}")
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version: str):
+        """Point ACTIVE at a version and swap to it in this process.
+
+        The version is loaded first, so one that cannot be served raises here
+        and ACTIVE is left alone.
+        """
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version: {version}")
+        loaded = self.load_version(version)
+        pointer = os.path.join(self.root, "ACTIVE")
+        with open(pointer + ".tmp", "w") as f:
+            f.write(version + "\n")
+        with self._lock:
+            os.replace(pointer + ".tmp", pointer)
+            self._last_checked = time.monotonic()
+            self._swap(loaded)
+
+    def register_legacy(self, activate: bool = True, training_path: Optional[str] = None) -> str:
+        """Convert the legacy pickled model into a registered .cbm version.
+
+        With training_path (CSV or Parquet of the training data) the numeric
+        fill values are fitted as training medians and also written to
+        models/feature_fill_values.json.
+        """
+        legacy = self.load_legacy()
+        pipeline = legacy.feature_pipeline
+        extra_metadata = {"source": self.legacy_model_path}
+        if training_path:
+            reader = pd.read_parquet if training_path.endswith(".parquet") else pd.read_csv
+            pipeline.fit_fill_values(reader(training_path))
+            pipeline.save_fill_values()
+            extra_metadata["fill_values_source"] = training_path
+            logger.info(f"✅ Fitted fill values from {training_path}")
+        return self.register(legacy.model, legacy.categorical_features,
+                             fill_values=pipeline.fill_values_json(),
+                             extra_metadata=extra_metadata, activate=activate)
@@ -0,0 +1,237 @@
+import os
+from typing import Dict, List, Optional
+import logging
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from .runtime import catboost, catboost_utils
+from .storage import StorageBackend
+from .features import FeaturePipeline
+from .registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# MODEL RETRAINING
+# =====================================================
+
+class ModelRetrainer:
+    """Warm-start retraining of the active model on newly labelled claims.
+
+    Claims changed since the active version's training watermark (metadata
+    "trained_through", the newest updated_at it has seen) are streamed from
+    storage page by page and transformed with that version's compiled
+    FeaturePipeline, so a run reads and prepares only the new data. Labels
+    come from investigator verdicts (status) or an explicit fraud report.
+    Training continues from the active model (init_model) on every core with
+    early stopping on one half of a held-out split, and the result is
+    registered, with its feature_importance.csv, only when AUC and Logloss on
+    the other half (claims neither model was fitted or stopped on) are no
+    worse than the active model's.
+    """
+
+    FRAUD_STATUSES = ("rejected",)
+    GENUINE_STATUSES = ("approved",)
+    # Training parameters carried over from the model being continued
+    INHERITED_PARAMS = ("loss_function", "depth", "class_weights", "l2_leaf_reg", "one_hot_max_size", "border_count")
+    METRICS = ("AUC", "Logloss")
+
+    def __init__(self, storage: StorageBackend, registry: ModelRegistry, iterations: int = 300,
+                 learning_rate: float = 0.03, early_stopping_rounds: int = 50, validation_fraction: float = 0.2,
+                 min_claims: int = 200, tolerance: float = 0.0, page_size: int = 1000,
+                 trust_fraud_reported: bool = False, seed: int = 42):
+        self.storage = storage
+        self.registry = registry
+        self.iterations = iterations
+        self.learning_rate = learning_rate
+        self.early_stopping_rounds = early_stopping_rounds
+        self.validation_fraction = validation_fraction
+        self.min_claims = min_claims
+        self.tolerance = tolerance
+        self.page_size = page_size
+        self.trust_fraud_reported = trust_fraud_reported
+        self.seed = seed
+
+    @classmethod
+    def from_env(cls, storage: StorageBackend, registry: ModelRegistry, **overrides) -> "ModelRetrainer":
+        """Retrainer configured by the RETRAIN_* environment variables"""
+        options = {
+            "iterations": int(os.getenv("RETRAIN_ITERATIONS", "300")),
+            "learning_rate": float(os.getenv("RETRAIN_LEARNING_RATE", "0.03")),
+            "early_stopping_rounds": int(os.getenv("RETRAIN_EARLY_STOPPING_ROUNDS", "50")),
+            "validation_fraction": float(os.getenv("RETRAIN_VALIDATION_FRACTION", "0.2")),
+            "min_claims": int(os.getenv("RETRAIN_MIN_CLAIMS", "200")),
+            "tolerance": float(os.getenv("RETRAIN_TOLERANCE", "0.0")),
+            "page_size": int(os.getenv("RETRAIN_PAGE_SIZE", "1000")),
+            "trust_fraud_reported": os.getenv("RETRAIN_TRUST_FRAUD_REPORTED", "false").lower() == "true",
+        }
+        options.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(storage, registry, **options)
+
+    def label(self, claim: Dict) -> Optional[int]:
+        """1 for fraud, 0 for genuine, None while undecided.
+
+        fraud_reported defaults to "N" on intake, so "N" only counts as a
+        label when trust_fraud_reported is set (e.g. for imported history).
+        """
+        status = str(claim.get("status") or "").lower()
+        if status in self.FRAUD_STATUSES:
+            return 1
+        if status in self.GENUINE_STATUSES:
+            return 0
+        reported = str(claim.get("fraud_reported") or "").upper()
+        if reported == "Y":
+            return 1
+        if reported == "N" and self.trust_fraud_reported:
+            return 0
+        return None
+
+    def collect(self, pipeline: FeaturePipeline, updated_since: Optional[str] = None) -> tuple:
+        """Stream labelled claims changed after updated_since into model features.
+
+        Returns (features, labels, claim_ids, trained_through), where
+        trained_through is the newest updated_at read, labelled or not.
+        """
+        frames, labels, claim_ids = [], [], []
+        pending: List[Dict] = []
+        trained_through = updated_since
+        for claim in self.storage.iter_claims_updated_since(updated_since, page_size=self.page_size):
+            trained_through = claim.get("updated_at") or trained_through
+            label = self.label(claim)
+            if label is None:
+                continue
+            pending.append(claim)
+            labels.append(label)
+            claim_ids.append(claim.get("claim_id"))
+            if len(pending) >= self.page_size:
+                frames.append(pipeline.transform(pd.DataFrame(pending)))
+                pending = []
+        if pending:
+            frames.append(pipeline.transform(pd.DataFrame(pending)))
+        features = (pd.concat(frames, ignore_index=True) if frames
+                    else pd.DataFrame(columns=pipeline.feature_names))
+        return features, np.asarray(labels, dtype=np.int8), claim_ids, trained_through
+
+    def holdout_masks(self, claim_ids: List[str]) -> tuple:
+        """(early-stopping rows, gate rows), chosen by claim ID hash so a claim stays on the same side across runs.
+
+        validation_fraction of the claims are held out and split evenly: the
+        early-stopping half picks the best iteration, so only the gate half
+        gives an unbiased comparison with the active model.
+        """
+        cutoff = int(self.validation_fraction * 1000)
+        hashes = np.fromiter((zlib.crc32(str(claim_id).encode()) for claim_id in claim_ids),
+                             dtype=np.int64, count=len(claim_ids))
+        holdout = hashes % 1000 < cutoff
+        gate = holdout & ((hashes // 1000) % 2 == 1)
+        return holdout & ~gate, gate
+
+    def training_params(self, model) -> Dict:
+        params = {key: value for key, value in model.get_params().items() if key in self.INHERITED_PARAMS}
+        params.update({
+            "iterations": self.iterations,
+            "learning_rate": self.learning_rate,
+            "eval_metric": "Logloss",
+            "custom_metric": ["AUC"],
+            "thread_count": -1,
+            "random_seed": self.seed,
+            "allow_writing_files": False,
+            "verbose": False,
+        })
+        return params
+
+    @classmethod
+    def evaluate(cls, model, pool: "catboost.Pool", labels: np.ndarray) -> Dict[str, float]:
+        """Unweighted validation metrics, computed the way CatBoost reports them"""
+        approx = model.predict(pool, prediction_type="RawFormulaVal")
+        return {metric: float(catboost_utils.eval_metric(labels, approx, metric)[0]) for metric in cls.METRICS}
+
+    def regressions(self, baseline: Dict[str, float], candidate: Dict[str, float]) -> List[str]:
+        """Metrics where the candidate is worse than the baseline by more than the tolerance"""
+        found = []
+        if candidate["AUC"] < baseline["AUC"] - self.tolerance:
+            found.append(f"AUC {candidate['AUC']:.4f} < {baseline['AUC']:.4f}")
+        if candidate["Logloss"] > baseline["Logloss"] + self.tolerance:
+            found.append(f"Logloss {candidate['Logloss']:.4f} > {baseline['Logloss']:.4f}")
+        return found
+
+    @staticmethod
+    def feature_importance_csv(model) -> str:
+        """feature,importance rows, most important first (the models/feature_importance.csv layout)"""
+        importance = pd.DataFrame({"feature": model.feature_names_, "importance": model.get_feature_importance()})
+        return importance.sort_values("importance", ascending=False).to_csv(index=False)
+
+    def run(self, activate: bool = True, full: bool = False, dry_run: bool = False) -> Dict:
+        """Retrain on claims labelled since the active version's watermark.
+
+        full ignores the watermark and reads every claim; dry_run trains and
+        validates without registering.
+        """
+        base = self.registry.active
+        updated_since = None if full else base.metadata.get("trained_through")
+        report: Dict = {"base_version": base.version, "updated_since": updated_since, "timings_s": {}}
+
+        started = time.perf_counter()
+        features, labels, claim_ids, trained_through = self.collect(base.feature_pipeline, updated_since)
+        report["timings_s"]["collect"] = round(time.perf_counter() - started, 3)
+        report.update(labeled_claims=int(len(labels)), fraud_claims=int(labels.sum()),
+                      trained_through=trained_through)
+        if len(labels) < self.min_claims:
+            return self._finish(report, "skipped", f"{len(labels)} newly labelled claims, need {self.min_claims}")
+
+        stopping, gate = self.holdout_masks(claim_ids)
+        train = ~(stopping | gate)
+        train_labels, stopping_labels, gate_labels = labels[train], labels[stopping], labels[gate]
+        if any(len(set(split)) < 2 for split in (train_labels, stopping_labels, gate_labels)):
+            return self._finish(report, "skipped",
+                                "training, early-stopping and gate splits need both fraud and genuine claims")
+        cat_features = base.feature_pipeline.cat_feature_indices
+        train_pool = catboost.Pool(features[train], train_labels, cat_features=cat_features)
+        stopping_pool = catboost.Pool(features[stopping], stopping_labels, cat_features=cat_features)
+        gate_pool = catboost.Pool(features[gate], gate_labels, cat_features=cat_features)
+        report.update(training_claims=int(len(train_labels)), early_stopping_claims=int(len(stopping_labels)),
+                      validation_claims=int(len(gate_labels)))
+
+        started = time.perf_counter()
+        model = catboost.CatBoostClassifier(**self.training_params(base.model))
+        model.fit(train_pool, eval_set=stopping_pool, init_model=base.model,
+                  early_stopping_rounds=self.early_stopping_rounds, use_best_model=True)
+        report["timings_s"]["train"] = round(time.perf_counter() - started, 3)
+        report["added_trees"] = int(model.tree_count_ - base.model.tree_count_)
+
+        started = time.perf_counter()
+        baseline = self.evaluate(base.model, gate_pool, gate_labels)
+        candidate = self.evaluate(model, gate_pool, gate_labels)
+        report["timings_s"]["evaluate"] = round(time.perf_counter() - started, 3)
+        report["metrics"] = {"baseline": baseline, "candidate": candidate}
+
+        regressions = self.regressions(baseline, candidate)
+        if regressions:
+            return self._finish(report, "rejected", "; ".join(regressions))
+        if dry_run:
+            return self._finish(report, "validated", "dry run, not registered")
+
+        report["version"] = self.registry.register(
+            model, base.categorical_features, fill_values=base.feature_pipeline.fill_values,
+            metrics={"validation": candidate, "baseline": baseline},
+            extra_metadata={"parent_version": base.version, "trained_through": trained_through,
+                            "training_claims": report["training_claims"],
+                            "early_stopping_claims": report["early_stopping_claims"],
+                            "validation_claims": report["validation_claims"]},
+            artifacts={"feature_importance.csv": self.feature_importance_csv(model)},
+            activate=activate
+        )
+        return self._finish(report, "registered")
+
+    @staticmethod
+    def _finish(report: Dict, status: str, reason: Optional[str] = None) -> Dict:
+        report["status"] = status
+        if reason:
+            report["reason"] = reason
+        icon = {"registered": "✅", "validated": "✅", "rejected": "❌"}.get(status, "⚠️")
+        logger.info(f"{icon} Retraining {status}" + (f": {reason}" if reason else "")
+                    + (f" ({report['version']})" if "version" in report else ""))
+        return report
@@ -0,0 +1,268 @@
+import os
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .claims import ClaimBatch
+
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# RULE ENGINE
+# =====================================================
+
+# Default rule table, used when no rules config file is present. Each rule adds
+# `weight` to the score when all of its `all` conditions and at least one of its
+# `any` conditions (if given) hold. Conditions compare a claim field against a
+# literal `value` or another field (`other_field`); `default` replaces missing
+# values and `transform` is one of "upper" or "years_since".
+DEFAULT_FRAUD_RULES = {
+    "max_score": 100,
+    "rules": [
+        {
+            "name": "high_claim_amount",
+            "description": "Claim amount above $50,000",
+            "weight": 25,
+            "all": [{"field": "total_claim_amount", "op": ">", "value": 50000, "default": 0}]
+        },
+        {
+            "name": "night_time_incident",
+            "description": "Incident between 22:00 and 04:59",
+            "weight": 15,
+            "any": [
+                {"field": "incident_hour_of_the_day", "op": "<=", "value": 4, "default": 12},
+                {"field": "incident_hour_of_the_day", "op": ">=", "value": 22, "default": 12}
+            ]
+        },
+        {
+            "name": "no_witnesses_no_police_report",
+            "description": "No witnesses and no police report",
+            "weight": 20,
+            "all": [
+                {"field": "witnesses", "op": "==", "value": 0, "default": 1},
+                {"field": "police_report_available", "op": "==", "value": "NO", "default": "YES",
+                 "transform": "upper"}
+            ]
+        },
+        {
+            "name": "cross_state_incident",
+            "description": "Incident state differs from policy state",
+            "weight": 10,
+            "all": [{"field": "incident_state", "op": "!=", "other_field": "policy_state", "default": ""}]
+        },
+        {
+            "name": "old_vehicle_high_claim",
+            "description": "Vehicle older than 15 years with a claim above $30,000",
+            "weight": 20,
+            "all": [
+                {"field": "auto_year", "op": ">", "value": 15, "transform": "years_since"},
+                {"field": "total_claim_amount", "op": ">", "value": 30000, "default": 0}
+            ]
+        },
+        {
+            "name": "repeat_claim_90d",
+            "description": "Another claim on this policy in the previous 90 days",
+            "weight": 15,
+            "all": [{"field": "prior_claims_90d", "op": ">=", "value": 1, "default": 0}]
+        },
+        {
+            "name": "frequent_claims_365d",
+            "description": "Three or more claims on this policy in the previous year",
+            "weight": 15,
+            "all": [{"field": "prior_claims_365d", "op": ">=", "value": 3, "default": 0}]
+        }
+    ]
+}
+
+
+@dataclass
+class RuleEvaluation:
+    """Rule engine output for a batch of claims"""
+    rule_names: List[str]
+    descriptions: List[str]
+    hits: np.ndarray  # (n_claims, n_rules) boolean hit matrix
+    scores: np.ndarray  # capped score per claim
+    weights: Optional[np.ndarray] = None  # points each rule adds
+
+    def hit_counts(self) -> Dict[str, int]:
+        """Number of claims in the batch that triggered each rule"""
+        return dict(zip(self.rule_names, self.hits.sum(axis=0).astype(int).tolist()))
+
+    def triggered_rules(self, row: int) -> List[str]:
+        """Names of the rules a single claim triggered"""
+        return [name for name, hit in zip(self.rule_names, self.hits[row]) if hit]
+
+
+@dataclass(frozen=True)
+class CompiledRules:
+    """A validated rule table; the engine swaps whole tables so a reload is never half-applied"""
+    max_score: float
+    rule_names: List[str]
+    descriptions: List[str]
+    weights: np.ndarray
+    rules: List[tuple]  # (all_conditions, any_conditions) per rule
+
+
+class RuleEngine:
+    """Table-driven fraud rules evaluated column-wise over a batch of claims.
+
+    The table is read from a JSON config file (FRAUD_RULES_PATH, default
+    config/fraud_rules.json) and re-read when the file changes, so rules can be
+    tuned without a deploy.
+    """
+
+    OPERATORS = {
+        ">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal,
+        "==": np.equal, "!=": np.not_equal,
+        "in": lambda column, values: np.isin(column, values),
+        "not_in": lambda column, values: ~np.isin(column, values),
+    }
+    TRANSFORMS = ("upper", "years_since")
+
+    def __init__(self, rule_table: Dict, config_path: Optional[str] = None):
+        self.config_path = config_path
+        self._config_mtime = self._mtime(config_path)
+        self._table = self._compile(rule_table)
+
+    @classmethod
+    def load(cls, config_path: Optional[str] = None) -> "RuleEngine":
+        """Load the rule table from the config file, falling back to the built-in rules"""
+        config_path = config_path or os.getenv('FRAUD_RULES_PATH', 'config/fraud_rules.json')
+        if os.path.exists(config_path):
+            with open(config_path) as f:
+                rule_table = json.load(f)
+            logger.info(f"✅ Fraud rules loaded from {config_path}")
+        else:
+            logger.warning(f"⚠️ Rules config {config_path} not found, using built-in rules")
+            rule_table = DEFAULT_FRAUD_RULES
+        return cls(rule_table, config_path)
+
+    @staticmethod
+    def _mtime(path: Optional[str]) -> Optional[float]:
+        return os.path.getmtime(path) if path and os.path.exists(path) else None
+
+    def _compile(self, rule_table: Dict) -> CompiledRules:
+        """Validate the table and turn it into weight vector + condition tuples"""
+        rules = rule_table.get("rules", [])
+        compiled = []
+        for rule in rules:
+            all_conditions = [self._compile_condition(c) for c in rule.get("all", [])]
+            any_conditions = [self._compile_condition(c) for c in rule.get("any", [])]
+            if not all_conditions and not any_conditions:
+                raise ValueError(f"Rule {rule['name']} has no conditions")
+            compiled.append((all_conditions, any_conditions))
+        return CompiledRules(
+            max_score=float(rule_table.get("max_score", 100)),
+            rule_names=[rule["name"] for rule in rules],
+            descriptions=[rule.get("description", rule["name"]) for rule in rules],
+            weights=np.array([float(rule["weight"]) for rule in rules]),
+            rules=compiled,
+        )
+
+    @property
+    def rule_names(self) -> List[str]:
+        return self._table.rule_names
+
+    @property
+    def descriptions(self) -> List[str]:
+        return self._table.descriptions
+
+    @property
+    def weights(self) -> np.ndarray:
+        return self._table.weights
+
+    @property
+    def max_score(self) -> float:
+        return self._table.max_score
+
+    def _compile_condition(self, condition: Dict) -> tuple:
+        op = condition["op"]
+        if op not in self.OPERATORS:
+            raise ValueError(f"Unknown rule operator: {op}")
+        transform = condition.get("transform")
+        if transform is not None and transform not in self.TRANSFORMS:
+            raise ValueError(f"Unknown rule transform: {transform}")
+        if "other_field" in condition:
+            operand = ("field", condition["other_field"])
+            textual = True
+        else:
+            value = condition["value"]
+            operand = ("value", value)
+            sample = value[0] if isinstance(value, list) and value else value
+            textual = isinstance(sample, str)
+        column = (condition["field"], textual, condition.get("default"), transform)
+        return column, self.OPERATORS[op], operand
+
+    def reload_if_changed(self) -> bool:
+        """Recompile the rule table if the config file changed on disk"""
+        mtime = self._mtime(self.config_path)
+        if mtime is None or mtime == self._config_mtime:
+            return False
+        try:
+            with open(self.config_path) as f:
+                table = self._compile(json.load(f))
+            self._table = table
+            self._config_mtime = mtime
+            logger.info(f"✅ Fraud rules reloaded from {self.config_path}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Invalid rules config, keeping previous rules: {str(e)}")
+            return False
+
+    def evaluate(self, claims: Union[pd.DataFrame, ClaimBatch, Dict[str, List]]) -> RuleEvaluation:
+        """Evaluate every rule over a batch given as a DataFrame, ClaimBatch or dict of columns"""
+        self.reload_if_changed()
+        table = self._table
+        if isinstance(claims, (pd.DataFrame, ClaimBatch)):
+            n_claims = len(claims)
+        else:
+            n_claims = len(next(iter(claims.values()), []))
+        current_year = datetime.now().year
+        columns: Dict[tuple, np.ndarray] = {}
+
+        def get_column(field: str, textual: bool, default, transform) -> np.ndarray:
+            key = (field, textual, default, transform)
+            if key not in columns:
+                if field in claims:
+                    raw = pd.Series(claims[field])
+                    if isinstance(raw.dtype, pd.CategoricalDtype):
+                        raw = raw.astype(object)
+                else:
+                    raw = pd.Series([None] * n_claims, dtype=object)
+                if transform == "years_since":
+                    years = pd.to_numeric(raw, errors='coerce').fillna(current_year if default is None else default)
+                    columns[key] = current_year - years.to_numpy(dtype=np.float64)
+                elif textual:
+                    text = raw.fillna("" if default is None else default).astype(str)
+                    columns[key] = (text.str.upper() if transform == "upper" else text).to_numpy(dtype=object)
+                else:
+                    numbers = pd.to_numeric(raw, errors='coerce').fillna(np.nan if default is None else default)
+                    columns[key] = numbers.to_numpy(dtype=np.float64)
+            return columns[key]
+
+        def condition_mask(condition: tuple) -> np.ndarray:
+            (field, textual, default, transform), op, (kind, operand) = condition
+            left = get_column(field, textual, default, transform)
+            if kind == "field":
+                operand = get_column(operand, textual, default, transform)
+            return np.asarray(op(left, operand), dtype=bool)
+
+        hits = np.zeros((n_claims, len(table.rules)), dtype=bool)
+        for index, (all_conditions, any_conditions) in enumerate(table.rules):
+            mask = np.ones(n_claims, dtype=bool)
+            for condition in all_conditions:
+                mask &= condition_mask(condition)
+            if any_conditions:
+                any_mask = np.zeros(n_claims, dtype=bool)
+                for condition in any_conditions:
+                    any_mask |= condition_mask(condition)
+                mask &= any_mask
+            hits[:, index] = mask
+
+        scores = np.minimum(hits.astype(np.float64) @ table.weights, table.max_score)
+        return RuleEvaluation(table.rule_names, table.descriptions, hits, scores, table.weights)
@@ -0,0 +1,83 @@
+from typing import List, Optional
+import logging
+from contextlib import contextmanager
+import threading
+import time
+import importlib
+
+# =====================================================
+# STARTUP PROFILING AND LAZY IMPORTS
+# =====================================================
+
+# (phase, nesting depth, milliseconds) in the order phases started
+STARTUP_TIMINGS: List[list] = []
+_startup_state = threading.local()
+
+@contextmanager
+def startup_phase(name: str):
+    """Time a startup phase into STARTUP_TIMINGS; nested phases are indented in the report"""
+    depth = getattr(_startup_state, "depth", 0)
+    entry = [name, depth, 0.0]
+    STARTUP_TIMINGS.append(entry)
+    _startup_state.depth = depth + 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        entry[2] = (time.perf_counter() - started) * 1000
+        _startup_state.depth = depth
+
+def format_startup_report(timings: Optional[List[list]] = None) -> str:
+    """Startup phases as an indented table; the total counts top-level phases only"""
+    timings = STARTUP_TIMINGS if timings is None else timings
+    lines = [f"{'phase':<44}{'ms':>10}"]
+    for name, depth, ms in timings:
+        lines.append(f"{'  ' * depth + name:<44}{ms:>10.1f}")
+    lines.append(f"{'total':<44}{sum(ms for _, depth, ms in timings if depth == 0):>10.1f}")
+    return "\n".join(lines)
+
+class LazyModule:
+    """Stand-in for a heavy dependency that imports it on first attribute access.
+
+    Keeps CatBoost, Firebase, joblib and requests off the import path, so
+    commands and workers that never touch them don't pay for loading them.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with startup_phase(f"import {self._name}"):
+                self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attribute: str):
+        return getattr(self._module or self._load(), attribute)
+
+# Imported here so the startup report times them; modules import them as np and pd
+with startup_phase("import numpy, pandas"):
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+
+catboost = LazyModule("catboost")
+catboost_utils = LazyModule("catboost.utils")
+joblib = LazyModule("joblib")
+requests = LazyModule("requests")
+dotenv = LazyModule("dotenv")
+
+# Firebase
+firebase_admin = LazyModule("firebase_admin")
+credentials = LazyModule("firebase_admin.credentials")
+firestore = LazyModule("firebase_admin.firestore")
+firestore_field_path = LazyModule("google.cloud.firestore_v1.field_path")
+
+# Optional tracing; spans are no-ops without it
+otel_trace = LazyModule("opentelemetry.trace")
+
+def configure_runtime(log_level: int = logging.INFO):
+    """Load .env and configure logging; run by entry points, not on import"""
+    with startup_phase("load environment"):
+        dotenv.load_dotenv()
+    logging.basicConfig(level=log_level)
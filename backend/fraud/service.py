@@ -0,0 +1,432 @@
+import os
+import json
+import asyncio
+from typing import Dict, List, Optional
+import logging
+from dataclasses import asdict, fields, MISSING
+import threading
+import time
+import queue
+import gc
+import signal
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from .runtime import format_startup_report
+from .claims import ClaimBatch, ClaimData, FraudAnalysisResult
+from .metrics import METRICS
+from .system import ImprovedFraudDetectionSystem
+
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# SCORING SERVICE
+# =====================================================
+
+class LatencyTracker:
+    """Rolling window of request latencies for percentile and throughput reporting"""
+
+    def __init__(self, window: int = 10000):
+        self._samples = deque(maxlen=window)  # (finished_at, latency_ms)
+        self._lock = threading.Lock()
+        self.total = 0
+        self.errors = 0
+
+    def record(self, latency_ms: float, error: bool = False):
+        with self._lock:
+            self._samples.append((time.monotonic(), latency_ms))
+            self.total += 1
+            self.errors += int(error)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            samples = list(self._samples)
+            total, errors = self.total, self.errors
+        if not samples:
+            return {"requests": total, "errors": errors}
+        latencies = np.array([latency for _, latency in samples])
+        elapsed = samples[-1][0] - samples[0][0]
+        return {
+            "requests": total,
+            "errors": errors,
+            "window_requests": len(samples),
+            "throughput_rps": len(samples) / elapsed if elapsed > 0 else None,
+            "latency_ms": {
+                "p50": float(np.percentile(latencies, 50)),
+                "p95": float(np.percentile(latencies, 95)),
+                "p99": float(np.percentile(latencies, 99)),
+                "max": float(latencies.max()),
+            },
+        }
+
+
+class MicroBatcher:
+    """Coalesces concurrent requests into batches for one handler call.
+
+    A worker thread takes the first queued item, then keeps collecting until
+    max_batch_size items are gathered or max_wait_ms has passed. submit() and
+    submit_all() raise queue.Full when the items don't fit in the
+    max_queue_size slots left (backpressure); submit_all() queues all of its
+    items or none.
+    The handler returns a list of results in item order, or a Future of one.
+    """
+
+    def __init__(self, handle_batch, max_batch_size: int = 64, max_wait_ms: float = 5.0,
+                 max_queue_size: int = 1024, name: str = "micro-batcher"):
+        self.handle_batch = handle_batch
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._submit_lock = threading.Lock()
+        self.batches = 0
+        self.batched_items = 0
+        self.largest_batch = 0
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, item) -> Future:
+        return self.submit_all([item])[0]
+
+    def submit_all(self, items: List) -> List[Future]:
+        futures = [Future() for _ in items]
+        # Only submitters add to the queue, so room checked under the lock can only grow
+        with self._submit_lock:
+            if self._queue.maxsize and self._queue.maxsize - self._queue.qsize() < len(items):
+                raise queue.Full
+            for item, future in zip(items, futures):
+                self._queue.put_nowait((item, future))
+        return futures
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[tuple]):
+        items = [item for item, _ in batch]
+        futures = [future for _, future in batch]
+        self.batches += 1
+        self.batched_items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        METRICS.observe("fraud_service_batch_size", len(batch), batcher=self.name)
+
+        def resolve(results):
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+        def fail(error):
+            for future in futures:
+                future.set_exception(error)
+
+        try:
+            outcome = self.handle_batch(items)
+        except Exception as e:
+            fail(e)
+            return
+        if isinstance(outcome, Future):
+            outcome.add_done_callback(lambda done: fail(done.exception()) if done.exception() else resolve(done.result()))
+        else:
+            resolve(outcome)
+
+    @property
+    def capacity(self) -> int:
+        """Queue slots in total; 0 means unbounded"""
+        return self._queue.maxsize
+
+    def stats(self) -> Dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "batches": self.batches,
+            "mean_batch_size": self.batched_items / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+        }
+
+
+class ScoringService:
+    """Local HTTP service around ImprovedFraudDetectionSystem.
+
+    POST /score scores claims (rules + CatBoost) and POST /claims runs the full
+    analysis pipeline; both accept one claim object or {"claims": [...]}.
+    Concurrent requests are coalesced by a MicroBatcher so each batch makes a
+    single predict_proba call. GET /stats reports latency percentiles,
+    throughput, concurrency and batching, GET /metrics exposes the pipeline
+    metrics in the Prometheus text format and GET /health is a liveness check.
+    """
+
+    ENDPOINTS = ("/score", "/claims", "/stats", "/metrics", "/health")
+
+    def __init__(self, system: "ImprovedFraudDetectionSystem", max_batch_size: int = 64,
+                 max_wait_ms: float = 5.0, max_queue_size: int = 1024, request_timeout: float = 120.0):
+        self.system = system
+        self.request_timeout = request_timeout
+        self.score_batcher = MicroBatcher(self._score_batch, max_batch_size, max_wait_ms, max_queue_size,
+                                          name="score-batcher")
+        self.claims_batcher = MicroBatcher(self._claims_batch, max_batch_size, max_wait_ms, max_queue_size,
+                                           name="claims-batcher")
+        self.latency = {"/score": LatencyTracker(), "/claims": LatencyTracker()}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        # The full pipeline runs on one long-lived event loop so AI calls from
+        # consecutive batches overlap under the shared AI concurrency limit
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="claims-loop", daemon=True).start()
+
+    def _score_batch(self, claims: List[ClaimData]) -> List[Dict]:
+        scores = self.system.score_dataframe(ClaimBatch.from_claims(claims))
+        records = scores.to_dict('records')
+        for record in records:
+            if not record["error"]:
+                record["risk_level"] = self.system.get_risk_level(record["combined_score"])
+                record["action"] = self.system.get_action(record["combined_score"])
+        return records
+
+    def _claims_batch(self, claims: List[ClaimData]) -> Future:
+        coroutine = self.system.process_claims_async(claims)
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    @staticmethod
+    def parse_claims(payload) -> List[ClaimData]:
+        """Validate a request body into ClaimData objects (ValueError on bad input)"""
+        records = payload.get("claims") if isinstance(payload, dict) and "claims" in payload else [payload]
+        if not isinstance(records, list) or not records:
+            raise ValueError("Expected a claim object or {\"claims\": [...]}")
+        field_names = {f.name for f in fields(ClaimData)}
+        required = {f.name for f in fields(ClaimData)
+                    if f.default is MISSING and f.default_factory is MISSING} - {"claim_id"}
+        claims = []
+        for index, record in enumerate(records):
+            if not isinstance(record, dict):
+                raise ValueError(f"Claim {index} is not an object")
+            missing = sorted(required - record.keys())
+            if missing:
+                raise ValueError(f"Claim {index} is missing fields: {', '.join(missing)}")
+            record = {key: value for key, value in record.items() if key in field_names}
+            record.setdefault("claim_id", "")
+            claims.append(ClaimData(**record))
+        return claims
+
+    def handle(self, path: str, payload) -> tuple:
+        """Serve one POST request; returns (status, body)"""
+        batcher = {"/score": self.score_batcher, "/claims": self.claims_batcher}.get(path)
+        if batcher is None:
+            return 404, {"error": f"Unknown endpoint {path}"}
+        try:
+            claims = self.parse_claims(payload)
+        except (ValueError, TypeError) as e:
+            return 400, {"error": str(e)}
+        if 0 < batcher.capacity < len(claims):
+            return 413, {"error": f"At most {batcher.capacity} claims per request"}
+        try:
+            futures = batcher.submit_all(claims)
+        except queue.Full:
+            return 503, {"error": "Scoring queue is full, retry later"}
+        results = [future.result(timeout=self.request_timeout) for future in futures]
+        results = [asdict(result) if isinstance(result, FraudAnalysisResult) else result for result in results]
+        return 200, {"results": results}
+
+    def stats(self) -> Dict:
+        return {
+            "endpoints": {path: tracker.snapshot() for path, tracker in self.latency.items()},
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "batching": {"/score": self.score_batcher.stats(), "/claims": self.claims_batcher.stats()},
+            "tiers": self.system.get_tier_stats(),
+            "ai_cache": self.system.ai_cache.stats() if self.system.ai_cache is not None else None,
+            "duplicate_index": (self.system.duplicate_index.stats()
+                                if self.system.duplicate_index is not None else None),
+            "explainer": self.system.explainer.stats() if self.system.explainer is not None else None,
+            "fast_path": self.system.get_fast_path().stats() if self.system.get_fast_path() is not None else None,
+        }
+
+    def make_handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logger.debug(f"{self.address_string()} {format % args}")
+
+            def _send(self, status: int, body: Dict, headers: Optional[Dict] = None):
+                self._send_bytes(status, json.dumps(body, default=str).encode(), "application/json", headers)
+                endpoint = self.path if self.path in service.ENDPOINTS else "other"
+                METRICS.inc("fraud_http_requests_total", endpoint=endpoint, status=status)
+
+            def _send_bytes(self, status: int, data: bytes, content_type: str, headers: Optional[Dict] = None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Access-Control-Allow-Origin", os.getenv("CORS_ALLOW_ORIGIN", "*"))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_OPTIONS(self):
+                self._send(204, {}, {"Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+                                     "Access-Control-Allow-Headers": "Content-Type"})
+
+            def do_GET(self):
+                if self.path == "/health":
+                    self._send(200, {"status": "ok", "model_version": service.system.model_registry.active.version})
+                elif self.path == "/stats":
+                    self._send(200, service.stats())
+                elif self.path == "/metrics":
+                    self._send_bytes(200, METRICS.render().encode(), "text/plain; version=0.0.4; charset=utf-8")
+                else:
+                    self._send(404, {"error": f"Unknown endpoint {self.path}"})
+
+            def do_POST(self):
+                started = time.perf_counter()
+                with service._in_flight_lock:
+                    service.in_flight += 1
+                    service.peak_in_flight = max(service.peak_in_flight, service.in_flight)
+                    METRICS.set("fraud_http_in_flight_requests", service.in_flight)
+                status = 500
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    try:
+                        payload = json.loads(self.rfile.read(length) or b"null")
+                    except json.JSONDecodeError as e:
+                        status, body = 400, {"error": f"Invalid JSON: {str(e)}"}
+                    else:
+                        status, body = service.handle(self.path, payload)
+                except Exception as e:
+                    logger.error(f"❌ Error serving {self.path}: {str(e)}")
+                    status, body = 500, {"error": str(e)}
+                finally:
+                    with service._in_flight_lock:
+                        service.in_flight -= 1
+                        METRICS.set("fraud_http_in_flight_requests", service.in_flight)
+                headers = {"Retry-After": "1"} if status == 503 else None
+                self._send(status, body, headers)
+                if self.path in service.latency:
+                    service.latency[self.path].record((time.perf_counter() - started) * 1000, error=status >= 500)
+
+        return Handler
+
+    @staticmethod
+    def bind(host: str = "127.0.0.1", port: int = 8000) -> ThreadingHTTPServer:
+        """Bind the HTTP server with a listen backlog sized for bursts of concurrent clients.
+
+        The request handler is attached by make_server, so one bound server
+        can be handed to several forked workers.
+        """
+        server_class = type("ScoringHTTPServer", (ThreadingHTTPServer,),
+                            {"daemon_threads": True, "request_queue_size": 1024})
+        return server_class((host, port), BaseHTTPRequestHandler)
+
+    def make_server(self, host: str = "127.0.0.1", port: int = 8000,
+                    server: Optional[ThreadingHTTPServer] = None) -> ThreadingHTTPServer:
+        """HTTP server for this service, binding a new socket unless one is given"""
+        server = server or self.bind(host, port)
+        server.RequestHandlerClass = self.make_handler()
+        return server
+
+    def serve_forever(self, host: str = "127.0.0.1", port: int = 8000,
+                      server: Optional[ThreadingHTTPServer] = None):
+        server = self.make_server(host, port, server)
+        logger.info(f"✅ Scoring service listening on http://{host}:{port} (pid {os.getpid()})")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            self.system.close()
+
+
+class PreforkServer:
+    """Scoring service run by several forked worker processes.
+
+    The parent builds the pipeline, loads and warms up the model and binds
+    the listening socket once, then forks workers that each run a
+    ScoringService on that socket. Workers start serving without importing
+    or loading anything and share the model's memory pages with the parent
+    copy-on-write; the parent's objects are frozen out of the cyclic GC so
+    collections in the workers don't touch (and copy) those pages. Storage
+    connections, the AI session and the service threads are created in each
+    worker after the fork. Metrics and /stats are per worker. Workers that
+    die are replaced; SIGTERM or SIGINT stops them all gracefully.
+    """
+
+    RESPAWN_DELAY_SECONDS = 1.0
+
+    def __init__(self, system: "ImprovedFraudDetectionSystem", workers: int, host: str = "127.0.0.1",
+                 port: int = 8000, **service_options):
+        if not hasattr(os, "fork"):
+            raise RuntimeError("Prefork serving needs os.fork, which this platform lacks")
+        self.system = system
+        self.workers = max(1, workers)
+        self.host = host
+        self.port = port
+        self.service_options = service_options
+        self._children: Dict[int, float] = {}  # pid -> start time
+        self._stopping = False
+
+    def run(self):
+        server = ScoringService.bind(self.host, self.port)
+        self.system.warm_up()
+        logger.info(f"📊 Startup breakdown (pid {os.getpid()}):\n{format_startup_report()}")
+        gc.collect()
+        gc.freeze()
+        handlers = {signum: signal.signal(signum, self._stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            for _ in range(self.workers):
+                self._spawn(server)
+            logger.info(f"✅ Prefork service on http://{self.host}:{self.port} with {self.workers} workers")
+            while self._children:
+                try:
+                    pid, status = os.wait()
+                except ChildProcessError:
+                    break
+                started = self._children.pop(pid, None)
+                if started is None or self._stopping:
+                    continue
+                logger.warning(f"⚠️ Worker {pid} exited with code {os.waitstatus_to_exitcode(status)}, restarting")
+                if time.monotonic() - started < self.RESPAWN_DELAY_SECONDS:
+                    time.sleep(self.RESPAWN_DELAY_SECONDS)
+                self._spawn(server)
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+            server.server_close()
+
+    def _stop(self, signum, frame):
+        self._stopping = True
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _spawn(self, server: ThreadingHTTPServer):
+        pid = os.fork()
+        if pid:
+            self._children[pid] = time.monotonic()
+            return
+        exit_code = 0
+        try:
+            # The parent relays SIGINT as SIGTERM; SIGTERM stops serve_forever from another thread
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM,
+                          lambda signum, frame: threading.Thread(target=server.shutdown, daemon=True).start())
+            service = ScoringService(self.system, **self.service_options)
+            service.serve_forever(self.host, self.port, server=server)
+        except BaseException as e:
+            logger.error(f"❌ Worker {os.getpid()} failed: {str(e)}")
+            exit_code = 1
+        finally:
+            logging.shutdown()
+            os._exit(exit_code)
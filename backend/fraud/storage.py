@@ -0,0 +1,944 @@
+import os
+import json
+import math
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+from dataclasses import asdict
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+import atexit
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+from .runtime import credentials, firebase_admin, firestore, firestore_field_path, startup_phase
+from .claims import ClaimData, FraudAnalysisResult
+
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# FIRESTORE WRITE-BEHIND BUFFER
+# =====================================================
+
+class BufferedFirestoreWriter:
+    """Groups Firestore writes into WriteBatch commits.
+
+    Writes are buffered and flushed when max_batch_size operations are pending,
+    when the oldest pending write is flush_interval seconds old, or on close().
+    Writes to the same document are coalesced before commit. If a batch commit
+    fails, its operations are retried one by one so failures can be reported
+    per document.
+    """
+
+    MAX_BATCH_OPS = 500  # Firestore WriteBatch limit
+
+    def __init__(self, db, max_batch_size: int = MAX_BATCH_OPS, flush_interval: float = 1.0):
+        self.db = db
+        self.max_batch_size = min(max_batch_size, self.MAX_BATCH_OPS)
+        self.flush_interval = flush_interval
+        self._pending: "OrderedDict[tuple, list]" = OrderedDict()  # (collection, doc_id) -> [op, data]
+        self._oldest_pending = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._closed = threading.Event()
+        self.written = 0
+        self.failed_writes = deque(maxlen=1000)
+        self._flusher = threading.Thread(target=self._flush_periodically, name="firestore-writer", daemon=True)
+        self._flusher.start()
+
+    def set(self, collection: str, doc_id: str, data: Dict):
+        """Buffer a full document write"""
+        self._enqueue(collection, doc_id, "set", data)
+
+    def update(self, collection: str, doc_id: str, data: Dict):
+        """Buffer a partial update of an existing document"""
+        self._enqueue(collection, doc_id, "update", data)
+
+    def increment(self, collection: str, doc_id: str, deltas: Dict[str, float]):
+        """Buffer numeric increments; dotted keys address nested fields"""
+        self._enqueue(collection, doc_id, "increment", deltas)
+
+    def _enqueue(self, collection: str, doc_id: str, op: str, data: Dict):
+        key = (collection, doc_id)
+        with self._lock:
+            pending = self._pending.get(key)
+            mixes_increment = pending is not None and (pending[0] == "increment") != (op == "increment")
+        if mixes_increment:
+            self.flush()
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is None or op == "set":
+                self._pending[key] = [op, dict(data)]
+            elif op == "increment":
+                for field, delta in data.items():
+                    pending[1][field] = pending[1].get(field, 0) + delta
+            else:
+                # set+update stays a set, update+update stays an update
+                pending[1].update(data)
+            if self._oldest_pending is None:
+                self._oldest_pending = time.monotonic()
+            full = len(self._pending) >= self.max_batch_size
+        if full:
+            self.flush()
+
+    def has_pending(self, collection: str, doc_id: str) -> bool:
+        with self._lock:
+            return (collection, doc_id) in self._pending
+
+    def has_pending_field(self, collection: str, field: str, values: List) -> bool:
+        """Whether a pending write to collection sets field to one of values"""
+        values = {str(value) for value in values}
+        with self._lock:
+            return any(key[0] == collection and field in data and str(data[field]) in values
+                       for key, (_, data) in self._pending.items())
+
+    def flush(self) -> Dict:
+        """Commit all pending writes; returns counts and per-document failures"""
+        with self._flush_lock:
+            with self._lock:
+                operations = list(self._pending.items())
+                self._pending.clear()
+                self._oldest_pending = None
+
+            failed = []
+            for start in range(0, len(operations), self.max_batch_size):
+                chunk = operations[start:start + self.max_batch_size]
+                batch = self.db.batch()
+                for (collection, doc_id), (op, data) in chunk:
+                    self.apply(batch, self.db.collection(collection).document(doc_id), op, data)
+                try:
+                    batch.commit()
+                    self.written += len(chunk)
+                except Exception as e:
+                    logger.warning(f"⚠️ Batch commit of {len(chunk)} writes failed, retrying individually: {str(e)}")
+                    failed.extend(self._commit_individually(chunk))
+
+            if operations:
+                logger.info(f"✅ Flushed {len(operations) - len(failed)} Firestore writes"
+                            + (f", {len(failed)} failed" if failed else ""))
+            self.failed_writes.extend(failed)
+            return {"written": len(operations) - len(failed), "failed": failed}
+
+    def _commit_individually(self, chunk: List[tuple]) -> List[Dict]:
+        failed = []
+        for (collection, doc_id), (op, data) in chunk:
+            try:
+                ref = self.db.collection(collection).document(doc_id)
+                self.apply(ref, None, op, data)
+                self.written += 1
+            except Exception as e:
+                logger.error(f"❌ Write to {collection}/{doc_id} failed: {str(e)}")
+                failed.append({"collection": collection, "document_id": doc_id, "operation": op, "error": str(e)})
+        return failed
+
+    @staticmethod
+    def apply(target, ref, op: str, data: Dict):
+        """Apply one buffered operation to a WriteBatch (with ref) or a DocumentReference (ref=None)"""
+        args = (ref,) if ref is not None else ()
+        if op == "increment":
+            nested = {}
+            for field, delta in data.items():
+                *parents, leaf = field.split(".")
+                node = nested
+                for parent in parents:
+                    node = node.setdefault(parent, {})
+                node[leaf] = firestore.Increment(delta)
+            target.set(*args, nested, merge=True)
+        else:
+            getattr(target, op)(*args, data)
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval / 2):
+            oldest = self._oldest_pending
+            if oldest is not None and time.monotonic() - oldest >= self.flush_interval:
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"❌ Background Firestore flush failed: {str(e)}")
+
+    def close(self) -> Dict:
+        """Stop the background flusher and commit everything still pending"""
+        self._closed.set()
+        return self.flush()
+
+# =====================================================
+# STORAGE BACKENDS
+# =====================================================
+
+class StorageBackend(ABC):
+    """Persistence for claims, analysis results and the dashboard summary.
+
+    Backends implement the batch reads/writes and the cursor-paginated
+    queries; single-item helpers, lazy iteration and the dashboard summary
+    arithmetic are shared here. Page cursors are the ordering values of the
+    last row returned, so they are opaque to callers but stable across pages.
+    """
+
+    DASHBOARD_HIGH_RISK_THRESHOLD = 70.0
+
+    @abstractmethod
+    def save_claim(self, claim_data: ClaimData) -> bool:
+        """Store (or replace) a claim"""
+
+    @abstractmethod
+    def save_analysis_results(self, results: List[FraudAnalysisResult]) -> Dict[str, bool]:
+        """Store analysis results and fold them into the dashboard summary (claim_id -> saved)"""
+
+    @abstractmethod
+    def get_claims(self, claim_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """Retrieve many claims at once (claim_id -> data, None when missing)"""
+
+    @abstractmethod
+    def get_analysis_results(self, claim_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """Retrieve many analysis results at once (claim_id -> data, None when missing)"""
+
+    @abstractmethod
+    def get_claims_by_policy_page(self, policy_number: str, page_size: int = 100,
+                                  cursor: Optional[List] = None) -> tuple:
+        """One page of a policy's claims ordered by claim ID; returns (claims, next_cursor)"""
+
+    @abstractmethod
+    def get_high_risk_claims_page(self, threshold: float = 70.0, page_size: int = 50,
+                                  cursor: Optional[List] = None) -> tuple:
+        """One page of analyses above threshold, highest combined_score first; returns (analyses, next_cursor)"""
+
+    @abstractmethod
+    def get_claims_updated_page(self, updated_since: Optional[str] = None, page_size: int = 500,
+                                cursor: Optional[List] = None) -> tuple:
+        """One page of claims updated after updated_since, oldest update first; returns (claims, next_cursor)"""
+
+    @abstractmethod
+    def get_dashboard_summary(self) -> Dict:
+        """Incrementally maintained totals for the dashboard"""
+
+    @abstractmethod
+    def rebuild_dashboard_summary(self) -> Dict:
+        """Recompute the summary from every stored analysis (one-off backfill)"""
+
+    @abstractmethod
+    def update_claim_status(self, claim_id: str, status: str) -> bool:
+        """Update claim status (e.g., 'approved', 'rejected', 'under_investigation')"""
+
+    def flush(self) -> Dict:
+        """Commit buffered writes (no-op for unbuffered backends)"""
+        return {"written": 0, "failed": []}
+
+    def close(self) -> Dict:
+        """Flush buffered writes and release resources"""
+        return self.flush()
+
+    def save_analysis_result(self, result: FraudAnalysisResult) -> bool:
+        """Save a single fraud analysis result"""
+        return self.save_analysis_results([result])[result.claim_id]
+
+    def get_claim(self, claim_id: str) -> Optional[Dict]:
+        """Retrieve a single claim"""
+        return self.get_claims([claim_id]).get(claim_id)
+
+    def get_analysis_result(self, claim_id: str) -> Optional[Dict]:
+        """Retrieve a single analysis result"""
+        return self.get_analysis_results([claim_id]).get(claim_id)
+
+    @classmethod
+    def _summary_contribution(cls, analysis: Optional[Dict]) -> Dict[str, float]:
+        """What a single analysis document adds to the dashboard summary"""
+        if not analysis:
+            return {}
+        contribution = {
+            "total_analyses": 1,
+            f"risk_level_counts.{analysis.get('risk_level', 'UNKNOWN')}": 1,
+            f"action_counts.{analysis.get('action', 'unknown')}": 1,
+        }
+        if (analysis.get('combined_score') or 0) >= cls.DASHBOARD_HIGH_RISK_THRESHOLD:
+            contribution["high_risk_count"] = 1
+            contribution["amount_at_risk"] = float(analysis.get('total_claim_amount') or 0.0)
+        return contribution
+
+    @classmethod
+    def _summary_delta(cls, old: Optional[Dict], new: Optional[Dict]) -> Dict[str, float]:
+        delta = cls._summary_contribution(new)
+        for field, value in cls._summary_contribution(old).items():
+            delta[field] = delta.get(field, 0) - value
+        return {field: value for field, value in delta.items() if value}
+
+    def _iter_query(self, page_fetcher, page_size: int, limit: Optional[int] = None):
+        """Yield documents page by page until exhausted or limit is reached"""
+        cursor = None
+        yielded = 0
+        while True:
+            size = page_size if limit is None else min(page_size, limit - yielded)
+            if size <= 0:
+                return
+            docs, cursor = page_fetcher(page_size=size, cursor=cursor)
+            for doc in docs:
+                yield doc
+            yielded += len(docs)
+            if cursor is None:
+                return
+
+    def iter_claims_by_policy(self, policy_number: str, page_size: int = 100, limit: Optional[int] = None):
+        """Lazily yield a policy's claims, fetching page_size documents per round trip"""
+        fetch = lambda page_size, cursor: self.get_claims_by_policy_page(policy_number, page_size, cursor)
+        return self._iter_query(fetch, page_size, limit)
+
+    def get_claims_by_policy(self, policy_number: str, limit: Optional[int] = None) -> List[Dict]:
+        """Get all claims for a specific policy"""
+        try:
+            return list(self.iter_claims_by_policy(policy_number, limit=limit))
+        except Exception as e:
+            logger.error(f"❌ Error retrieving claims by policy: {str(e)}")
+            return []
+
+    def get_claims_by_policies(self, policy_numbers: List[str]) -> Dict[str, List[Dict]]:
+        """All claims of many policies (str(policy_number) -> claims); backends override with bulk queries"""
+        return {str(policy_number): self.get_claims_by_policy(policy_number)
+                for policy_number in {str(p): p for p in policy_numbers}.values()}
+
+    def iter_high_risk_claims(self, threshold: float = 70.0, page_size: int = 50, limit: Optional[int] = None):
+        """Lazily yield high-risk analyses in descending combined_score order"""
+        fetch = lambda page_size, cursor: self.get_high_risk_claims_page(threshold, page_size, cursor)
+        return self._iter_query(fetch, page_size, limit)
+
+    def iter_claims_updated_since(self, updated_since: Optional[str] = None, page_size: int = 500,
+                                  limit: Optional[int] = None):
+        """Lazily yield claims changed after updated_since (every claim when None), oldest update first"""
+        fetch = lambda page_size, cursor: self.get_claims_updated_page(updated_since, page_size, cursor)
+        return self._iter_query(fetch, page_size, limit)
+
+    def get_high_risk_claims(self, threshold: float = 70.0, limit: Optional[int] = None) -> List[Dict]:
+        """Get high-risk claims above threshold, highest score first (top `limit` when given)"""
+        try:
+            return list(self.iter_high_risk_claims(threshold, limit=limit))
+        except Exception as e:
+            logger.error(f"❌ Error retrieving high-risk claims: {str(e)}")
+            return []
+
+# =====================================================
+# FIREBASE MANAGER
+# =====================================================
+
+class FirebaseManager(StorageBackend):
+    """Firestore storage backend"""
+    
+    DASHBOARD_SUMMARY_DOC = ('dashboard', 'summary')
+    FIRESTORE_IN_LIMIT = 30  # values per 'in' filter
+    
+    def __init__(self, write_behind: Optional[bool] = None):
+        # The Firestore client and write-behind flusher are created on first use,
+        # so building the manager is cheap and safe to do before forking workers
+        self._db = None
+        self._writer = None
+        self._connect_lock = threading.RLock()
+        self._summary_lock = threading.Lock()
+        if write_behind is None:
+            write_behind = os.getenv('FIRESTORE_WRITE_BEHIND', 'false').lower() in ('1', 'true', 'yes')
+        self.write_behind = write_behind
+
+    @property
+    def db(self):
+        """Firestore client, connected on first access"""
+        if self._db is None:
+            with self._connect_lock:
+                if self._db is None:
+                    self.initialize_firebase()
+        return self._db
+
+    @property
+    def writer(self) -> Optional[BufferedFirestoreWriter]:
+        """Write-behind buffer, started on first access (None without write-behind)"""
+        if self.write_behind and self._writer is None:
+            with self._connect_lock:
+                if self._writer is None:
+                    self._writer = BufferedFirestoreWriter(
+                        self.db,
+                        max_batch_size=int(os.getenv('FIRESTORE_BATCH_SIZE',
+                                                     str(BufferedFirestoreWriter.MAX_BATCH_OPS))),
+                        flush_interval=float(os.getenv('FIRESTORE_FLUSH_INTERVAL_SECONDS', '1.0'))
+                    )
+                    atexit.register(self.close)
+        return self._writer
+
+    def initialize_firebase(self):
+        """Initialize Firebase Admin SDK"""
+        try:
+            with startup_phase("connect firestore"):
+                # Check if Firebase app is already initialized
+                if not firebase_admin._apps:
+                    cred_path = os.getenv('FIREBASE_CREDENTIALS_PATH', 'insurance-fraud-detectio-a6526-firebase-adminsdk-fbsvc-9a0f74002a.json')
+                    
+                    if not os.path.exists(cred_path):
+                        raise FileNotFoundError(f"Firebase credentials file not found: {cred_path}")
+                    
+                    cred = credentials.Certificate(cred_path)
+                    firebase_admin.initialize_app(cred, {
+                        'projectId': os.getenv('FIREBASE_PROJECT_ID', 'insurance-fraud-detection')
+                    })
+                
+                self._db = firestore.client()
+            logger.info("✅ Firebase initialized successfully")
+            
+        except Exception as e:
+            logger.error(f"❌ Firebase initialization failed: {str(e)}")
+            raise
+
+    def _write(self, collection: str, doc_id: str, op: str, data: Dict):
+        """Single-document write, buffered when write-behind is enabled"""
+        if self.writer is not None:
+            getattr(self.writer, op)(collection, doc_id, data)
+        else:
+            getattr(self.db.collection(collection).document(doc_id), op)(data)
+
+    def flush(self) -> Dict:
+        """Commit buffered writes (no-op without write-behind)"""
+        if self._writer is None:
+            return {"written": 0, "failed": []}
+        return self._writer.flush()
+
+    def close(self) -> Dict:
+        """Flush buffered writes and stop the background flusher"""
+        if self._writer is None:
+            return {"written": 0, "failed": []}
+        return self._writer.close()
+
+    def save_claim(self, claim_data: ClaimData) -> bool:
+        """Save claim data to Firestore"""
+        try:
+            claim_dict = asdict(claim_data)
+            self._write('claims', claim_data.claim_id, 'set', claim_dict)
+            logger.info(f"✅ Claim saved: {claim_data.claim_id}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error saving claim: {str(e)}")
+            return False
+
+    def save_analysis_results(self, results: List[FraudAnalysisResult]) -> Dict[str, bool]:
+        """Save analysis results and fold them into the dashboard summary document.
+
+        Previous versions of the results are read so that re-analysed claims
+        replace their old contribution to the summary instead of being counted
+        twice, and the summary is changed with Increment deltas. Without
+        write-behind the read, the result writes and the increment run in one
+        transaction per chunk, which Firestore retries if another writer
+        touches the same analyses. Buffered writes can't join a transaction;
+        write-behind serialises read and enqueue within the process only.
+        """
+        saved = {result.claim_id: False for result in results}
+        try:
+            result_dicts = [asdict(result) for result in results]
+            if self.writer is not None:
+                with self._summary_lock:
+                    previous = self._get_documents('fraud_analyses', list(saved))
+                    summary_delta = self._results_summary_delta(previous, result_dicts)
+                    for result_dict in result_dicts:
+                        self.writer.set('fraud_analyses', result_dict['claim_id'], result_dict)
+                    if summary_delta:
+                        self.writer.increment(*self.DASHBOARD_SUMMARY_DOC, summary_delta)
+            else:
+                chunk_size = BufferedFirestoreWriter.MAX_BATCH_OPS - 1
+                for start in range(0, len(result_dicts), chunk_size):
+                    self._save_results_transaction(self.db.transaction(), result_dicts[start:start + chunk_size])
+
+            for result in results:
+                saved[result.claim_id] = True
+                logger.info(f"✅ Analysis result saved: {result.claim_id}")
+        except Exception as e:
+            logger.error(f"❌ Error saving analysis result: {str(e)}")
+        return saved
+
+    def _results_summary_delta(self, previous: Dict[str, Optional[Dict]], result_dicts: List[Dict]) -> Dict[str, float]:
+        summary_delta: Dict[str, float] = {}
+        previous = dict(previous)
+        for result_dict in result_dicts:
+            delta = self._summary_delta(previous.get(result_dict['claim_id']), result_dict)
+            previous[result_dict['claim_id']] = result_dict
+            for field, value in delta.items():
+                summary_delta[field] = summary_delta.get(field, 0) + value
+        return summary_delta
+
+    def _save_results_transaction(self, transaction, result_dicts: List[Dict]):
+        """Read previous analyses, write the new ones and increment the summary atomically"""
+        @firestore.transactional
+        def apply(transaction):
+            collection = self.db.collection('fraud_analyses')
+            refs = {claim_id: collection.document(claim_id)
+                    for claim_id in dict.fromkeys(result_dict['claim_id'] for result_dict in result_dicts)}
+            previous = {doc.id: doc.to_dict() for doc in transaction.get_all(list(refs.values())) if doc.exists}
+            summary_delta = self._results_summary_delta(previous, result_dicts)
+            latest = {result_dict['claim_id']: result_dict for result_dict in result_dicts}
+            for claim_id, result_dict in latest.items():
+                transaction.set(refs[claim_id], result_dict)
+            if summary_delta:
+                BufferedFirestoreWriter.apply(transaction, self._summary_ref(), "increment", summary_delta)
+
+        apply(transaction)
+
+    def _summary_ref(self):
+        return self.db.collection(self.DASHBOARD_SUMMARY_DOC[0]).document(self.DASHBOARD_SUMMARY_DOC[1])
+
+    def get_dashboard_summary(self) -> Dict:
+        """Read the incrementally maintained dashboard summary (one document read)"""
+        try:
+            self.flush()
+            doc = self._summary_ref().get()
+            summary = doc.to_dict() if doc.exists else {}
+        except Exception as e:
+            logger.error(f"❌ Error retrieving dashboard summary: {str(e)}")
+            summary = {}
+        return {
+            "total_analyses": summary.get("total_analyses", 0),
+            "high_risk_count": summary.get("high_risk_count", 0),
+            "amount_at_risk": summary.get("amount_at_risk", 0.0),
+            "risk_level_counts": summary.get("risk_level_counts", {}),
+            "action_counts": summary.get("action_counts", {}),
+        }
+
+    def rebuild_dashboard_summary(self) -> Dict:
+        """Recompute the summary from every stored analysis (one-off backfill)"""
+        self.flush()
+        totals: Dict[str, float] = {}
+        missing_amounts = {}
+        for doc in self.db.collection('fraud_analyses').stream():
+            analysis = doc.to_dict()
+            if 'total_claim_amount' not in analysis:
+                missing_amounts[analysis['claim_id']] = analysis
+                continue
+            for field, value in self._summary_contribution(analysis).items():
+                totals[field] = totals.get(field, 0) + value
+
+        # Analyses written before they carried total_claim_amount take it from the claim
+        claims = self._get_documents('claims', list(missing_amounts))
+        for claim_id, analysis in missing_amounts.items():
+            analysis['total_claim_amount'] = (claims.get(claim_id) or {}).get('total_claim_amount', 0.0)
+            for field, value in self._summary_contribution(analysis).items():
+                totals[field] = totals.get(field, 0) + value
+
+        self._summary_ref().set({})
+        if totals:
+            BufferedFirestoreWriter.apply(self._summary_ref(), None, "increment", totals)
+        logger.info(f"✅ Dashboard summary rebuilt from {int(totals.get('total_analyses', 0))} analyses")
+        return self.get_dashboard_summary()
+
+    def _get_document(self, collection: str, doc_id: str) -> Optional[Dict]:
+        if self._writer is not None and self._writer.has_pending(collection, doc_id):
+            self._writer.flush()
+        doc = self.db.collection(collection).document(doc_id).get()
+        if doc.exists:
+            return doc.to_dict()
+        return None
+
+    def _get_documents(self, collection: str, doc_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """Fetch many documents with get_all round trips of up to 500 references each"""
+        if self._writer is not None and any(self._writer.has_pending(collection, doc_id) for doc_id in doc_ids):
+            self._writer.flush()
+        documents = {doc_id: None for doc_id in doc_ids}
+        unique_ids = list(documents)
+        for start in range(0, len(unique_ids), BufferedFirestoreWriter.MAX_BATCH_OPS):
+            refs = [self.db.collection(collection).document(doc_id)
+                    for doc_id in unique_ids[start:start + BufferedFirestoreWriter.MAX_BATCH_OPS]]
+            for doc in self.db.get_all(refs):
+                if doc.exists:
+                    documents[doc.id] = doc.to_dict()
+        return documents
+
+    def get_claim(self, claim_id: str) -> Optional[Dict]:
+        """Retrieve claim data from Firestore"""
+        try:
+            return self._get_document('claims', claim_id)
+        except Exception as e:
+            logger.error(f"❌ Error retrieving claim: {str(e)}")
+            return None
+
+    def get_claims(self, claim_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """Retrieve many claims at once (claim_id -> data, None when missing)"""
+        try:
+            return self._get_documents('claims', claim_ids)
+        except Exception as e:
+            logger.error(f"❌ Error retrieving claims: {str(e)}")
+            return {}
+
+    def get_analysis_result(self, claim_id: str) -> Optional[Dict]:
+        """Retrieve analysis result from Firestore"""
+        try:
+            return self._get_document('fraud_analyses', claim_id)
+        except Exception as e:
+            logger.error(f"❌ Error retrieving analysis result: {str(e)}")
+            return None
+
+    def get_analysis_results(self, claim_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """Retrieve many analysis results at once (claim_id -> data, None when missing)"""
+        try:
+            return self._get_documents('fraud_analyses', claim_ids)
+        except Exception as e:
+            logger.error(f"❌ Error retrieving analysis results: {str(e)}")
+            return {}
+
+    def _query_page(self, query, order_fields: List[tuple], page_size: int,
+                    cursor: Optional[List] = None) -> tuple:
+        """Fetch one ordered page of a query; returns (documents, next_cursor)"""
+        for field, direction in order_fields:
+            query = query.order_by(field, direction=direction)
+        if cursor is not None:
+            query = query.start_after(list(cursor))
+        docs = list(query.limit(page_size).stream())
+        next_cursor = None
+        if len(docs) == page_size:
+            last = docs[-1]
+            document_id = firestore_field_path.FieldPath.document_id()
+            next_cursor = [last.id if field == document_id else last.get(field) for field, _ in order_fields]
+        return [doc.to_dict() for doc in docs], next_cursor
+
+    def _flush_pending_claims(self, policy_numbers: List):
+        """Commit buffered claim writes only when they touch these policies"""
+        if self._writer is not None and self._writer.has_pending_field('claims', 'policy_number', policy_numbers):
+            self._writer.flush()
+
+    def get_claims_by_policy_page(self, policy_number: str, page_size: int = 100,
+                                  cursor: Optional[List] = None) -> tuple:
+        """One page of a policy's claims ordered by claim ID; returns (claims, next_cursor)"""
+        if cursor is None:
+            self._flush_pending_claims([policy_number])
+        query = self.db.collection('claims').where(filter=firestore.FieldFilter('policy_number', '==', policy_number))
+        order = [(firestore_field_path.FieldPath.document_id(), firestore.Query.ASCENDING)]
+        return self._query_page(query, order, page_size, cursor)
+
+    def get_claims_by_policies(self, policy_numbers: List[str]) -> Dict[str, List[Dict]]:
+        """All claims of many policies with one 'in' query per FIRESTORE_IN_LIMIT policies"""
+        unique = list({str(p): p for p in policy_numbers}.values())
+        claims = {str(policy_number): [] for policy_number in unique}
+        try:
+            self._flush_pending_claims(unique)
+            for start in range(0, len(unique), self.FIRESTORE_IN_LIMIT):
+                chunk = unique[start:start + self.FIRESTORE_IN_LIMIT]
+                query = self.db.collection('claims').where(filter=firestore.FieldFilter('policy_number', 'in', chunk))
+                for doc in query.stream():
+                    claim = doc.to_dict()
+                    claims.setdefault(str(claim.get('policy_number')), []).append(claim)
+        except Exception as e:
+            logger.error(f"❌ Error retrieving claims by policy: {str(e)}")
+        return claims
+
+    def get_high_risk_claims_page(self, threshold: float = 70.0, page_size: int = 50,
+                                  cursor: Optional[List] = None) -> tuple:
+        """One page of analyses above threshold, highest combined_score first; returns (analyses, next_cursor)"""
+        self.flush()
+        query = self.db.collection('fraud_analyses').where(
+            filter=firestore.FieldFilter('combined_score', '>=', threshold))
+        order = [('combined_score', firestore.Query.DESCENDING),
+                 (firestore_field_path.FieldPath.document_id(), firestore.Query.DESCENDING)]
+        return self._query_page(query, order, page_size, cursor)
+
+    def get_claims_updated_page(self, updated_since: Optional[str] = None, page_size: int = 500,
+                                cursor: Optional[List] = None) -> tuple:
+        """One page of claims updated after updated_since, oldest update first; returns (claims, next_cursor)"""
+        self.flush()
+        query = self.db.collection('claims').where(
+            filter=firestore.FieldFilter('updated_at', '>', updated_since or ""))
+        order = [('updated_at', firestore.Query.ASCENDING),
+                 (firestore_field_path.FieldPath.document_id(), firestore.Query.ASCENDING)]
+        return self._query_page(query, order, page_size, cursor)
+
+    def update_claim_status(self, claim_id: str, status: str) -> bool:
+        """Update claim status (e.g., 'approved', 'rejected', 'under_investigation')"""
+        try:
+            self._write('claims', claim_id, 'update', {
+                'status': status,
+                'updated_at': datetime.now().isoformat()
+            })
+            logger.info(f"✅ Claim status updated: {claim_id} -> {status}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error updating claim status: {str(e)}")
+            return False
+
+# =====================================================
+# LOCAL STORAGE
+# =====================================================
+
+class SQLiteStorage(StorageBackend):
+    """Embedded storage backend on SQLite (a file, or ":memory:").
+
+    Claims and analyses are stored as JSON next to indexed key columns:
+    (policy_number, claim_id) for policy history, (combined_score,
+    claim_id) for the high-risk queue and an expression index on the
+    claim's updated_at for retraining, so every paginated query is an index
+    range scan. The dashboard summary is one row per counter, updated in
+    the same transaction as the analyses it summarises. A file database can
+    be shared by several processes (WAL mode). The connection is opened on
+    first use and reopened in a forked child, which must not reuse its
+    parent's connection.
+    """
+
+    MAX_SQL_VARIABLES = 500
+    UPDATED_AT = "json_extract(data, '$.updated_at')"
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connect_lock = threading.Lock()
+        self._connection = None
+        self._connection_pid = None
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None or self._connection_pid != os.getpid():
+            with self._connect_lock:
+                if self._connection is None or self._connection_pid != os.getpid():
+                    self._connect()
+        return self._connection
+
+    def _connect(self):
+        with startup_phase("connect sqlite"):
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+            self._init_schema(db)
+        self._connection = db
+        self._connection_pid = os.getpid()
+        logger.info(f"✅ SQLite storage ready: {self.path}")
+
+    def _init_schema(self, db: sqlite3.Connection):
+        if self.path != ":memory:":
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS claims (
+                claim_id TEXT PRIMARY KEY,
+                policy_number TEXT,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_claims_policy ON claims(policy_number, claim_id);
+            CREATE INDEX IF NOT EXISTS idx_claims_updated ON claims(json_extract(data, '$.updated_at'), claim_id);
+            CREATE TABLE IF NOT EXISTS fraud_analyses (
+                claim_id TEXT PRIMARY KEY,
+                combined_score REAL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_fraud_analyses_score ON fraud_analyses(combined_score, claim_id);
+            CREATE TABLE IF NOT EXISTS dashboard_summary (
+                field TEXT PRIMARY KEY,
+                value REAL NOT NULL
+            );
+        """)
+
+    @contextmanager
+    def _transaction(self):
+        """Serialise writers in this process and take SQLite's write lock up front"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def _fetch_by_ids(self, db, table: str, ids: List[str]) -> Dict[str, Optional[Dict]]:
+        documents = {doc_id: None for doc_id in ids}
+        unique_ids = list(documents)
+        for start in range(0, len(unique_ids), self.MAX_SQL_VARIABLES):
+            chunk = unique_ids[start:start + self.MAX_SQL_VARIABLES]
+            rows = db.execute(f"SELECT claim_id, data FROM {table} WHERE claim_id IN ({','.join('?' * len(chunk))})",
+                              chunk).fetchall()
+            for claim_id, data in rows:
+                documents[claim_id] = json.loads(data)
+        return documents
+
+    @classmethod
+    def _finite(cls, value):
+        if isinstance(value, float) and not math.isfinite(value):
+            return None
+        if isinstance(value, dict):
+            return {key: cls._finite(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [cls._finite(item) for item in value]
+        return value
+
+    @classmethod
+    def _dumps(cls, document: Dict) -> str:
+        """JSON with NaN/inf stored as null: SQLite's json functions (and the updated_at index) reject them"""
+        return json.dumps(cls._finite(document), default=str)
+
+    def save_claim(self, claim_data: ClaimData) -> bool:
+        """Save claim data"""
+        try:
+            with self._transaction() as db:
+                db.execute("INSERT OR REPLACE INTO claims (claim_id, policy_number, data) VALUES (?, ?, ?)",
+                           (claim_data.claim_id, str(claim_data.policy_number),
+                            self._dumps(asdict(claim_data))))
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error saving claim: {str(e)}")
+            return False
+
+    def save_analysis_results(self, results: List[FraudAnalysisResult]) -> Dict[str, bool]:
+        """Save analysis results and apply their dashboard summary delta in one transaction"""
+        saved = {result.claim_id: False for result in results}
+        try:
+            with self._transaction() as db:
+                previous = self._fetch_by_ids(db, 'fraud_analyses', [result.claim_id for result in results])
+                summary_delta: Dict[str, float] = {}
+                rows = []
+                for result in results:
+                    result_dict = asdict(result)
+                    delta = self._summary_delta(previous.get(result.claim_id), result_dict)
+                    previous[result.claim_id] = result_dict
+                    for field, value in delta.items():
+                        summary_delta[field] = summary_delta.get(field, 0) + value
+                    rows.append((result.claim_id, result.combined_score, self._dumps(result_dict)))
+
+                db.executemany("INSERT OR REPLACE INTO fraud_analyses (claim_id, combined_score, data) "
+                               "VALUES (?, ?, ?)", rows)
+                db.executemany("INSERT INTO dashboard_summary (field, value) VALUES (?, ?) "
+                               "ON CONFLICT(field) DO UPDATE SET value = value + excluded.value",
+                               list(summary_delta.items()))
+            for result in results:
+                saved[result.claim_id] = True
+        except Exception as e:
+            logger.error(f"❌ Error saving analysis result: {str(e)}")
+        return saved
+
+    def get_claims(self, claim_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """Retrieve many claims at once (claim_id -> data, None when missing)"""
+        try:
+            with self._lock:
+                return self._fetch_by_ids(self._db, 'claims', claim_ids)
+        except Exception as e:
+            logger.error(f"❌ Error retrieving claims: {str(e)}")
+            return {}
+
+    def get_analysis_results(self, claim_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """Retrieve many analysis results at once (claim_id -> data, None when missing)"""
+        try:
+            with self._lock:
+                return self._fetch_by_ids(self._db, 'fraud_analyses', claim_ids)
+        except Exception as e:
+            logger.error(f"❌ Error retrieving analysis results: {str(e)}")
+            return {}
+
+    def get_claims_by_policy_page(self, policy_number: str, page_size: int = 100,
+                                  cursor: Optional[List] = None) -> tuple:
+        """One page of a policy's claims ordered by claim ID; returns (claims, next_cursor)"""
+        sql = "SELECT claim_id, data FROM claims WHERE policy_number = ?"
+        params: List = [str(policy_number)]
+        if cursor is not None:
+            sql += " AND claim_id > ?"
+            params.append(cursor[0])
+        sql += " ORDER BY claim_id LIMIT ?"
+        with self._lock:
+            rows = self._db.execute(sql, params + [page_size]).fetchall()
+        next_cursor = [rows[-1][0]] if len(rows) == page_size else None
+        return [json.loads(data) for _, data in rows], next_cursor
+
+    def get_claims_by_policies(self, policy_numbers: List[str]) -> Dict[str, List[Dict]]:
+        """All claims of many policies with one IN query per MAX_SQL_VARIABLES policies"""
+        policy_keys = list(dict.fromkeys(str(policy_number) for policy_number in policy_numbers))
+        claims = {policy_key: [] for policy_key in policy_keys}
+        try:
+            with self._lock:
+                for start in range(0, len(policy_keys), self.MAX_SQL_VARIABLES):
+                    chunk = policy_keys[start:start + self.MAX_SQL_VARIABLES]
+                    rows = self._db.execute(
+                        f"SELECT policy_number, data FROM claims WHERE policy_number IN ({','.join('?' * len(chunk))}) "
+                        "ORDER BY policy_number, claim_id", chunk).fetchall()
+                    for policy_key, data in rows:
+                        claims[policy_key].append(json.loads(data))
+        except Exception as e:
+            logger.error(f"❌ Error retrieving claims by policy: {str(e)}")
+        return claims
+
+    def get_high_risk_claims_page(self, threshold: float = 70.0, page_size: int = 50,
+                                  cursor: Optional[List] = None) -> tuple:
+        """One page of analyses above threshold, highest combined_score first; returns (analyses, next_cursor)"""
+        sql = "SELECT combined_score, claim_id, data FROM fraud_analyses WHERE combined_score >= ?"
+        params: List = [threshold]
+        if cursor is not None:
+            sql += " AND (combined_score < ? OR (combined_score = ? AND claim_id < ?))"
+            params += [cursor[0], cursor[0], cursor[1]]
+        sql += " ORDER BY combined_score DESC, claim_id DESC LIMIT ?"
+        with self._lock:
+            rows = self._db.execute(sql, params + [page_size]).fetchall()
+        next_cursor = [rows[-1][0], rows[-1][1]] if len(rows) == page_size else None
+        return [json.loads(data) for _, _, data in rows], next_cursor
+
+    def get_claims_updated_page(self, updated_since: Optional[str] = None, page_size: int = 500,
+                                cursor: Optional[List] = None) -> tuple:
+        """One page of claims updated after updated_since, oldest update first; returns (claims, next_cursor)"""
+        sql = f"SELECT {self.UPDATED_AT}, claim_id, data FROM claims WHERE {self.UPDATED_AT} > ?"
+        params: List = [updated_since or ""]
+        if cursor is not None:
+            sql += f" AND ({self.UPDATED_AT} > ? OR ({self.UPDATED_AT} = ? AND claim_id > ?))"
+            params += [cursor[0], cursor[0], cursor[1]]
+        sql += f" ORDER BY {self.UPDATED_AT}, claim_id LIMIT ?"
+        with self._lock:
+            rows = self._db.execute(sql, params + [page_size]).fetchall()
+        next_cursor = [rows[-1][0], rows[-1][1]] if len(rows) == page_size else None
+        return [json.loads(data) for _, _, data in rows], next_cursor
+
+    def get_dashboard_summary(self) -> Dict:
+        """Read the incrementally maintained dashboard summary"""
+        summary = {"total_analyses": 0, "high_risk_count": 0, "amount_at_risk": 0.0,
+                   "risk_level_counts": {}, "action_counts": {}}
+        try:
+            with self._lock:
+                rows = self._db.execute("SELECT field, value FROM dashboard_summary").fetchall()
+        except Exception as e:
+            logger.error(f"❌ Error retrieving dashboard summary: {str(e)}")
+            return summary
+        for field, value in rows:
+            if "." in field:
+                group, key = field.split(".", 1)
+                if value:
+                    summary.setdefault(group, {})[key] = int(value)
+            else:
+                summary[field] = value if field == "amount_at_risk" else int(value)
+        return summary
+
+    def rebuild_dashboard_summary(self) -> Dict:
+        """Recompute the summary from every stored analysis (one-off backfill)"""
+        with self._transaction() as db:
+            totals: Dict[str, float] = {}
+            for (data,) in db.execute("SELECT data FROM fraud_analyses"):
+                for field, value in self._summary_contribution(json.loads(data)).items():
+                    totals[field] = totals.get(field, 0) + value
+            db.execute("DELETE FROM dashboard_summary")
+            db.executemany("INSERT INTO dashboard_summary (field, value) VALUES (?, ?)", list(totals.items()))
+        logger.info(f"✅ Dashboard summary rebuilt from {int(totals.get('total_analyses', 0))} analyses")
+        return self.get_dashboard_summary()
+
+    def update_claim_status(self, claim_id: str, status: str) -> bool:
+        """Update claim status (e.g., 'approved', 'rejected', 'under_investigation')"""
+        try:
+            with self._transaction() as db:
+                cursor = db.execute("UPDATE claims SET data = json_set(data, '$.status', ?, '$.updated_at', ?) "
+                                    "WHERE claim_id = ?", (status, datetime.now().isoformat(), claim_id))
+            if cursor.rowcount == 0:
+                raise KeyError(f"No claim {claim_id}")
+            logger.info(f"✅ Claim status updated: {claim_id} -> {status}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error updating claim status: {str(e)}")
+            return False
+
+    def close(self) -> Dict:
+        with self._lock:
+            if self._connection is not None and self._connection_pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+        return {"written": 0, "failed": []}
+
+
+STORAGE_BACKENDS = ("firestore", "sqlite", "memory")
+
+
+def create_storage_backend(backend: Optional[str] = None, write_behind: Optional[bool] = None) -> StorageBackend:
+    """Storage backend named by STORAGE_BACKEND (firestore, sqlite or memory)"""
+    backend = (backend or os.getenv("STORAGE_BACKEND", "firestore")).lower()
+    if backend == "firestore":
+        return FirebaseManager(write_behind=write_behind)
+    if backend == "sqlite":
+        return SQLiteStorage(os.getenv("SQLITE_STORAGE_PATH", "data/fraud_detection.sqlite"))
+    if backend == "memory":
+        return SQLiteStorage(":memory:")
+    raise ValueError(f"Unknown storage backend: {backend} (expected one of {', '.join(STORAGE_BACKENDS)})")
@@ -0,0 +1,100 @@
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from .claims import ClaimData
+from .system import ImprovedFraudDetectionSystem
+
+# =====================================================
+# SYNTHETIC CLAIMS
+# =====================================================
+
+class SyntheticClaimGenerator:
+    """Reproducible synthetic claims in the ClaimData schema.
+
+    Categorical values follow the training data's vocabulary and numeric
+    fields its ranges, so every pipeline stage does representative work.
+    """
+
+    CATEGORIES = {
+        "policy_state": ["OH", "IN", "IL"],
+        "policy_csl": ["100/300", "250/500", "500/1000"],
+        "insured_sex": ["MALE", "FEMALE"],
+        "insured_education_level": ["MD", "PhD", "Associate", "Masters", "High School", "College", "JD"],
+        "insured_occupation": ["craft-repair", "machine-op-inspct", "sales", "armed-forces", "tech-support",
+                               "prof-specialty", "other-service", "priv-house-serv", "exec-managerial",
+                               "protective-serv", "transport-moving", "handlers-cleaners", "adm-clerical",
+                               "farming-fishing"],
+        "insured_hobbies": ["sleeping", "reading", "board-games", "bungie-jumping", "base-jumping", "golf",
+                            "camping", "dancing", "skydiving", "movies", "hiking", "yachting", "paintball",
+                            "chess", "kayaking", "polo", "basketball", "video-games", "cross-fit", "exercise"],
+        "insured_relationship": ["husband", "other-relative", "own-child", "unmarried", "wife", "not-in-family"],
+        "incident_type": ["Single Vehicle Collision", "Vehicle Theft", "Multi-vehicle Collision", "Parked Car"],
+        "collision_type": ["Side Collision", "Rear Collision", "Front Collision", "?"],
+        "incident_severity": ["Major Damage", "Minor Damage", "Total Loss", "Trivial Damage"],
+        "authorities_contacted": ["Police", "None", "Fire", "Other", "Ambulance"],
+        "incident_state": ["SC", "VA", "NY", "OH", "WV", "NC", "PA"],
+        "incident_city": ["Columbus", "Riverwood", "Arlington", "Springfield", "Hillsdale", "Northbend",
+                          "Northbrook"],
+        "property_damage": ["YES", "NO", "?"],
+        "police_report_available": ["YES", "NO", "?"],
+    }
+    AUTO_MODELS = {
+        "Saab": ["92x", "93", "95"], "Mercedes": ["C300", "E400", "ML350"], "Dodge": ["RAM", "Neon"],
+        "Chevrolet": ["Tahoe", "Malibu", "Silverado"], "Accura": ["RSX", "MDX", "TL"],
+        "Nissan": ["Pathfinder", "Maxima", "Ultima"], "Audi": ["A5", "A3"],
+        "Toyota": ["Camry", "Corolla", "Highlander"], "Ford": ["F150", "Escape", "Fusion"],
+        "Suburu": ["Forrestor", "Impreza", "Legacy"], "BMW": ["X5", "X6", "3 Series"],
+        "Jeep": ["Wrangler", "Grand Cherokee"], "Volkswagen": ["Passat", "Jetta"], "Honda": ["Civic", "Accord", "CRV"],
+    }
+
+    def __init__(self, seed: int = 42, policy_count: int = 100000):
+        self.seed = seed
+        self.policy_count = policy_count
+
+    def dataframe(self, n: int) -> pd.DataFrame:
+        """n synthetic claims as a DataFrame with ClaimData columns"""
+        rng = np.random.default_rng([self.seed, n])
+        make_models = [(make, model) for make, models in self.AUTO_MODELS.items() for model in models]
+        autos = [make_models[i] for i in rng.integers(0, len(make_models), n)]
+        bind_dates = pd.Timestamp("1990-01-01") + pd.to_timedelta(rng.integers(0, 9000, n), unit="D")
+        incident_dates = pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 60, n), unit="D")
+        injury, property_, vehicle = (rng.integers(0, 20000, n).astype(float),
+                                      rng.integers(0, 20000, n).astype(float),
+                                      rng.integers(1000, 60000, n).astype(float))
+
+        claims_df = pd.DataFrame({
+            # Rows depend on (seed, n), so both go in the ID and other runs never overwrite these claims
+            "claim_id": [f"BENCH_{self.seed}_{n}_{i:08d}" for i in range(n)],
+            "months_as_customer": rng.integers(0, 480, n),
+            "age": rng.integers(19, 65, n),
+            "policy_number": rng.integers(100000, 100000 + self.policy_count, n),
+            "policy_bind_date": bind_dates.strftime("%Y-%m-%d"),
+            "policy_deductable": rng.choice([500.0, 1000.0, 2000.0], n),
+            "policy_annual_premium": rng.normal(1250, 250, n).round(2),
+            "umbrella_limit": rng.choice([0.0, 0.0, 0.0, 0.0, 5000000.0, 6000000.0], n),
+            "insured_zip": rng.integers(430000, 620000, n),
+            "capital_gains": rng.choice([0.0, 0.0, 35000.0, 50000.0], n),
+            "capital_loss": rng.choice([0.0, 0.0, -35000.0, -50000.0], n),
+            "incident_date": incident_dates.strftime("%Y-%m-%d"),
+            "incident_location": [f"{number} Main St" for number in rng.integers(1, 9999, n)],
+            "incident_hour_of_the_day": rng.integers(0, 24, n),
+            "number_of_vehicles_involved": rng.integers(1, 5, n),
+            "bodily_injuries": rng.integers(0, 3, n),
+            "witnesses": rng.integers(0, 4, n),
+            "total_claim_amount": injury + property_ + vehicle,
+            "injury_claim": injury,
+            "property_claim": property_,
+            "vehicle_claim": vehicle,
+            "auto_make": [make for make, _ in autos],
+            "auto_model": [model for _, model in autos],
+            "auto_year": rng.integers(1995, 2016, n),
+        })
+        for column, values in self.CATEGORIES.items():
+            claims_df[column] = np.asarray(values, dtype=object)[rng.integers(0, len(values), n)]
+        return claims_df
+
+    def claims(self, n: int) -> List[ClaimData]:
+        """n synthetic claims as ClaimData objects"""
+        return ImprovedFraudDetectionSystem.claims_from_dataframe(self.dataframe(n))
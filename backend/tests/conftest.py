@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+import pytest
+
+from fraud import ClaimData, ImprovedFraudDetectionSystem, SQLiteStorage
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def backend_env(monkeypatch, tmp_path):
+    """Run from backend/ (models are relative paths) with no external services"""
+    monkeypatch.chdir(BACKEND_DIR)
+    monkeypatch.delenv("PERPLEXITY_API_KEY", raising=False)
+    monkeypatch.setenv("AI_CACHE_ENABLED", "false")
+    monkeypatch.setenv("DUPLICATE_INDEX_PATH", "")
+    monkeypatch.setenv("STORAGE_BACKEND", "sqlite")
+    monkeypatch.setenv("SQLITE_STORAGE_PATH", str(tmp_path / "claims.sqlite"))
+    monkeypatch.setenv("FAST_PATH_ENABLED", "false")
+
+
+@pytest.fixture
+def system():
+    system = ImprovedFraudDetectionSystem(storage=SQLiteStorage(":memory:"))
+    yield system
+    system.close()
+
+
+@pytest.fixture
+def claims():
+    """Factory for reproducible, varied claims with optional field overrides"""
+    def make(n: int = 1, seed: int = 7, **overrides):
+        rng = np.random.default_rng(seed)
+        batch = []
+        for i in range(n):
+            injury, property_damage, vehicle = (float(x) for x in rng.integers(0, 40, 3) * 500)
+            fields = dict(
+                claim_id=f"T{seed}_{i:05d}", policy_number=int(rng.integers(100000, 999999)),
+                months_as_customer=int(rng.integers(0, 480)), age=int(rng.integers(19, 65)),
+                policy_state=str(rng.choice(["OH", "IN", "IL"])),
+                incident_state=str(rng.choice(["OH", "IN", "IL", "NY", "SC", "WV"])),
+                incident_hour_of_the_day=int(rng.integers(0, 24)), witnesses=int(rng.integers(0, 4)),
+                police_report_available=str(rng.choice(["YES", "NO", "?"])),
+                incident_type=str(rng.choice(["Parked Car", "Single Vehicle Collision", "Vehicle Theft"])),
+                incident_severity=str(rng.choice(["Minor Damage", "Major Damage", "Total Loss"])),
+                injury_claim=injury, property_claim=property_damage, vehicle_claim=vehicle,
+                total_claim_amount=injury + property_damage + vehicle, auto_year=int(rng.integers(1995, 2016)),
+            )
+            fields.update(overrides)
+            batch.append(_make_claim(**fields))
+        return batch
+    return make
+
+
+@pytest.fixture
+def make_claim():
+    """Factory for a hand-written claim; overrides replace individual fields"""
+    return _make_claim
+
+
+def _make_claim(**overrides) -> ClaimData:
+    fields = dict(
+        claim_id="CLM-1", months_as_customer=12, age=28, policy_number="302003", policy_bind_date="2023-01-10",
+        policy_state="OH", policy_csl="250/500", policy_deductable=500.0, policy_annual_premium=2000.0,
+        umbrella_limit=0.0, insured_zip=43001, insured_sex="MALE", insured_education_level="College",
+        insured_occupation="sales", insured_hobbies="golf", insured_relationship="husband", capital_gains=0.0,
+        capital_loss=0.0, incident_date="2024-09-01", incident_type="Parked Car", collision_type="Front Collision",
+        incident_severity="Minor Damage", authorities_contacted="Police", incident_state="OH",
+        incident_city="Columbus", incident_location="1234 Main St", incident_hour_of_the_day=10,
+        number_of_vehicles_involved=1, property_damage="NO", bodily_injuries=0, witnesses=1,
+        police_report_available="YES", total_claim_amount=5000.0, injury_claim=0.0, property_claim=1000.0,
+        vehicle_claim=4000.0, auto_make="Toyota", auto_model="Camry", auto_year=2020,
+    )
+    fields.update(overrides)
+    return ClaimData(**fields)
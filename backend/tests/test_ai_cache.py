@@ -0,0 +1,88 @@
+from dataclasses import asdict, replace
+
+import pytest
+
+from fraud import AIResponseCache, StubAIClient
+
+EVIDENCE = {"rule_based_score": 45.0, "catboost_probability": 0.2, "combined_score": 35.0}
+
+
+def key(claim_details, evidence=EVIDENCE, model="sonar", prompt_version="2"):
+    return AIResponseCache.make_key(model, prompt_version, claim_details, evidence)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() as seen by the cache"""
+    now = [1_000_000.0]
+    monkeypatch.setattr("fraud.ai.time.time", lambda: now[0])
+    return now
+
+
+def test_key_ignores_submission_timestamps_and_duplicate_matches(make_claim):
+    claim = asdict(make_claim())
+    resubmitted = {**claim, "created_at": "2030-01-01T00:00:00", "updated_at": "2030-01-02T00:00:00"}
+    matched = {**EVIDENCE, "duplicate_matches": [{"claim_id": claim["claim_id"], "match": "resubmission"}]}
+
+    assert key(claim) == key(resubmitted) == key(claim, matched)
+
+
+def test_key_changes_with_the_request(make_claim):
+    claim = asdict(make_claim())
+    baseline = key(claim)
+
+    assert key({**claim, "total_claim_amount": 5001.0}) != baseline
+    assert key(claim, {**EVIDENCE, "combined_score": 36.0}) != baseline
+    assert key(claim, model="sonar-pro") != baseline
+    assert key(claim, prompt_version="3") != baseline
+
+
+def test_key_is_independent_of_field_order(make_claim):
+    claim = asdict(make_claim())
+
+    assert key(dict(reversed(list(claim.items())))) == key(claim)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = AIResponseCache(ttl_seconds=60)
+    cache.put("k", {"fraud_score": 10})
+
+    clock[0] += 60
+    assert cache.get("k") == {"fraud_score": 10}
+    clock[0] += 1
+    assert cache.get("k") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_disk_tier_survives_restart_and_expires(tmp_path, clock):
+    path = str(tmp_path / "ai.sqlite")
+    AIResponseCache(db_path=path, ttl_seconds=60).put("k", {"fraud_score": 10})
+
+    restarted = AIResponseCache(db_path=path, ttl_seconds=60)
+    assert restarted.get("k") == {"fraud_score": 10}
+    assert restarted.disk_hits == 1
+
+    clock[0] += 61
+    assert AIResponseCache(db_path=path, ttl_seconds=60).get("k") is None
+
+
+def test_memory_tier_is_bounded():
+    cache = AIResponseCache(max_memory_entries=2)
+    for name in ("a", "b", "c"):
+        cache.put(name, {"name": name})
+
+    assert cache.get("a") is None
+    assert cache.get("c") == {"name": "c"}
+
+
+def test_resubmitted_claim_reuses_the_ai_response(system, claims):
+    system.ai_client = StubAIClient()
+    system.ai_cache = AIResponseCache()
+    claim = claims(1)[0]
+
+    first = system.process_claims_batch([claim], use_ai=True)[0]
+    second = system.process_claims_batch([replace(claim, updated_at="2030-01-01T00:00:00")], use_ai=True)[0]
+
+    assert system.ai_client.calls == 1
+    assert system.ai_cache.memory_hits == 1
+    assert second.ai_fraud_score == first.ai_fraud_score
@@ -0,0 +1,124 @@
+import json
+import time
+
+import pytest
+import requests
+
+from fraud import CircuitBreaker, CircuitOpenError, PerplexityClient
+
+
+def response(status: int, body=None, headers=None) -> requests.Response:
+    result = requests.Response()
+    result.status_code = status
+    result._content = json.dumps(body if body is not None else {}).encode()
+    result.headers.update(headers or {})
+    result.url = "https://api.test/chat/completions"
+    return result
+
+
+class StubSession:
+    """Replays scripted responses (or raises scripted exceptions) for session.post"""
+
+    def __init__(self, *outcomes, delay: float = 0.0):
+        self.outcomes = list(outcomes)
+        self.delay = delay
+        self.timeouts = []
+
+    @property
+    def calls(self) -> int:
+        return len(self.timeouts)
+
+    def post(self, url, json=None, timeout=None):
+        self.timeouts.append(timeout)
+        if self.delay:
+            time.sleep(self.delay)
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def client(*outcomes, delay: float = 0.0, **options) -> PerplexityClient:
+    options = {"base_url": "https://api.test", "backoff_base": 0.001, "backoff_max": 0.01, **options}
+    ai_client = PerplexityClient("key", **options)
+    ai_client._session = StubSession(*outcomes, delay=delay)
+    return ai_client
+
+
+OK = {"choices": [{"message": {"content": "{}"}}]}
+
+
+@pytest.mark.parametrize("failure", [
+    response(429, headers={"Retry-After": "0"}),
+    response(500),
+    response(503),
+    requests.ConnectionError("connection reset"),
+    requests.Timeout("read timed out"),
+])
+def test_retries_transient_failures(failure):
+    ai_client = client(failure, response(200, OK))
+
+    assert ai_client.chat_completion({}) == OK
+    assert ai_client._session.calls == 2
+    assert ai_client.circuit_breaker.consecutive_failures == 0
+
+
+@pytest.mark.parametrize("status", [400, 401, 404, 422])
+def test_does_not_retry_client_errors(status):
+    ai_client = client(response(status), response(200, OK))
+
+    with pytest.raises(requests.HTTPError):
+        ai_client.chat_completion({})
+    assert ai_client._session.calls == 1
+
+
+def test_gives_up_after_max_retries():
+    ai_client = client(response(502), max_retries=2)
+
+    with pytest.raises(requests.HTTPError, match="502"):
+        ai_client.chat_completion({})
+    assert ai_client._session.calls == 3
+
+
+def test_breaker_opens_and_closes_after_a_successful_trial():
+    ai_client = client(response(500), response(500), response(200, OK), max_retries=0,
+                       circuit_breaker=CircuitBreaker(failure_threshold=2, reset_timeout=0.05))
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            ai_client.chat_completion({})
+
+    assert ai_client.circuit_breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        ai_client.chat_completion({})
+    assert ai_client._session.calls == 2
+
+    time.sleep(0.06)
+    assert ai_client.circuit_breaker.state == "half_open"
+    assert ai_client.chat_completion({}) == OK
+    assert ai_client.circuit_breaker.state == "closed"
+
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    ai_client = client(response(500), max_retries=0, circuit_breaker=breaker)
+    with pytest.raises(requests.HTTPError):
+        ai_client.chat_completion({})
+
+    time.sleep(0.06)
+    with pytest.raises(requests.HTTPError):
+        ai_client.chat_completion({})
+    assert breaker.state == "open"
+    assert ai_client._session.calls == 2
+
+
+def test_retries_stop_within_the_overall_deadline():
+    # Each attempt takes 0.3s and may need up to 1.5s: after the second one no retry fits in 2s
+    ai_client = client(response(503), delay=0.3, connect_timeout=0.5, read_timeout=1.0, total_timeout=2.0,
+                       max_retries=10)
+    started = time.monotonic()
+
+    with pytest.raises(requests.HTTPError):
+        ai_client.chat_completion({})
+    assert ai_client._session.calls == 2
+    assert time.monotonic() - started < 2.0
+    assert all(connect <= 0.5 and read <= 1.0 for connect, read in ai_client._session.timeouts)
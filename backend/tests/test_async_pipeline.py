@@ -0,0 +1,57 @@
+import asyncio
+import threading
+
+from fraud import StubAIClient
+
+
+class ConcurrencyTrackingAIClient(StubAIClient):
+    """StubAIClient that records how many calls were in flight at once"""
+
+    def __init__(self, latency_ms: float = 30.0):
+        super().__init__(latency_ms)
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def chat_completion(self, payload):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            return super().chat_completion(payload)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def test_semaphore_caps_concurrent_ai_calls(system, claims):
+    system.ai_client = ConcurrencyTrackingAIClient()
+    system.ai_max_concurrency = 3
+
+    results = asyncio.run(system.process_claims_async(claims(12)))
+
+    assert system.ai_client.calls == 12
+    assert system.ai_client.peak == 3
+    assert all(result.error is None and result.decision_tier == "ai" for result in results)
+
+
+def test_failing_claims_do_not_affect_the_rest(system, claims, monkeypatch):
+    batch = claims(6)
+    batch[1].age = "not a number"
+    failing = batch[4].claim_id
+    save = system.storage.save_analysis_result
+
+    def flaky_save(result):
+        if result.claim_id == failing:
+            raise RuntimeError("storage unavailable")
+        return save(result)
+
+    monkeypatch.setattr(system.storage, "save_analysis_result", flaky_save)
+    results = asyncio.run(system.process_claims_async(batch, use_ai=False))
+
+    assert [result.claim_id for result in results] == [claim.claim_id for claim in batch]
+    assert results[1].error.startswith("CatBoost prediction failed")
+    assert results[4].error == "storage unavailable"
+    healthy = [claim.claim_id for i, claim in enumerate(batch) if i not in (1, 4)]
+    assert all(results[i].error is None for i in (0, 2, 3, 5))
+    assert all(system.storage.get_analysis_results(healthy).values())
@@ -0,0 +1,79 @@
+from dataclasses import asdict
+
+import pandas as pd
+
+from fraud import FraudAnalysisResult
+
+
+def test_results_follow_input_order(system, claims):
+    batch = claims(12)
+    batch.reverse()
+
+    results = system.process_claims_batch(batch, use_ai=False)
+
+    assert [result.claim_id for result in results] == [claim.claim_id for claim in batch]
+    assert all(isinstance(result, FraudAnalysisResult) and result.error is None for result in results)
+
+
+def test_dataframe_input_keeps_row_order(system, claims):
+    batch = claims(6)
+    claims_df = pd.DataFrame([asdict(claim) for claim in batch]).iloc[::-1]
+
+    results = system.process_claims_batch(claims_df, use_ai=False)
+
+    assert [result.claim_id for result in results] == list(claims_df["claim_id"])
+
+
+def test_batch_scores_match_single_claims(system, claims):
+    batch = claims(5)
+
+    batched = system.process_claims_batch(batch, use_ai=False)
+    single = [system.process_claims_batch([claim], use_ai=False)[0] for claim in batch]
+
+    for batch_result, single_result in zip(batched, single):
+        assert batch_result.rule_based_score == single_result.rule_based_score
+        assert abs(batch_result.catboost_probability - single_result.catboost_probability) < 1e-9
+
+
+def test_malformed_claim_only_fails_its_own_result(system, claims):
+    batch = claims(5)
+    batch[2].age = "not a number"
+
+    results = system.process_claims_batch(batch, use_ai=False)
+
+    assert [result.claim_id for result in results] == [claim.claim_id for claim in batch]
+    assert results[2].error.startswith("CatBoost prediction failed")
+    assert results[2].action == "escalate_investigation"
+    assert all(result.error is None for i, result in enumerate(results) if i != 2)
+
+
+def test_unconvertible_row_keeps_its_position(system, claims):
+    valid = claims(3)
+    batch = [valid[0], TypeError("missing 1 required positional argument: 'age'"), *valid[1:]]
+
+    results = system.process_claims_batch(batch, use_ai=False)
+
+    assert results[1].claim_id == "ROW_1" and results[1].error is not None
+    assert [results[0].claim_id, results[2].claim_id, results[3].claim_id] == [claim.claim_id for claim in valid]
+
+
+def test_analysis_failure_is_isolated_and_others_are_saved(system, claims, monkeypatch):
+    batch = claims(6)
+    failing = batch[3].claim_id
+    analyze = system._analyze_scored_claim
+
+    def flaky(claim_dict, *args, **kwargs):
+        if claim_dict["claim_id"] == failing:
+            raise RuntimeError("analysis exploded")
+        return analyze(claim_dict, *args, **kwargs)
+
+    monkeypatch.setattr(system, "_analyze_scored_claim", flaky)
+    results = system.process_claims_batch(batch, use_ai=False)
+
+    assert [result.claim_id for result in results] == [claim.claim_id for claim in batch]
+    assert results[3].error == "analysis exploded"
+    assert all(result.error is None for i, result in enumerate(results) if i != 3)
+
+    stored = system.storage.get_analysis_results([claim.claim_id for claim in batch])
+    assert stored[failing] is None
+    assert all(stored[claim.claim_id] is not None for i, claim in enumerate(batch) if i != 3)
@@ -0,0 +1,45 @@
+import pytest
+
+from fraud import PipelineBenchmark, SyntheticClaimGenerator
+
+
+def report(**cases):
+    return {"results": {case: {"p50_ms": p50, "peak_memory_mb": memory} for case, (p50, memory) in cases.items()}}
+
+
+BASELINE = report(score_100=(10.0, 5.0), score_1000=(80.0, 40.0), rules_1=(0.2, 0.1))
+
+
+def test_compare_flags_latency_and_memory_regressions():
+    current = report(score_100=(12.5, 5.0), score_1000=(80.0, 60.0), rules_1=(0.2, 0.1))
+
+    regressions = PipelineBenchmark.compare(current, BASELINE, threshold=0.2)
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith("score_100 p50_ms: 10.0 -> 12.5 (+25%)")
+    assert regressions[1].startswith("score_1000 peak_memory_mb: 40.0 -> 60.0 (+50%)")
+
+
+@pytest.mark.parametrize("current", [
+    report(score_100=(11.9, 5.9), score_1000=(95.0, 47.0), rules_1=(0.2, 0.1)),  # within the threshold
+    report(score_100=(10.0, 5.0), score_1000=(80.0, 40.0), rules_1=(0.6, 0.5)),  # +200%, but under 0.5 ms / MB
+    report(score_100=(8.0, 4.0), score_1000=(60.0, 30.0), rules_1=(0.1, 0.1)),   # faster
+])
+def test_compare_ignores_noise_and_improvements(current):
+    assert PipelineBenchmark.compare(current, BASELINE, threshold=0.2) == []
+
+
+def test_compare_skips_cases_missing_from_the_baseline():
+    current = report(score_100=(10.0, 5.0), score_10000=(900.0, 400.0))
+
+    assert PipelineBenchmark.compare(current, BASELINE) == []
+    assert PipelineBenchmark.compare(current, {}) == []
+
+
+def test_synthetic_claim_ids_are_unique_per_seed_and_size():
+    first = SyntheticClaimGenerator(seed=1).dataframe(5)
+
+    assert first.equals(SyntheticClaimGenerator(seed=1).dataframe(5))
+    assert first["claim_id"].is_unique
+    assert not set(first["claim_id"]) & set(SyntheticClaimGenerator(seed=2).dataframe(5)["claim_id"])
+    assert not set(first["claim_id"]) & set(SyntheticClaimGenerator(seed=1).dataframe(10)["claim_id"])
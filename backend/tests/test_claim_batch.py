@@ -0,0 +1,76 @@
+from dataclasses import asdict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fraud import ClaimBatch
+
+
+@pytest.fixture
+def sample(claims):
+    batch = claims(6)
+    batch[1].authorities_contacted = None  # missing text field
+    batch[2].umbrella_limit = None  # missing numeric field
+    batch[3].incident_type = float("nan")
+    return batch
+
+
+def records(claims, without=("updated_at",)):
+    return [{key: value for key, value in asdict(claim).items() if key not in without} for claim in claims]
+
+
+def test_dataframe_matches_the_claims(sample):
+    claims_df = ClaimBatch.from_claims(sample).to_dataframe()
+    expected = pd.DataFrame([asdict(claim) for claim in sample])
+
+    assert list(claims_df.columns) == list(expected.columns)
+    assert claims_df["umbrella_limit"].dtype == np.float64
+    assert isinstance(claims_df["incident_type"].dtype, pd.CategoricalDtype)
+    for name in expected.columns:
+        actual, wanted = claims_df[name].astype(object), expected[name].astype(object)
+        assert actual.isna().tolist() == wanted.isna().tolist(), name
+        assert actual.dropna().tolist() == wanted.dropna().tolist(), name
+    assert claims_df["authorities_contacted"].isna().tolist() == [False, True, False, False, False, False]
+    assert claims_df["umbrella_limit"].isna().tolist() == [False, False, True, False, False, False]
+
+
+def test_round_trip_through_dataframe(sample):
+    batch = ClaimBatch.from_claims(sample)
+
+    again = ClaimBatch.from_dataframe(batch.to_dataframe())
+
+    assert records(again.to_claims()) == records(batch.to_claims())
+    assert [claim.claim_id for claim in again.to_claims()] == [claim.claim_id for claim in sample]
+
+
+def test_round_trip_back_to_claims_keeps_values_and_missing_fields(sample):
+    restored = ClaimBatch.from_claims(sample).to_claims()
+
+    expected = records(sample)
+    expected[3]["incident_type"] = None  # NaN comes back as None like every other missing value
+    assert records(restored) == expected
+    assert isinstance(restored[0].witnesses, int) and isinstance(restored[0].total_claim_amount, float)
+    assert restored[1].authorities_contacted is None and restored[2].umbrella_limit is None
+
+
+def test_round_trip_through_arrow(sample):
+    batch = ClaimBatch.from_claims(sample)
+
+    assert records(ClaimBatch.from_arrow(batch.to_arrow()).to_claims()) == records(batch.to_claims())
+
+
+def test_dataframe_without_defaulted_fields_gets_claimdata_ids(sample):
+    claims_df = pd.DataFrame(records(sample, without=("claim_id", "fraud_reported", "created_at", "updated_at")))
+
+    batch = ClaimBatch.from_dataframe(claims_df)
+
+    assert list(batch["claim_id"]) == [claim.generate_claim_id() for claim in sample]
+    assert list(batch["fraud_reported"]) == ["N"] * len(sample)
+
+
+def test_missing_required_field_is_rejected(sample):
+    claims_df = ClaimBatch.from_claims(sample).to_dataframe().drop(columns=["age"])
+
+    with pytest.raises(ValueError, match="age"):
+        ClaimBatch.from_dataframe(claims_df)
@@ -0,0 +1,91 @@
+from dataclasses import asdict
+
+import pytest
+
+from fraud import DuplicateClaimIndex
+
+
+@pytest.fixture
+def index():
+    return DuplicateClaimIndex()
+
+
+@pytest.fixture
+def original(make_claim):
+    return asdict(make_claim(claim_id="ORIG", total_claim_amount=42000.0, vehicle_claim=32000.0,
+                             property_claim=6000.0, injury_claim=4000.0, incident_hour_of_the_day=14))
+
+
+def test_same_claim_id_is_a_resubmission(index, original):
+    assert index.check(original) == []
+
+    matches = index.check({**original, "incident_hour_of_the_day": 3})
+
+    assert [(m["claim_id"], m["match"]) for m in matches] == [("ORIG", "resubmission")]
+
+
+def test_same_incident_with_new_id_and_amount_is_an_exact_match(index, original):
+    index.add(original)
+
+    matches = index.check({**original, "claim_id": "NEW", "total_claim_amount": 61000.0})
+
+    assert matches[0]["claim_id"] == "ORIG" and matches[0]["match"] == "exact"
+    assert matches[0]["total_claim_amount"] == 42000.0
+    assert "amount 61,000 vs 42,000" in DuplicateClaimIndex.describe(matches[0], 61000.0)
+
+
+def test_small_edits_are_near_matches(index, original):
+    index.add(original)
+
+    edited = {**original, "claim_id": "EDIT", "incident_location": "1236 Main St",
+              "total_claim_amount": 42500.0, "vehicle_claim": 32500.0}
+    matches = index.check(edited)
+
+    assert [(m["claim_id"], m["match"]) for m in matches] == [("ORIG", "near")]
+    assert index.threshold <= matches[0]["similarity"] < 1.0
+
+
+def test_unrelated_claims_do_not_match(index, original, claims):
+    index.add(original)
+
+    for claim in claims(50, seed=11):
+        assert index.check(asdict(claim), add=False) == []
+
+
+def test_lookup_without_add_leaves_the_index_unchanged(index, original):
+    index.check(original, add=False)
+
+    assert len(index) == 0
+    assert index.check({**original, "claim_id": "NEW"}) == []
+
+
+def test_max_claims_evicts_oldest(original):
+    index = DuplicateClaimIndex(max_claims=2)
+    for claim_id, policy in (("A", "P1"), ("B", "P2"), ("C", "P3")):
+        index.add({**original, "claim_id": claim_id, "policy_number": policy})
+
+    matches = index.check({**original, "claim_id": "X", "policy_number": "P1"})
+
+    assert len(index) == 2
+    assert "A" not in [m["claim_id"] for m in matches]
+    assert {m["match"] for m in matches} == {"near"}
+
+
+def test_snapshot_round_trip(tmp_path, original):
+    path = str(tmp_path / "dup.joblib")
+    index = DuplicateClaimIndex(path=path)
+    index.add(original)
+    assert index.save()
+
+    reloaded = DuplicateClaimIndex(path=path)
+
+    assert len(reloaded) == 1
+    assert reloaded.check({**original, "claim_id": "NEW"})[0]["match"] == "exact"
+
+
+def test_pipeline_reports_duplicates_in_result(system, make_claim):
+    system.process_claims_batch([make_claim(claim_id="ORIG")], use_ai=False)
+
+    result = system.process_claims_batch([make_claim(claim_id="COPY", total_claim_amount=7000.0)], use_ai=False)[0]
+
+    assert any("Possible duplicate of ORIG" in reason for reason in result.reasons)
@@ -0,0 +1,78 @@
+import pytest
+
+from fraud import ClaimBatch, LocalExplainer
+
+
+class FailingAIClient:
+    def chat_completion(self, payload):
+        raise ConnectionError("API unreachable")
+
+
+@pytest.fixture
+def scored(system, claims):
+    batch = claims(4)
+    batch[0].total_claim_amount = 60000.0  # fires high_claim_amount
+    batch = ClaimBatch.from_claims(batch)
+    return batch, system.rule_engine.evaluate(batch), system.model_registry.active
+
+
+def test_explains_a_batch_with_shap_and_rule_hits(system, scored):
+    batch, rules, model_version = scored
+    explainer = LocalExplainer(max_reasons=3)
+
+    explanations = explainer.explain(batch, rules, model_version)
+    probabilities = system.get_catboost_probabilities(batch, model_version)
+
+    assert len(explanations) == 4
+    for explanation, probability in zip(explanations, probabilities):
+        assert explanation["model_version"] == model_version.version
+        assert f"model fraud probability of {probability:.0%}" in explanation["explanation"]
+        points = [contribution["points"] for contribution in explanation["contributions"]]
+        assert len(explanation["reasons"]) == len(points) <= 3
+        assert points == sorted(points, reverse=True) and all(p >= explainer.min_points for p in points)
+    assert "Claim amount above $50,000 (+15.0 pts, rule)" in explanations[0]["reasons"]
+
+
+def test_explanations_are_cached_per_model_version(scored):
+    batch, rules, model_version = scored
+    explainer = LocalExplainer()
+
+    first = explainer.explain(batch, rules, model_version)
+    assert explainer.explain(batch, rules, model_version) == first
+    assert (explainer.hits, explainer.misses) == (4, 4)
+
+
+def test_failed_explanation_gives_none_for_the_whole_batch(scored, monkeypatch):
+    batch, rules, model_version = scored
+    explainer = LocalExplainer()
+    calls = []
+
+    def broken(*args):
+        calls.append(args)
+        raise RuntimeError("SHAP failed")
+
+    monkeypatch.setattr(explainer, "explain", broken)
+    pending = explainer.pending(batch, rules, model_version)
+
+    assert [pending.get(row) for row in range(4)] == [None] * 4
+    assert len(calls) == 1
+
+
+def test_local_explanation_replaces_a_failed_ai_analysis(system, claims):
+    system.ai_client = FailingAIClient()
+
+    [result] = system.process_claims_batch(claims(1))
+
+    assert result.explanation.startswith("AI analysis unavailable (API unreachable). Combined score")
+    assert "AI analysis unavailable" not in result.reasons
+
+
+def test_ai_fallback_is_kept_when_the_explainer_fails(system, claims, monkeypatch):
+    system.ai_client = FailingAIClient()
+    monkeypatch.setattr(system.explainer, "explain", lambda *args: 1 / 0)
+
+    [result] = system.process_claims_batch(claims(1))
+
+    assert result.error is None
+    assert result.explanation.startswith("AI analysis failed: API unreachable")
+    assert result.reasons == ["AI analysis unavailable"]
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fraud import ClaimBatch, FastPathScorer, SyntheticClaimGenerator
+
+FEATURES = ["incident_severity", "insured_hobbies"]
+TABLE = {
+    ("Minor Damage", "golf"): (0.10, 0.05, 0.20, 50),
+    ("Major Damage", "chess"): (0.60, 0.45, 0.80, 50),  # [q, 1 - q] straddles the 0.5 threshold
+    ("Major Damage", "golf"): (0.90, 0.80, 0.95, 50),
+    ("Unknown", "golf"): (0.30, 0.25, 0.35, 50),
+}
+
+
+@pytest.fixture
+def scorer():
+    return FastPathScorer("v1", FEATURES, TABLE, threshold=0.5, quantile=0.01, min_samples=30)
+
+
+def frame(*keys):
+    return pd.DataFrame({"incident_severity": [key[0] for key in keys],
+                         "insured_hobbies": [key[1] for key in keys]})
+
+
+def test_serves_clear_cut_combinations_and_defers_the_rest(scorer):
+    claims_df = frame(("Minor Damage", "golf"), ("Major Damage", "chess"), ("Major Damage", "golf"),
+                      ("Total Loss", "golf"), (None, "golf"))
+
+    probabilities, served = scorer.predict(claims_df, np.zeros(5))
+
+    assert served.tolist() == [True, False, True, False, True]
+    assert probabilities[[0, 2, 4]].tolist() == [0.10, 0.90, 0.30]
+    assert np.isnan(probabilities[[1, 3]]).all()
+
+
+def test_batch_input_gives_the_same_answer(scorer):
+    claims_df = frame(("Minor Damage", "golf"), ("Major Damage", "chess"), (None, "golf"), ("Major Damage", "golf"))
+
+    from_df = scorer.predict(claims_df, np.zeros(4))
+    from_batch = scorer.predict(ClaimBatch({name: ClaimBatch._column("categorical", claims_df[name].tolist())
+                                            for name in FEATURES}), np.zeros(4))
+
+    assert from_batch[1].tolist() == from_df[1].tolist()
+    np.testing.assert_array_equal(from_batch[0], from_df[0])
+
+
+def test_defers_when_the_range_straddles_a_score_boundary(scorer):
+    claims_df = frame(("Minor Damage", "golf"), ("Minor Damage", "golf"))
+
+    # Combined score is 0.6 * rule score + 40 * p: [2, 8] straddles 5, [32, 38] does not straddle 30
+    _, served = scorer.predict(claims_df, np.array([0.0, 50.0]), boundaries=[5.0, 30.0])
+
+    assert served.tolist() == [False, True]
+
+
+def test_save_load_round_trip(scorer, tmp_path):
+    path = FastPathScorer.path_for(str(tmp_path), "v1")
+    scorer.save(path)
+
+    loaded = FastPathScorer.load(path)
+    claims_df = frame(*TABLE, ("Total Loss", "golf"))
+    rule_scores = np.linspace(0, 60, len(claims_df))
+
+    assert loaded.table == TABLE
+    assert (loaded.model_version, loaded.features, loaded.threshold) == ("v1", FEATURES, 0.5)
+    for expected, actual in zip(scorer.predict(claims_df, rule_scores, [30.0]),
+                                loaded.predict(claims_df, rule_scores, [30.0])):
+        np.testing.assert_array_equal(expected, actual)
+    assert FastPathScorer.load(str(tmp_path / "missing.json")) is None
+
+
+def test_pipeline_uses_the_table_only_for_served_claims(system):
+    model_version = system.model_registry.active
+    claims_df = SyntheticClaimGenerator(seed=11).dataframe(2000)
+    scorer = FastPathScorer.distill(model_version, [claims_df], min_samples=20)
+    batch = ClaimBatch.from_dataframe(claims_df.iloc[:300])
+    system.fast_path_enabled = True
+    system._fast_paths[model_version.version] = scorer
+    rule_scores = system.rule_engine.evaluate(batch).scores
+
+    fast = system.get_catboost_probabilities(batch, model_version, rule_scores=rule_scores)
+    full = system.get_catboost_probabilities(batch, model_version)
+    table_answers, served = scorer.predict(batch, rule_scores, system.score_boundaries())
+
+    assert 0 < served.sum() < len(batch)
+    np.testing.assert_allclose(fast[served], table_answers[served])
+    np.testing.assert_allclose(fast[~served], full[~served])
@@ -0,0 +1,131 @@
+import pytest
+
+from fraud import BufferedFirestoreWriter
+
+
+class FakeDocument:
+    def __init__(self, db, path):
+        self.db = db
+        self.path = path
+
+    def set(self, data, merge=False):
+        self.db.write(("set", self.path, data, merge))
+
+    def update(self, data):
+        self.db.write(("update", self.path, data, False))
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.operations = []
+
+    def set(self, ref, data, merge=False):
+        self.operations.append(("set", ref.path, data, merge))
+
+    def update(self, ref, data):
+        self.operations.append(("update", ref.path, data, False))
+
+    def commit(self):
+        if self.db.fail_batches:
+            raise RuntimeError("batch rejected")
+        self.db.commits.append(self.operations)
+
+
+class FakeFirestore:
+    """Records WriteBatch commits and single-document writes; fail_on makes writes to those paths fail"""
+
+    def __init__(self, fail_batches=False, fail_on=()):
+        self.commits = []
+        self.single_writes = []
+        self.fail_batches = fail_batches
+        self.fail_on = set(fail_on)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def collection(self, name):
+        db = self
+
+        class Collection:
+            def document(self, doc_id):
+                return FakeDocument(db, f"{name}/{doc_id}")
+        return Collection()
+
+    def write(self, operation):
+        if operation[1] in self.fail_on:
+            raise RuntimeError("permission denied")
+        self.single_writes.append(operation)
+
+
+@pytest.fixture
+def db():
+    return FakeFirestore()
+
+
+@pytest.fixture
+def writer(db):
+    writer = BufferedFirestoreWriter(db, max_batch_size=3, flush_interval=60)
+    yield writer
+    writer.close()
+
+
+def test_increments_to_one_document_are_coalesced(db, writer):
+    writer.increment("summary", "dashboard", {"total_analyses": 1, "risk.high": 1})
+    writer.increment("summary", "dashboard", {"total_analyses": 1, "risk.low": 2})
+    writer.flush()
+
+    [[(op, path, data, merge)]] = db.commits
+    assert (op, path, merge) == ("set", "summary/dashboard", True)
+    assert data["total_analyses"].value == 2
+    assert {key: increment.value for key, increment in data["risk"].items()} == {"high": 1, "low": 2}
+
+
+def test_set_then_update_is_one_set(db, writer):
+    writer.set("claims", "C1", {"status": "pending", "amount": 10})
+    writer.update("claims", "C1", {"status": "approved"})
+    writer.flush()
+
+    assert db.commits == [[("set", "claims/C1", {"status": "approved", "amount": 10}, False)]]
+
+
+def test_increment_after_set_flushes_the_set_first(db, writer):
+    writer.set("summary", "dashboard", {"total_analyses": 0})
+    writer.increment("summary", "dashboard", {"total_analyses": 1})
+    writer.flush()
+
+    assert [[operation[0] for operation in commit] for commit in db.commits] == [["set"], ["set"]]
+    assert db.commits[1][0][3] is True  # the increment merges into the document the first batch wrote
+
+
+def test_flushes_when_max_batch_size_documents_are_pending(db, writer):
+    for i in range(2):
+        writer.set("claims", f"C{i}", {"n": i})
+    assert db.commits == []
+
+    writer.set("claims", "C2", {"n": 2})
+    assert [[path for _, path, _, _ in commit] for commit in db.commits] == [["claims/C0", "claims/C1", "claims/C2"]]
+    assert writer.written == 3
+
+
+def test_close_flushes_pending_writes(db):
+    writer = BufferedFirestoreWriter(db, max_batch_size=10, flush_interval=60)
+    writer.set("claims", "C1", {"n": 1})
+    assert writer.has_pending("claims", "C1")
+
+    assert writer.close() == {"written": 1, "failed": []}
+    assert db.commits == [[("set", "claims/C1", {"n": 1}, False)]]
+    assert not writer.has_pending("claims", "C1")
+
+
+def test_failed_batch_is_retried_per_document():
+    db = FakeFirestore(fail_batches=True, fail_on={"claims/C2"})
+    writer = BufferedFirestoreWriter(db, max_batch_size=10, flush_interval=60)
+    for i in range(3):
+        writer.set("claims", f"C{i}", {"n": i})
+
+    outcome = writer.close()
+
+    assert outcome["written"] == 2
+    assert [(failure["document_id"], failure["error"]) for failure in outcome["failed"]] == [("C2", "permission denied")]
+    assert [path for _, path, _, _ in db.single_writes] == ["claims/C0", "claims/C1"]
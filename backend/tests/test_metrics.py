@@ -0,0 +1,72 @@
+import re
+
+import pytest
+
+from fraud.metrics import METRICS, MetricsRegistry, track_stage
+
+
+def test_render_prometheus_text_format():
+    registry = MetricsRegistry()
+    registry.counter("jobs_total", "Jobs run")
+    registry.gauge("queue_depth", "Items waiting")
+    registry.histogram("job_seconds", "Job duration", buckets=(0.1, 1.0))
+    registry.inc("jobs_total", status="ok")
+    registry.inc("jobs_total", 2, status="ok")
+    registry.inc("jobs_total", status='bad "quote"')
+    registry.set("queue_depth", 7)
+    for value in (0.05, 0.5, 3.0):
+        registry.observe("job_seconds", value, stage="ai")
+
+    assert registry.render() == "\n".join([
+        "# HELP jobs_total Jobs run",
+        "# TYPE jobs_total counter",
+        'jobs_total{status="ok"} 3',
+        'jobs_total{status="bad \\"quote\\""} 1',
+        "# HELP queue_depth Items waiting",
+        "# TYPE queue_depth gauge",
+        "queue_depth 7",
+        "# HELP job_seconds Job duration",
+        "# TYPE job_seconds histogram",
+        'job_seconds_bucket{stage="ai",le="0.1"} 1',
+        'job_seconds_bucket{stage="ai",le="1"} 2',
+        'job_seconds_bucket{stage="ai",le="+Inf"} 3',
+        'job_seconds_sum{stage="ai"} 3.550000',
+        'job_seconds_count{stage="ai"} 3',
+    ]) + "\n"
+
+
+def stage_count(stage: str) -> int:
+    match = re.search(rf'^fraud_stage_duration_seconds_count{{stage="{stage}"}} (\d+)$', METRICS.render(), re.M)
+    return int(match.group(1)) if match else 0
+
+
+def test_track_stage_records_timings_and_metrics():
+    timings = {}
+    before = stage_count("unit_test")
+
+    for _ in range(2):
+        with track_stage("unit_test", timings):
+            pass
+
+    assert timings["unit_test"] > 0
+    assert stage_count("unit_test") == before + 2
+
+
+def test_track_stage_records_failed_stages():
+    timings = {}
+    with pytest.raises(ValueError):
+        with track_stage("unit_test_failure", timings):
+            raise ValueError("boom")
+
+    assert "unit_test_failure" in timings
+
+
+def test_pipeline_results_carry_stage_timings(system, claims):
+    before = {stage: stage_count(stage) for stage in ("rules", "preprocess", "model", "persist")}
+
+    results = system.process_claims_batch(claims(3), use_ai=False)
+
+    for result in results:
+        assert {"rules", "preprocess", "model", "save", "persist"} <= result.stage_timings_ms.keys()
+        assert all(ms >= 0 for ms in result.stage_timings_ms.values())
+    assert all(stage_count(stage) > count for stage, count in before.items())
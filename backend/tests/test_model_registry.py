@@ -0,0 +1,74 @@
+import pytest
+
+from fraud import ModelRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(root=str(tmp_path / "registry"), refresh_interval=0)
+
+
+def test_register_and_activate(registry):
+    assert registry.active.version == ModelRegistry.LEGACY_VERSION
+
+    version = registry.register_legacy(activate=False)
+    assert version == "v1"
+    assert registry.versions() == ["v1"]
+    assert registry.active_version_name() is None
+
+    registry.activate("v1")
+    assert registry.active_version_name() == "v1"
+    assert registry.active.version == "v1"
+    assert registry.active.categorical_features == registry.load_legacy().categorical_features
+
+
+def test_activate_rejects_unknown_version(registry):
+    with pytest.raises(ValueError):
+        registry.activate("v9")
+
+
+def test_hot_swap_when_another_process_moves_active(registry):
+    registry.register_legacy(activate=True)
+    held = registry.active
+
+    # A second process (e.g. the retrainer) registers and activates v2
+    other = ModelRegistry(root=registry.root, refresh_interval=0)
+    other.register(held.model, held.categorical_features, activate=True)
+
+    assert registry.active.version == "v2"
+    assert held.version == "v1"  # callers holding the old snapshot finish on it
+
+
+def test_bad_active_pointer_keeps_serving_current_version(registry, caplog):
+    registry.register_legacy(activate=True)
+    with open(f"{registry.root}/ACTIVE", "w") as f:
+        f.write("v9\n")
+
+    assert registry.refresh() is False
+    assert registry.active.version == "v1"
+    assert "v9" in caplog.text
+
+
+def test_corrupt_model_keeps_serving_current_version(registry):
+    registry.register_legacy(activate=True)
+    held = registry.active
+    registry.register(held.model, held.categorical_features)
+    with open(f"{registry.root}/v2/model.cbm", "wb") as f:
+        f.write(b"not a model")
+
+    with pytest.raises(Exception):
+        registry.activate("v2")
+    assert registry.active_version_name() == "v1"
+
+    with open(f"{registry.root}/ACTIVE", "w") as f:
+        f.write("v2\n")
+    assert registry.active.version == "v1"
+
+
+def test_bad_pointer_without_a_loaded_version_raises(registry):
+    registry.register_legacy(activate=False)
+    with open(f"{registry.root}/ACTIVE", "w") as f:
+        f.write("v9\n")
+
+    with pytest.raises(FileNotFoundError):
+        registry.refresh()
@@ -0,0 +1,36 @@
+from dataclasses import asdict
+
+import pandas as pd
+
+from fraud import PolicyHistoryIndex, SQLiteStorage
+
+
+def test_batch_loads_missing_policies_in_one_call(make_claim):
+    storage = SQLiteStorage()
+    for policy, dates in {"P1": ["2024-08-20", "2024-03-01", "2023-01-01"], "P2": ["2024-08-30"]}.items():
+        for i, date in enumerate(dates):
+            storage.save_claim(make_claim(claim_id=f"{policy}-{i}", policy_number=policy, incident_date=date,
+                                          total_claim_amount=1000.0))
+    calls = []
+    index = PolicyHistoryIndex(lambda policies: calls.append(sorted(policies)) or
+                               storage.get_claims_by_policies(policies))
+    batch = pd.DataFrame([asdict(make_claim(claim_id=f"N{i}", policy_number=policy, incident_date="2024-09-01"))
+                          for i, policy in enumerate(["P1", "P2", "P3", "P1"])])
+
+    features = index.velocity_features(batch)
+    index.velocity_features(batch)
+
+    assert calls == [["P1", "P2", "P3"]]
+    assert features["prior_claims_30d"].tolist() == [1, 1, 0, 1]
+    assert features["prior_claims_365d"].tolist() == [2, 1, 0, 2]
+    assert features["prior_claims_amount"].tolist() == [3000.0, 1000.0, 0.0, 3000.0]
+
+
+def test_recorded_claims_update_cached_policies(make_claim):
+    index = PolicyHistoryIndex(lambda policies: {str(policy): [] for policy in policies})
+    assert index.history("P1") == []
+
+    index.record_claim(asdict(make_claim(claim_id="C1", policy_number="P1", incident_date="2024-09-01")))
+
+    assert [summary[0] for summary in index.history("P1")] == ["C1"]
+    assert (index.hits, index.misses) == (1, 1)
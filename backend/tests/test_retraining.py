@@ -0,0 +1,99 @@
+import pytest
+
+from fraud import ModelRegistry, ModelRetrainer, SQLiteStorage
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = ModelRegistry(root=str(tmp_path / "registry"), refresh_interval=0)
+    registry.register_legacy(activate=True)
+    return registry
+
+
+@pytest.fixture
+def storage():
+    storage = SQLiteStorage(":memory:")
+    yield storage
+    storage.close()
+
+
+def save_labelled(storage, claims, n, seed=3):
+    """Claims labelled through fraud_reported, fraud whenever the damage is major"""
+    for claim in claims(n, seed=seed):
+        claim.fraud_reported = "Y" if claim.incident_severity == "Major Damage" else "N"
+        assert storage.save_claim(claim)
+
+
+def retrainer(storage, registry, **options):
+    options = {"iterations": 20, "early_stopping_rounds": 5, "validation_fraction": 0.4, "min_claims": 100,
+               "tolerance": 1.0, "trust_fraud_reported": True, **options}
+    return ModelRetrainer(storage, registry, **options)
+
+
+@pytest.mark.parametrize("claim, trusted, expected", [
+    ({"status": "rejected"}, False, 1),
+    ({"status": "Approved", "fraud_reported": "Y"}, False, 0),
+    ({"fraud_reported": "Y"}, False, 1),
+    ({"fraud_reported": "N"}, False, None),
+    ({"fraud_reported": "N"}, True, 0),
+    ({"status": "pending"}, True, None),
+])
+def test_label(storage, registry, claim, trusted, expected):
+    assert retrainer(storage, registry, trust_fraud_reported=trusted).label(claim) == expected
+
+
+def test_skips_below_min_claims(storage, registry, claims):
+    save_labelled(storage, claims, 40)
+
+    report = retrainer(storage, registry).run()
+
+    assert report["status"] == "skipped"
+    assert report["labeled_claims"] == 40
+    assert registry.versions() == ["v1"]
+
+
+def test_holdout_splits_are_disjoint_and_stable(storage, registry):
+    claim_ids = [f"C{i}" for i in range(2000)]
+    stopping, gate = retrainer(storage, registry).holdout_masks(claim_ids)
+
+    assert not (stopping & gate).any()
+    assert 0.15 < stopping.mean() < 0.25 and 0.15 < gate.mean() < 0.25
+    again = retrainer(storage, registry).holdout_masks(claim_ids[::-1])
+    assert (again[1][::-1] == gate).all()
+
+
+def test_registered_version_advances_the_watermark(storage, registry, claims):
+    save_labelled(storage, claims, 300)
+
+    report = retrainer(storage, registry).run()
+
+    assert report["status"] == "registered"
+    assert registry.active.version == report["version"] == "v2"
+    assert registry.active.metadata["trained_through"] == report["trained_through"]
+    assert registry.active.metadata["parent_version"] == "v1"
+
+    # Nothing changed since the watermark, so the next run reads no claims
+    again = retrainer(storage, registry).run()
+    assert again["updated_since"] == report["trained_through"]
+    assert again["labeled_claims"] == 0
+    assert again["status"] == "skipped"
+
+
+def test_regression_on_the_gate_split_is_rejected(storage, registry, claims, monkeypatch):
+    save_labelled(storage, claims, 300)
+    base_model = registry.active.model
+    gated = []
+
+    def evaluate(model, pool, labels):
+        gated.append(len(labels))
+        return {"AUC": 0.8, "Logloss": 0.5} if model is base_model else {"AUC": 0.7, "Logloss": 0.6}
+
+    job = retrainer(storage, registry, tolerance=0.0)
+    monkeypatch.setattr(job, "evaluate", evaluate)
+    report = job.run()
+
+    assert report["status"] == "rejected"
+    assert "AUC" in report["reason"] and "Logloss" in report["reason"]
+    assert gated == [report["validation_claims"]] * 2
+    assert report["validation_claims"] + report["early_stopping_claims"] + report["training_claims"] == 300
+    assert registry.versions() == ["v1"]
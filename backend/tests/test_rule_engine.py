@@ -0,0 +1,121 @@
+import copy
+import json
+import os
+from dataclasses import asdict
+from datetime import datetime
+
+import pytest
+
+from fraud import ClaimBatch, RuleEngine
+from fraud.rules import DEFAULT_FRAUD_RULES
+
+
+def legacy_rule_score(claim_dict):
+    """The hard-coded scorer the rule table replaced"""
+    score = 0
+    if claim_dict.get('total_claim_amount', 0) > 50000:
+        score += 25
+    hour = claim_dict.get('incident_hour_of_the_day', 12)
+    if hour <= 4 or hour >= 22:
+        score += 15
+    if (claim_dict.get('witnesses', 1) == 0 and
+            str(claim_dict.get('police_report_available', 'YES')).upper() == 'NO'):
+        score += 20
+    if claim_dict.get('incident_state', '') != claim_dict.get('policy_state', ''):
+        score += 10
+    current_year = datetime.now().year
+    vehicle_age = current_year - int(claim_dict.get('auto_year', current_year))
+    if vehicle_age > 15 and claim_dict.get('total_claim_amount', 0) > 30000:
+        score += 20
+    return min(score, 100)
+
+
+EDGE_CASES = [
+    {"total_claim_amount": 50000.0},
+    {"total_claim_amount": 50000.01},
+    {"incident_hour_of_the_day": 4},
+    {"incident_hour_of_the_day": 5},
+    {"incident_hour_of_the_day": 21},
+    {"incident_hour_of_the_day": 22},
+    {"witnesses": 0, "police_report_available": "no"},
+    {"witnesses": 0, "police_report_available": "?"},
+    {"incident_state": "NY"},
+    {"auto_year": datetime.now().year - 15, "total_claim_amount": 40000.0},
+    {"auto_year": datetime.now().year - 16, "total_claim_amount": 40000.0},
+    {"auto_year": datetime.now().year - 16, "total_claim_amount": 30000.0},
+    {"auto_year": 1990, "total_claim_amount": 90000.0, "incident_hour_of_the_day": 23, "witnesses": 0,
+     "police_report_available": "NO", "incident_state": "NY"},
+]
+
+
+@pytest.fixture(params=["config", "defaults"])
+def engine(request):
+    return RuleEngine.load() if request.param == "config" else RuleEngine.load("missing/fraud_rules.json")
+
+
+def test_table_matches_legacy_scorer_on_synthetic_claims(engine, claims):
+    batch = claims(500, seed=3)
+
+    scores = engine.evaluate(ClaimBatch.from_claims(batch)).scores
+
+    assert scores.tolist() == [legacy_rule_score(asdict(claim)) for claim in batch]
+
+
+@pytest.mark.parametrize("overrides", EDGE_CASES)
+def test_table_matches_legacy_scorer_at_boundaries(engine, make_claim, overrides):
+    claim = asdict(make_claim(**overrides))
+
+    single = engine.evaluate({key: [value] for key, value in claim.items()}).scores[0]
+    batched = engine.evaluate(ClaimBatch.from_claims([make_claim(**overrides)])).scores[0]
+
+    assert single == batched == legacy_rule_score(claim)
+
+
+def test_velocity_rules_only_fire_with_prior_claims(engine, make_claim):
+    claim = asdict(make_claim())
+    quiet = engine.evaluate({key: [value] for key, value in claim.items()})
+    busy = engine.evaluate({**{key: [value] for key, value in claim.items()},
+                            "prior_claims_90d": [1], "prior_claims_365d": [3]})
+
+    assert quiet.triggered_rules(0) == []
+    assert set(busy.triggered_rules(0)) == {"repeat_claim_90d", "frequent_claims_365d"}
+    assert busy.scores[0] > quiet.scores[0]
+
+
+@pytest.fixture
+def rules_file(tmp_path):
+    path = tmp_path / "fraud_rules.json"
+
+    def write(rule_table, mtime):
+        path.write_text(json.dumps(rule_table))
+        os.utime(path, (mtime, mtime))
+        return str(path)
+    return write
+
+
+def test_edited_config_is_picked_up_on_next_evaluate(rules_file, make_claim):
+    engine = RuleEngine.load(rules_file(DEFAULT_FRAUD_RULES, 1_000_000))
+    claim = {key: [value] for key, value in asdict(make_claim(incident_state="NY")).items()}
+    assert engine.evaluate(claim).scores[0] == 10
+
+    edited = copy.deepcopy(DEFAULT_FRAUD_RULES)
+    edited["rules"][3]["weight"] = 30
+    rules_file(edited, 2_000_000)
+
+    assert engine.evaluate(claim).scores[0] == 30
+
+
+def test_invalid_config_keeps_the_previous_rules(rules_file, make_claim):
+    engine = RuleEngine.load(rules_file(DEFAULT_FRAUD_RULES, 1_000_000))
+    claim = {key: [value] for key, value in asdict(make_claim(incident_state="NY")).items()}
+
+    # The new rule is valid but the one after it is not: nothing may be swapped in
+    broken = copy.deepcopy(DEFAULT_FRAUD_RULES)
+    broken["rules"].insert(0, {"name": "extra", "weight": 5, "all": [{"field": "witnesses", "op": ">=", "value": 0}]})
+    broken["rules"].append({"name": "bad", "weight": 5, "all": [{"field": "witnesses", "op": "~", "value": 0}]})
+    rules_file(broken, 2_000_000)
+
+    evaluation = engine.evaluate(claim)
+    assert evaluation.scores[0] == 10
+    assert evaluation.rule_names == [rule["name"] for rule in DEFAULT_FRAUD_RULES["rules"]]
+    assert len(engine.weights) == len(DEFAULT_FRAUD_RULES["rules"])
@@ -0,0 +1,65 @@
+import subprocess
+import sys
+
+import pytest
+
+from fraud import runtime
+from fraud.runtime import LazyModule, format_startup_report, startup_phase
+
+
+@pytest.fixture
+def timings(monkeypatch):
+    timings = []
+    monkeypatch.setattr(runtime, "STARTUP_TIMINGS", timings)
+    return timings
+
+
+def test_lazy_module_imports_on_first_attribute_access(tmp_path, monkeypatch, timings):
+    (tmp_path / "lazy_probe.py").write_text("VALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "lazy_probe", raising=False)
+
+    probe = LazyModule("lazy_probe")
+    assert "lazy_probe" not in sys.modules
+    assert timings == []
+
+    assert probe.VALUE == 42
+    assert "lazy_probe" in sys.modules
+    assert [name for name, _, _ in timings] == ["import lazy_probe"]
+
+    assert probe.VALUE == 42
+    assert len(timings) == 1
+
+
+def test_importing_the_package_leaves_heavy_dependencies_unloaded():
+    heavy = ["catboost", "firebase_admin", "requests", "joblib", "google.cloud.firestore"]
+    code = f"import sys, fraud; print([name for name in {heavy!r} if name in sys.modules])"
+
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+    assert output.strip() == "[]"
+
+
+def test_startup_phases_nest(timings):
+    with startup_phase("build system"):
+        with startup_phase("load model"):
+            pass
+        with startup_phase("connect storage"):
+            pass
+
+    assert [(name, depth) for name, depth, _ in timings] == [
+        ("build system", 0), ("load model", 1), ("connect storage", 1)]
+    assert timings[0][2] >= timings[1][2] + timings[2][2]
+
+
+def test_startup_report_indents_nested_phases_and_totals_top_level_ones():
+    report = format_startup_report([["import numpy, pandas", 0, 120.0], ["build system", 0, 300.0],
+                                    ["load model", 1, 250.0]])
+
+    assert report.splitlines() == [
+        f"{'phase':<44}{'ms':>10}",
+        f"{'import numpy, pandas':<44}{'120.0':>10}",
+        f"{'build system':<44}{'300.0':>10}",
+        f"{'  load model':<44}{'250.0':>10}",
+        f"{'total':<44}{'420.0':>10}",
+    ]
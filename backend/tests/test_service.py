@@ -0,0 +1,123 @@
+import json
+import queue
+import threading
+import urllib.error
+import urllib.request
+from dataclasses import asdict
+
+import pytest
+
+from fraud import ScoringService
+from fraud.service import MicroBatcher
+
+
+def blocked_batcher(max_queue_size=8, max_wait_ms=50.0):
+    """A MicroBatcher whose handler waits for `release` and records every batch it gets"""
+    batches, started, release = [], threading.Event(), threading.Event()
+
+    def handle_batch(items):
+        batches.append(list(items))
+        started.set()
+        release.wait(5)
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(handle_batch, max_batch_size=64, max_wait_ms=max_wait_ms, max_queue_size=max_queue_size)
+    return batcher, batches, started, release
+
+
+def test_micro_batcher_coalesces_waiting_items():
+    batcher, batches, started, release = blocked_batcher()
+    first = batcher.submit(0)
+    assert started.wait(5)
+
+    # Queued while the worker is busy, so they go out as one batch
+    futures = [batcher.submit(i) for i in range(1, 6)]
+    release.set()
+
+    assert first.result(5) == 0
+    assert [future.result(5) for future in futures] == [2, 4, 6, 8, 10]
+    assert batches == [[0], [1, 2, 3, 4, 5]]
+    assert batcher.stats()["largest_batch"] == 5
+
+
+def test_submit_all_queues_all_items_or_none():
+    batcher, _, started, release = blocked_batcher(max_queue_size=4)
+    batcher.submit(0)
+    assert started.wait(5)
+    batcher.submit_all([1, 2, 3])
+
+    with pytest.raises(queue.Full):
+        batcher.submit_all([4, 5])
+    assert batcher.stats()["queue_depth"] == 3
+    release.set()
+
+
+@pytest.fixture
+def service(system):
+    service = ScoringService(system, max_batch_size=8, max_wait_ms=1.0, max_queue_size=4)
+    server = service.make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield service, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def post(url, body):
+    data = body if isinstance(body, bytes) else json.dumps(body).encode()
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, dict(response.headers), json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), json.loads(e.read())
+
+
+def test_score_endpoint(service, claims):
+    _, url = service
+    status, _, body = post(f"{url}/score", {"claims": [asdict(claim) for claim in claims(3)]})
+
+    assert status == 200
+    assert [result["claim_id"] for result in body["results"]] == ["T7_00000", "T7_00001", "T7_00002"]
+    assert all(result["risk_level"] and not result["error"] for result in body["results"])
+
+
+@pytest.mark.parametrize("body", [b"{not json", {"claims": []}, {"claims": [{"claim_id": "X"}]}, [1, 2]])
+def test_bad_payload_is_rejected_with_400(service, body):
+    _, url = service
+    status, _, response = post(f"{url}/score", body)
+
+    assert status == 400
+    assert response["error"]
+
+
+def test_full_queue_returns_503_without_queueing_part_of_the_request(service, claims):
+    scoring, url = service
+    started, release = threading.Event(), threading.Event()
+    scored = []
+
+    def stalled(items):
+        scored.extend(claim.claim_id for claim in items)
+        started.set()
+        release.wait(5)
+        return [{} for _ in items]
+
+    scoring.score_batcher.handle_batch = stalled
+    held, *waiting = claims(4, seed=1)
+    scoring.score_batcher.submit(held)
+    assert started.wait(5)
+    scoring.score_batcher.submit_all(waiting)  # 3 of the 4 queue slots taken
+
+    status, headers, body = post(f"{url}/score", {"claims": [asdict(claim) for claim in claims(2, seed=2)]})
+
+    assert status == 503
+    assert headers["Retry-After"] == "1"
+    assert scoring.score_batcher.stats()["queue_depth"] == 3
+    release.set()
+    assert not any(claim_id.startswith("T2_") for claim_id in scored)
+
+
+def test_request_larger_than_the_queue_returns_413(service, claims):
+    _, url = service
+    status, _, _ = post(f"{url}/score", {"claims": [asdict(claim) for claim in claims(5)]})
+
+    assert status == 413
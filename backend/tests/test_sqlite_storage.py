@@ -0,0 +1,101 @@
+import pytest
+
+from fraud import FraudAnalysisResult, SQLiteStorage
+
+
+def analysis(claim_id, score):
+    return FraudAnalysisResult(claim_id, 0.0, 0.0, score, 0.0, "", "accept", [], "LOW", [])
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "claims.sqlite"))
+    yield storage
+    storage.close()
+
+
+def test_policy_pages_cover_every_claim_once(storage, make_claim):
+    for i in range(23):
+        storage.save_claim(make_claim(claim_id=f"C{i:03d}", policy_number="P1"))
+    storage.save_claim(make_claim(claim_id="OTHER", policy_number="P2"))
+
+    page, cursor = storage.get_claims_by_policy_page("P1", page_size=10)
+    ids = [claim["claim_id"] for claim in page]
+    while cursor is not None:
+        page, cursor = storage.get_claims_by_policy_page("P1", page_size=10, cursor=cursor)
+        ids += [claim["claim_id"] for claim in page]
+
+    assert ids == [f"C{i:03d}" for i in range(23)]
+    assert [claim["claim_id"] for claim in storage.iter_claims_by_policy("P1", page_size=4, limit=6)] == ids[:6]
+
+
+def test_exact_multiple_of_page_size_ends_with_an_empty_page(storage, make_claim):
+    for i in range(6):
+        storage.save_claim(make_claim(claim_id=f"C{i}", policy_number="P1"))
+
+    page, cursor = storage.get_claims_by_policy_page("P1", page_size=3)
+    page, cursor = storage.get_claims_by_policy_page("P1", page_size=3, cursor=cursor)
+    assert len(page) == 3 and cursor is not None
+    assert storage.get_claims_by_policy_page("P1", page_size=3, cursor=cursor) == ([], None)
+
+
+def test_high_risk_pages_break_score_ties_by_claim_id(storage):
+    scores = {f"A{i:02d}": score for i, score in enumerate([95, 80, 80, 80, 80, 72, 70, 69.9, 10, 80])}
+    storage.save_analysis_results([analysis(claim_id, score) for claim_id, score in scores.items()])
+
+    pages = []
+    page, cursor = storage.get_high_risk_claims_page(70.0, page_size=3)
+    pages.append(page)
+    while cursor is not None:
+        page, cursor = storage.get_high_risk_claims_page(70.0, page_size=3, cursor=cursor)
+        pages.append(page)
+    ordered = [(doc["combined_score"], doc["claim_id"]) for page in pages for doc in page]
+
+    expected = sorted(((score, claim_id) for claim_id, score in scores.items() if score >= 70), reverse=True)
+    assert ordered == expected
+    assert [doc["claim_id"] for doc in storage.get_high_risk_claims(70.0, limit=2)] == ["A00", "A09"]
+
+
+def test_updated_since_pages_in_update_order(storage, make_claim):
+    for i in range(7):
+        claim = make_claim(claim_id=f"C{i}")
+        claim.updated_at = f"2024-01-0{1 + i % 3}T00:00:00"
+        storage.save_claim(claim)
+
+    every = [claim["claim_id"] for claim in storage.iter_claims_updated_since(page_size=2)]
+    since = [claim["claim_id"] for claim in storage.iter_claims_updated_since("2024-01-02T00:00:00", page_size=2)]
+
+    assert every == ["C0", "C3", "C6", "C1", "C4", "C2", "C5"]
+    assert since == ["C2", "C5"]
+
+
+def test_bulk_policy_lookup_chunks_past_the_variable_limit(storage, make_claim, monkeypatch):
+    monkeypatch.setattr(SQLiteStorage, "MAX_SQL_VARIABLES", 4)
+    for i in range(10):
+        storage.save_claim(make_claim(claim_id=f"C{i}", policy_number=f"P{i % 5}"))
+
+    claims = storage.get_claims_by_policies([f"P{i}" for i in range(7)] + ["P0"])
+
+    assert sorted(claims) == [f"P{i}" for i in range(7)]
+    assert [claim["claim_id"] for claim in claims["P1"]] == ["C1", "C6"]
+    assert claims["P6"] == []
+
+
+def test_reanalysis_replaces_summary_contribution(storage):
+    storage.save_analysis_results([analysis("A1", 90), analysis("A2", 30)])
+    storage.save_analysis_results([analysis("A1", 20)])
+
+    summary = storage.get_dashboard_summary()
+    assert summary["total_analyses"] == 2
+    assert summary["high_risk_count"] == 0
+
+
+def test_missing_values_are_stored_as_null(storage, make_claim):
+    assert storage.save_claim(make_claim(claim_id="NAN", policy_number="P1", authorities_contacted=float("nan")))
+    result = analysis("NAN", 55)
+    result.catboost_probability = float("nan")
+    assert storage.save_analysis_results([result]) == {"NAN": True}
+
+    assert storage.get_claims(["NAN"])["NAN"]["authorities_contacted"] is None
+    assert storage.get_analysis_results(["NAN"])["NAN"]["catboost_probability"] is None
+    assert [claim["claim_id"] for claim in storage.iter_claims_by_policy("P1")] == ["NAN"]
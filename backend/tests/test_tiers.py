@@ -0,0 +1,50 @@
+import pytest
+
+from fraud import StubAIClient
+
+
+@pytest.fixture
+def tiered(system):
+    system.tiered_mode = True
+    system.tier_low_score, system.tier_high_score = 20.0, 80.0
+    system.ai_client = StubAIClient()
+    return system
+
+
+@pytest.mark.parametrize("combined_score, tier", [
+    (0.0, "algorithmic"),
+    (20.0, "algorithmic"),
+    (20.01, "ai"),
+    (79.99, "ai"),
+    (80.0, "algorithmic"),
+    (100.0, "algorithmic"),
+])
+def test_band_edges(tiered, combined_score, tier):
+    assert tiered._decision_tier({"combined_score": combined_score}, use_ai=True) == tier
+
+
+def test_stats_count_each_tier(tiered):
+    for score in (10.0, 50.0, 60.0, 90.0):
+        tiered._decision_tier({"combined_score": score}, use_ai=True)
+
+    stats = tiered.get_tier_stats()
+    assert (stats["ai"], stats["algorithmic"], stats["ai_disabled"]) == (2, 2, 0)
+    assert stats["algorithmic_share"] == 0.5
+
+
+def test_ai_disabled_claims_are_not_counted_as_tier_decisions(tiered, claims):
+    tiered.process_claims_batch(claims(4), use_ai=False)
+
+    stats = tiered.get_tier_stats()
+    assert (stats["ai"], stats["algorithmic"], stats["ai_disabled"]) == (0, 0, 4)
+    assert stats["algorithmic_share"] == 0.0
+    assert tiered.ai_client.calls == 0
+
+
+def test_only_ambiguous_claims_reach_the_ai(tiered, claims):
+    results = tiered.process_claims_batch(claims(20))
+
+    ambiguous = [result for result in results if 20 < result.combined_score < 80]
+    assert [result.decision_tier for result in results] == [
+        "ai" if 20 < result.combined_score < 80 else "algorithmic" for result in results]
+    assert tiered.ai_client.calls == len(ambiguous) == tiered.get_tier_stats()["ai"]